@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmark di owl2plantuml_v17.py su ontologie RDF/XML sintetiche con la forma del CCM.
+
+Esempio:
+    python benchmark_owl2plantuml.py --axioms 1000 10000 100000 --label v17
+    python benchmark_owl2plantuml.py --axioms 1000 10000 100000 --compare v17
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import owl2plantuml_v17 as converter
+
+BASE = 'http://example.org/synthetic#'
+RDF = converter.RDF
+RDFS = converter.RDFS
+XSD = converter.XSD
+
+# Fuori dal repository, così i risultati restano tra un'esecuzione e l'altra senza finire nel working tree
+RESULTS_FILE = os.path.join(tempfile.gettempdir(), 'owl2plantuml_benchmark_results.jsonl')
+
+# Composizione di un'unità di ontologia, con proporzioni simili al CCM
+UNIT = {
+    'classes': 10,
+    'object_properties': 5,
+    'datatype_properties': 10,
+    'enumerations': 1,
+    'equivalences': 1,
+    'reified': 2,
+}
+ENUM_VALUES = 8
+
+def axioms_per_unit(enum_values=ENUM_VALUES):
+    """Assiomi contenuti in un'unità: dichiarazione, commento e superclasse per le classi,
+    dichiarazione, dominio e range per le proprietà, un assioma per valore delle enumerazioni"""
+    return (3 * UNIT['classes'] + 3 * UNIT['object_properties'] + 3 * UNIT['datatype_properties']
+            + UNIT['enumerations'] * (1 + enum_values) + UNIT['equivalences'] + UNIT['reified'])
+
+def shape_for(axioms, enum_values=ENUM_VALUES):
+    """Numero di elementi di ciascun tipo per ottenere circa il numero di assiomi indicato"""
+    units = max(1, round(axioms / axioms_per_unit(enum_values)))
+    return {kind: count * units for kind, count in UNIT.items()}
+
+def write_synthetic_ontology(path, classes, object_properties, datatype_properties, enumerations,
+                             equivalences, reified, enum_values=ENUM_VALUES, seed=0):
+    """Scrive un'ontologia RDF/XML sintetica, un elemento alla volta"""
+    rng = random.Random(seed)
+    
+    def iri(name):
+        return quoteattr(BASE + name)
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0"?>\n'
+                f'<rdf:RDF xmlns="{BASE}"\n'
+                '     xml:base="http://example.org/synthetic"\n'
+                '     xmlns:owl="http://www.w3.org/2002/07/owl#"\n'
+                f'     xmlns:rdf="{RDF}"\n'
+                f'     xmlns:rdfs="{RDFS}"\n'
+                f'     xmlns:xsd="{XSD}">\n')
+        
+        # Enumerazioni come rdfs:Datatype con owl:oneOf (liste annidate, come nel CCM)
+        for e in range(enumerations):
+            f.write(f'  <rdf:Description rdf:about={iri(f"Enum{e}Type")}>\n'
+                    f'    <rdfs:comment>{escape(f"Synthetic enumeration {e} & its values")}</rdfs:comment>\n'
+                    '    <owl:equivalentClass><rdfs:Datatype><owl:oneOf>')
+            for v in range(enum_values):
+                f.write(f'<rdf:Description><rdf:first>Value{e}_{v}</rdf:first><rdf:rest>')
+            f.write(f'<rdf:Description rdf:about="{RDF}nil"/>')
+            f.write('</rdf:rest></rdf:Description>' * enum_values)
+            f.write('</owl:oneOf></rdfs:Datatype></owl:equivalentClass>\n  </rdf:Description>\n')
+        
+        # Classi: una foresta di gerarchie con dieci figli per nodo
+        for c in range(classes):
+            f.write(f'  <owl:Class rdf:about={iri(f"Class{c}")}>\n')
+            if c >= 10:
+                f.write(f'    <rdfs:subClassOf rdf:resource={iri(f"Class{c // 10}")}/>\n')
+            f.write(f'    <rdfs:comment>{escape(f"Synthetic class {c} used for benchmarking the converter")}'
+                    '</rdfs:comment>\n  </owl:Class>\n')
+        
+        for q in range(equivalences):
+            a, b = rng.randrange(classes), rng.randrange(classes)
+            f.write(f'  <rdf:Description rdf:about={iri(f"Class{a}")}>'
+                    f'<owl:equivalentClass rdf:resource={iri(f"Class{b}")}/></rdf:Description>\n')
+        
+        # ObjectProperty: una su cinque ha un dominio owl:unionOf
+        for p in range(object_properties):
+            f.write(f'  <owl:ObjectProperty rdf:about={iri(f"objectProperty{p}")}>\n')
+            if p % 5 == 0:
+                f.write('    <rdfs:domain><owl:Class><owl:unionOf rdf:parseType="Collection">'
+                        f'<rdf:Description rdf:about={iri(f"Class{rng.randrange(classes)}")}/>'
+                        f'<rdf:Description rdf:about={iri(f"Class{rng.randrange(classes)}")}/>'
+                        '</owl:unionOf></owl:Class></rdfs:domain>\n')
+            else:
+                f.write(f'    <rdfs:domain rdf:resource={iri(f"Class{rng.randrange(classes)}")}/>\n')
+            f.write(f'    <rdfs:range rdf:resource={iri(f"Class{rng.randrange(classes)}")}/>\n'
+                    '  </owl:ObjectProperty>\n')
+        
+        # DatatypeProperty: metà usa un'enumerazione, metà un tipo XSD
+        for p in range(datatype_properties):
+            if enumerations and p % 2:
+                data_range = iri(f"Enum{rng.randrange(enumerations)}Type")
+            else:
+                data_range = quoteattr(f'{XSD}string')
+            f.write(f'  <owl:DatatypeProperty rdf:about={iri(f"dataProperty{p}")}>\n'
+                    f'    <rdfs:domain rdf:resource={iri(f"Class{rng.randrange(classes)}")}/>\n'
+                    f'    <rdfs:range rdf:resource={data_range}/>\n'
+                    '  </owl:DatatypeProperty>\n')
+        
+        # Statement reificati: sottoclassi e domini di proprietà dichiarate a parte
+        for r in range(reified):
+            if r % 2:
+                f.write(f'  <rdf:Statement rdf:type="{RDFS}subClassOf" rdf:subject={iri(f"Class{rng.randrange(classes)}")}'
+                        f' rdf:object={iri(f"Class{rng.randrange(classes)}")}/>\n')
+            else:
+                f.write(f'  <rdf:Description rdf:about={iri(f"reifiedProperty{r}")} '
+                        'rdf:type="http://www.w3.org/2002/07/owl#DatatypeProperty"/>\n'
+                        f'  <rdf:Statement rdf:subject={iri(f"reifiedProperty{r}")} '
+                        f'rdf:predicate="{{{RDFS}}}domain" rdf:object={iri(f"Class{rng.randrange(classes)}")}/>\n')
+        
+        f.write('</rdf:RDF>\n')
+
+def run_stages(path):
+    """Fasi della pipeline per un file, nell'ordine: ognuna usa i risultati delle precedenti"""
+    state = {}
+    
+    def parse():
+        state['root'] = ET.parse(path).getroot()
+    
+    def parse_namespaces():
+        state['namespaces'] = converter.parse_namespaces(state['root'])
+    
+    def extract_ontology():
+        # Classi, proprietà ed enumerazioni vengono estratte nella stessa visita
+        state['model'] = converter.extract_ontology(state['root'], state['namespaces'])
+    
+    # Senza un modello già estratto, ognuna delle funzioni extract_* rifà la visita:
+    # è il costo reale di chi le chiama da sole
+    def extract_classes():
+        state['classes'] = converter.extract_classes(state['root'], state['namespaces'])
+    
+    def extract_properties():
+        state['properties'] = converter.extract_properties(state['root'], state['namespaces'])
+    
+    def extract_enumerations():
+        state['enumerations'] = converter.extract_enumerations(state['root'], state['namespaces'])
+    
+    def extract_relations():
+        state['relations'] = converter.extract_relations(state['classes'], state['properties'])
+    
+    def generate_plantuml():
+        # Enumerazioni collegate per IRI, come nella riga di comando
+        index = converter.EnumerationIndex(state['enumerations'])
+        enum_references = converter.extract_enum_references(state['properties'], index)
+        state['text'] = converter.generate_plantuml(state['classes'], state['properties'], state['relations'],
+                                                    state['enumerations'], enum_references)
+    
+    def stream_ontology():
+        # Percorso usato dalla riga di comando: iterparse senza costruire l'albero
+        converter.stream_ontology(path)
+    
+    return [parse, parse_namespaces, extract_ontology, extract_classes, extract_properties,
+            extract_enumerations, extract_relations, generate_plantuml, stream_ontology]
+
+def time_stages(path, repeat):
+    """Tempo (mediana su repeat esecuzioni, in secondi) di ciascuna fase"""
+    timings = {}
+    for _ in range(repeat):
+        converter.LOCAL_NAMES.clear()
+        for stage in run_stages(path):
+            start = time.perf_counter()
+            stage()
+            timings.setdefault(stage.__name__, []).append(time.perf_counter() - start)
+    return {name: statistics.median(values) for name, values in timings.items()}
+
+def measure_memory(path):
+    """Picco di memoria allocata (in byte) durante ciascuna fase.
+    
+    Misurato in un'esecuzione separata, perché tracemalloc rallenta le fasi.
+    """
+    converter.LOCAL_NAMES.clear()
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for stage in run_stages(path):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            stage()
+            peaks[stage.__name__] = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def load_results(path):
+    """Legge i risultati salvati (un oggetto JSON per riga)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare(current, baseline):
+    """Stampa il rapporto tra i tempi correnti e quelli di riferimento, per dimensione e fase"""
+    reference = {result['axioms']: result for result in baseline}
+    for result in current:
+        previous = reference.get(result['axioms'])
+        if previous is None:
+            print(f"{result['axioms']:>9} assiomi: nessun risultato di riferimento")
+            continue
+        print(f"{result['axioms']:>9} assiomi (rispetto a '{previous['label']}'):")
+        for stage, seconds in result['seconds'].items():
+            before = previous['seconds'].get(stage)
+            if before:
+                memory = result['peak_bytes'][stage] / max(previous['peak_bytes'].get(stage, 0), 1)
+                print(f"  {stage:<22} {seconds:9.4f}s  x{seconds / before:5.2f} tempo  x{memory:5.2f} memoria")
+
+def main():
+    """Funzione principale"""
+    parser = argparse.ArgumentParser(description='Benchmark di owl2plantuml_v17.py su ontologie sintetiche')
+    parser.add_argument('--axioms', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Numero approssimativo di assiomi delle ontologie generate (default: 1000 10000 100000)')
+    parser.add_argument('--enum-values', type=int, default=ENUM_VALUES,
+                        help=f'Valori per enumerazione (default: {ENUM_VALUES})')
+    parser.add_argument('--repeat', type=int, default=3, help='Esecuzioni per dimensione (default: 3)')
+    parser.add_argument('--results', default=RESULTS_FILE,
+                        help=f'File in cui aggiungere i risultati (default: {RESULTS_FILE})')
+    parser.add_argument('--label', default=converter.EXTRACTOR_VERSION,
+                        help='Etichetta dei risultati, ad esempio la versione (default: versione dell\'estrattore)')
+    parser.add_argument('--compare', metavar='LABEL', help='Confronta con i risultati salvati con questa etichetta')
+    parser.add_argument('--keep', metavar='DIR', help='Conserva le ontologie generate in questa directory')
+    
+    args = parser.parse_args()
+    
+    baseline = [r for r in load_results(args.results) if r['label'] == args.compare] if args.compare else []
+    
+    current = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.keep or tmp
+        os.makedirs(directory, exist_ok=True)
+        for axioms in args.axioms:
+            shape = shape_for(axioms, args.enum_values)
+            path = os.path.join(directory, f'synthetic-{axioms}.owl')
+            write_synthetic_ontology(path, enum_values=args.enum_values, **shape)
+            
+            result = {
+                'label': args.label,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'axioms': axioms,
+                'shape': shape,
+                'file_bytes': os.path.getsize(path),
+                'seconds': time_stages(path, args.repeat),
+                'peak_bytes': measure_memory(path),
+            }
+            current.append(result)
+            
+            print(f"{axioms:>9} assiomi, {result['file_bytes'] / 1e6:.1f} MB:")
+            for stage, seconds in result['seconds'].items():
+                print(f"  {stage:<22} {seconds:9.4f}s  {result['peak_bytes'][stage] / 1e6:9.1f} MB")
+    
+    with open(args.results, 'a', encoding='utf-8') as f:
+        for result in current:
+            f.write(json.dumps(result) + '\n')
+    print(f"Risultati aggiunti a {args.results}")
+    
+    if args.compare:
+        compare(current, baseline)
+
+if __name__ == '__main__':
+    main()
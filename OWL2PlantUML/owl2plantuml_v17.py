@@ -4,10 +4,29 @@
 #realizzato con il supporto di Claude 3.7 Sonnet
 
 import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import cProfile
+import functools
+import glob
+import hashlib
+import http.server
+import io
+import json
 import os
+import pickle
 import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
 import xml.etree.ElementTree as ET
-from urllib.parse import urlparse
+import zipfile
+from collections import OrderedDict, deque
+from urllib.parse import parse_qs, urljoin, urlparse
 
 def parse_namespaces(root):
     """Estrae i namespace dal documento OWL"""
@@ -29,21 +48,8 @@ def parse_namespaces(root):
     
     return namespaces
 
-def get_local_name(uri):
-    """Estrae il nome locale da un URI"""
-    if uri is None:
-        return "Unknown"
-    
-    # Se è una lista, prende il primo elemento non vuoto
-    if isinstance(uri, list):
-        for item in uri:
-            if item:
-                uri = item
-                break
-    
-    # Converte a stringa se non lo è già
-    uri = str(uri)
-    
+def split_local_name(uri):
+    """Estrae il nome locale da un URI senza usare la cache"""
     # Rimuovi eventuali namespace bracket
     uri = uri.replace('{', '').replace('}', '')
     
@@ -64,6 +70,89 @@ def get_local_name(uri):
     
     return uri
 
+class LocalNameResolver:
+    """Risolve il nome locale degli IRI con una cache LRU di dimensione limitata.
+    
+    Gli IRI che iniziano con un namespace noto vengono divisi direttamente sul
+    prefisso; gli altri passano da split_local_name. I nomi restituiti sono internati.
+    """
+    
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.prefixes = ()
+        self.hits = 0
+        self.misses = 0
+    
+    def add_namespaces(self, namespaces):
+        """Registra i namespace (ad esempio quelli di parse_namespaces) per la divisione sul prefisso"""
+        prefixes = set(self.prefixes)
+        for value in namespaces.values():
+            # Il prefisso è utilizzabile solo se il nome locale segue direttamente '#' o '/'
+            if not value or '?' in value or ';' in value:
+                continue
+            if value.endswith('#') or (value.endswith('/') and '#' not in value):
+                prefixes.add(value)
+            elif '#' not in value:
+                prefixes.add(value + '#')
+        
+        # I prefissi più lunghi vengono provati per primi
+        self.prefixes = tuple(sorted(prefixes, key=len, reverse=True))
+    
+    def clear(self):
+        """Svuota la cache"""
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def split(self, uri):
+        """Estrae il nome locale, usando se possibile i namespace noti"""
+        for prefix in self.prefixes:
+            if uri.startswith(prefix):
+                local = uri[len(prefix):]
+                if local and not any(c in local for c in '#/?;{}'):
+                    return local
+                break
+        return split_local_name(uri)
+    
+    def __call__(self, uri):
+        cache = self.cache
+        name = cache.get(uri)
+        if name is not None:
+            self.hits += 1
+            try:
+                cache.move_to_end(uri)
+            except KeyError:
+                # Eliminato nel frattempo da un altro thread: il nome resta valido
+                pass
+            return name
+        
+        self.misses += 1
+        name = sys.intern(self.split(uri))
+        cache[uri] = name
+        if len(cache) > self.maxsize:
+            # Elimina l'IRI usato meno di recente
+            cache.popitem(last=False)
+        return name
+
+# Resolver condiviso da tutte le funzioni di estrazione
+LOCAL_NAMES = LocalNameResolver()
+
+def get_local_name(uri):
+    """Estrae il nome locale da un URI"""
+    if uri is None:
+        return "Unknown"
+    
+    # Se è una lista, prende il primo elemento non vuoto
+    if isinstance(uri, list):
+        for item in uri:
+            if item:
+                uri = item
+                break
+    
+    # Converte a stringa se non lo è già
+    return LOCAL_NAMES(str(uri))
+
 def normalize_value(value):
     """Normalizza un valore che potrebbe essere una lista o un altro tipo di dato"""
     if value is None:
@@ -79,225 +168,177 @@ def normalize_value(value):
     # Altrimenti, restituisce il valore come stringa
     return str(value)
 
-def extract_enumerations(root, namespaces):
-    """Estrae le enumerazioni dal documento OWL"""
-    enumerations = []
+def intern_name(value):
+    """Normalizza un nome e lo interna, così le occorrenze ripetute condividono la stessa stringa"""
+    value = normalize_value(value)
+    return sys.intern(value) if value is not None else None
+
+class OntClass:
+    """Classe dell'ontologia con superclassi, classi equivalenti e annotazioni"""
+    __slots__ = ('name', 'iri', 'annotations', 'subclass_of', 'equivalent_to')
     
-    # Definisci i namespace per la ricerca
-    ns = {
-        'rdf': namespaces.get('rdf', 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'),
-        'rdfs': namespaces.get('rdfs', 'http://www.w3.org/2000/01/rdf-schema#'),
-        'owl': namespaces.get('owl', 'http://www.w3.org/2002/07/owl#')
-    }
+    def __init__(self, name, iri=None, annotations=(), subclass_of=None, equivalent_to=None):
+        self.name = intern_name(name)
+        self.iri = iri
+        self.annotations = annotations  # tupla di coppie (proprietà, valore)
+        self.subclass_of = subclass_of if subclass_of is not None else []
+        self.equivalent_to = equivalent_to if equivalent_to is not None else []
     
-    # Cerca tutti gli elementi che potrebbero contenere enumerazioni
-    for desc in root.findall('.//rdf:Description', ns):
-        enum_id = desc.get(f'{{{ns["rdf"]}}}about')
-        if not enum_id:
-            continue
-        
-        # Cerca solo gli elementi che hanno owl:equivalentClass con owl:oneOf
-        equiv_class = desc.find('./owl:equivalentClass/rdfs:Datatype/owl:oneOf', ns)
-        if equiv_class is None:
-            continue
-        
-        enum_name = get_local_name(enum_id)
-        enum_values = []
-        
-        # Estrai valori da una lista RDF
-        current_node = equiv_class.find('./rdf:Description', ns)
-        while current_node is not None:
-            rdf_first = current_node.find('./rdf:first', ns)
-            if rdf_first is not None and rdf_first.text:
-                enum_values.append(rdf_first.text)
-            
-            # Vai al prossimo elemento nella lista RDF
-            rdf_rest = current_node.find('./rdf:rest', ns)
-            if rdf_rest is None:
-                break
-                
-            rest_resource = rdf_rest.get(f'{{{ns["rdf"]}}}resource')
-            if rest_resource == 'http://www.w3.org/1999/02/22-rdf-syntax-ns#nil':
-                break
-                
-            current_node = rdf_rest.find('./rdf:Description', ns)
-        
-        # Estrai annotazioni
-        comment = desc.find('./rdfs:comment', ns)
-        comment_text = comment.text if comment is not None else ""
-        
-        if enum_values:
-            enumerations.append({
-                'name': enum_name,
-                'values': enum_values,
-                'comment': comment_text
-            })
+    def __repr__(self):
+        return f'OntClass({self.name!r})'
+
+class OntProperty:
+    """Proprietà dell'ontologia (ObjectProperty o DataProperty) con dominio e range"""
+    __slots__ = ('name', 'iri', 'type', 'domain', 'range', 'annotations', 'range_iri')
+    
+    def __init__(self, name, prop_type, domain=None, range=None, annotations=(), iri=None, range_iri=None):
+        self.name = intern_name(name)
+        self.iri = iri
+        self.type = prop_type
+        self.domain = intern_name(domain)
+        self.range = intern_name(range)
+        self.annotations = annotations  # condivise tra le copie per dominio
+        self.range_iri = range_iri  # IRI del range, per collegare le enumerazioni
+    
+    def with_domain(self, domain):
+        """Restituisce una copia della proprietà con un altro dominio"""
+        return OntProperty(self.name, self.type, domain, self.range, self.annotations, self.iri, self.range_iri)
     
-    return enumerations
+    def __repr__(self):
+        return f'OntProperty({self.name!r}, {self.type!r}, {self.domain!r}, {self.range!r})'
 
-def extract_classes(root, namespaces):
-    """Estrae le classi dall'ontologia"""
-    classes = []
-    equivalent_classes = []  # Lista per memorizzare le classi equivalenti
+class Relation:
+    """Relazione tra due elementi del diagramma (tipo di freccia PlantUML e nome)"""
+    __slots__ = ('source', 'target', 'name', 'type')
+    
+    def __init__(self, source, target, name, rel_type):
+        self.source = intern_name(source)
+        self.target = intern_name(target)
+        self.name = intern_name(name)
+        self.type = rel_type
+    
+    def __repr__(self):
+        return f'Relation({self.source!r} {self.type} {self.target!r} : {self.name!r})'
+
+class Enumeration:
+    """Enumerazione (rdfs:Datatype definito con owl:oneOf)"""
+    __slots__ = ('name', 'iri', 'values', 'comment')
     
-    # Definisci i namespace per la ricerca
-    ns = {
+    def __init__(self, name, values, comment='', iri=None):
+        self.name = intern_name(name)
+        self.iri = iri
+        self.values = tuple(values)
+        self.comment = comment
+    
+    def __repr__(self):
+        return f'Enumeration({self.name!r}, {len(self.values)} valori)'
+
+def build_search_namespaces(namespaces):
+    """Restituisce i namespace da usare per la ricerca degli elementi"""
+    return {
         'rdf': namespaces.get('rdf', 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'),
         'rdfs': namespaces.get('rdfs', 'http://www.w3.org/2000/01/rdf-schema#'),
         'owl': namespaces.get('owl', 'http://www.w3.org/2002/07/owl#')
     }
+
+def iter_rdf_list(container, rdf):
+    """Valori testuali di una rdf:List annidata in RDF/XML, visitata iterativamente.
     
-    # Cerca tutte le classi (in diversi formati OWL)
-    class_elements = []
+    Ogni cella viene scandita una sola volta, senza ricerche per percorso.
+    """
+    description = f'{{{rdf}}}Description'
+    first = f'{{{rdf}}}first'
+    rest = f'{{{rdf}}}rest'
+    resource = f'{{{rdf}}}resource'
+    nil = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#nil'
     
-    # Aggiungi classi in formato OWL/XML e RDF/XML
-    class_elements.extend(root.findall('.//owl:Class', ns))
-    class_elements.extend(root.findall('.//rdfs:Class', ns))
+    node = next((child for child in container if child.tag == description), None)
+    while node is not None:
+        following = None
+        value = None
+        for child in node:
+            if child.tag == first and value is None:
+                value = child.text
+            elif child.tag == rest and child.get(resource) != nil:
+                following = next((cell for cell in child if cell.tag == description), None)
+        if value:
+            yield value
+        node = following
+
+def extract_enumeration(desc, ns):
+    """Estrae un'enumerazione da un elemento rdf:Description (None se non lo è)"""
+    enum_id = desc.get(f'{{{ns["rdf"]}}}about')
+    if not enum_id:
+        return None
     
-    # Raccogli i nomi delle classi già aggiunte per evitare duplicati
-    added_classes = set()
+    # Considera solo gli elementi che hanno owl:equivalentClass con owl:oneOf
+    equiv_class = desc.find('./owl:equivalentClass/rdfs:Datatype/owl:oneOf', ns)
+    if equiv_class is None:
+        return None
     
-    # Estrai informazioni da ogni classe trovata
-    for cls in class_elements:
-        class_id = cls.get(f'{{{ns["rdf"]}}}about') or cls.get(f'{{{ns["rdf"]}}}ID')
-        if not class_id:
-            continue
-            
-        class_name = get_local_name(class_id)
-        if class_name in added_classes:
-            continue
-            
-        added_classes.add(class_name)
-        
-        class_info = {
-            'name': class_name,
-            'annotations': extract_annotations(cls, ns),
-            'subClassOf': [],  # Lista di superclassi
-            'equivalentTo': []  # Lista di classi equivalenti
-        }
-        
-        # Cerca relazioni subClassOf esplicite
-        for subclass_rel in cls.findall('./rdfs:subClassOf', ns):
-            resource = subclass_rel.get(f'{{{ns["rdf"]}}}resource')
-            if resource:
-                parent_class = get_local_name(resource)
-                if parent_class and parent_class not in class_info['subClassOf']:
-                    class_info['subClassOf'].append(parent_class)
-            else:
-                # Cerca classi annidate in subClassOf
-                nested_classes = subclass_rel.findall('./owl:Class', ns)
-                if nested_classes:
-                    for nested in nested_classes:
-                        nested_id = nested.get(f'{{{ns["rdf"]}}}about') or nested.get('IRI')
-                        if nested_id:
-                            parent_class = get_local_name(nested_id)
-                            if parent_class and parent_class not in class_info['subClassOf']:
-                                class_info['subClassOf'].append(parent_class)
-        
-        # Cerca classi equivalenti
-        for equivClass in cls.findall('./owl:equivalentClass', ns):
-            resource = equivClass.get(f'{{{ns["rdf"]}}}resource')
-            if resource:
-                equiv_name = get_local_name(resource)
-                if equiv_name and equiv_name not in class_info['equivalentTo']:
-                    class_info['equivalentTo'].append(equiv_name)
-            else:
-                # Cerca classi annidate in equivalentClass
-                nested_classes = equivClass.findall('./owl:Class', ns)
-                if nested_classes:
-                    for nested in nested_classes:
-                        nested_id = nested.get(f'{{{ns["rdf"]}}}about') or nested.get('IRI')
-                        if nested_id:
-                            equiv_name = get_local_name(nested_id)
-                            if equiv_name and equiv_name not in class_info['equivalentTo']:
-                                class_info['equivalentTo'].append(equiv_name)
-        
-        classes.append(class_info)
-    
-    # Cerca dichiarazioni di SubClassOf dirette
-    for subClassOf in root.findall('.//owl:SubClassOf', ns):
-        sub_cls = None
-        super_cls = None
-        
-        # Trova la sottoclasse
-        sub_class_elem = subClassOf.find('./owl:Class', ns)
-        if sub_class_elem is not None:
-            sub_cls = get_local_name(sub_class_elem.get('IRI') or sub_class_elem.get(f'{{{ns["rdf"]}}}about'))
-        
-        # Trova la superclasse
-        super_class_elem = subClassOf.find('./owl:Class[2]', ns)
-        if super_class_elem is not None:
-            super_cls = get_local_name(super_class_elem.get('IRI') or super_class_elem.get(f'{{{ns["rdf"]}}}about'))
-        
-        if sub_cls and super_cls:
-            # Aggiorna una classe esistente o aggiungi una nuova
-            existing_class = next((c for c in classes if c['name'] == sub_cls), None)
-            if existing_class:
-                if super_cls not in existing_class['subClassOf']:
-                    existing_class['subClassOf'].append(super_cls)
-            else:
-                classes.append({
-                    'name': sub_cls,
-                    'subClassOf': [super_cls],
-                    'annotations': [],
-                    'equivalentTo': []
-                })
-    
-    # Cerca anche relazioni di sottoclasse espresse in formato RDF/RDFS
-    for subclass_stmt in root.findall('.//*[@rdf:type="http://www.w3.org/2000/01/rdf-schema#subClassOf"]', ns):
-        sub_cls = get_local_name(subclass_stmt.get(f'{{{ns["rdf"]}}}subject'))
-        super_cls = get_local_name(subclass_stmt.get(f'{{{ns["rdf"]}}}object'))
-        
-        if sub_cls and super_cls:
-            existing_class = next((c for c in classes if c['name'] == sub_cls), None)
-            if existing_class:
-                if super_cls not in existing_class['subClassOf']:
-                    existing_class['subClassOf'].append(super_cls)
-            else:
-                classes.append({
-                    'name': sub_cls,
-                    'subClassOf': [super_cls],
-                    'annotations': [],
-                    'equivalentTo': []
-                })
-    
-    # Cerca dichiarazioni dirette di EquivalentClasses
-    for equivClasses in root.findall('.//owl:EquivalentClasses', ns):
-        class_names = []
-        
-        # Estrai tutti i nomi delle classi equivalenti
-        for cls_elem in equivClasses.findall('./owl:Class', ns):
-            class_name = get_local_name(cls_elem.get('IRI') or cls_elem.get(f'{{{ns["rdf"]}}}about'))
-            if class_name:
-                class_names.append(class_name)
-        
-        # Se abbiamo almeno due classi equivalenti
-        if len(class_names) >= 2:
-            equivalent_classes.append(class_names)
-    
-    # Aggiorna le classi con le equivalenze trovate
-    for equiv_group in equivalent_classes:
-        for i, class_name in enumerate(equiv_group):
-            for j in range(len(equiv_group)):
-                if i != j:  # Evita di rendere una classe equivalente a se stessa
-                    # Trova la classe e aggiorna le sue equivalenze
-                    existing_class = next((c for c in classes if c['name'] == class_name), None)
-                    if existing_class:
-                        if equiv_group[j] not in existing_class['equivalentTo']:
-                            existing_class['equivalentTo'].append(equiv_group[j])
-                    else:
-                        # Se la classe non esiste ancora, creala
-                        classes.append({
-                            'name': class_name,
-                            'annotations': [],
-                            'subClassOf': [],
-                            'equivalentTo': [equiv_group[j]]
-                        })
+    # Estrai valori dalla lista RDF
+    enum_values = list(iter_rdf_list(equiv_class, ns['rdf']))
+    
+    # Estrai annotazioni
+    comment = desc.find('./rdfs:comment', ns)
+    comment_text = comment.text if comment is not None else ""
+    
+    if not enum_values:
+        return None
+    
+    return Enumeration(get_local_name(enum_id), enum_values, comment_text, enum_id)
+
+def extract_class(cls, ns):
+    """Estrae una classe e le sue chiavi owl:hasKey da un elemento owl:Class o rdfs:Class"""
+    class_id = cls.get(f'{{{ns["rdf"]}}}about') or cls.get(f'{{{ns["rdf"]}}}ID')
+    if not class_id:
+        return None
     
-    return classes
+    class_info = OntClass(get_local_name(class_id), class_id, extract_annotations(cls, ns))
+    
+    # Cerca relazioni subClassOf esplicite
+    for subclass_rel in cls.findall('./rdfs:subClassOf', ns):
+        resource = subclass_rel.get(f'{{{ns["rdf"]}}}resource')
+        if resource:
+            parent_class = intern_name(get_local_name(resource))
+            if parent_class and parent_class not in class_info.subclass_of:
+                class_info.subclass_of.append(parent_class)
+        else:
+            # Cerca classi annidate in subClassOf
+            for nested in subclass_rel.findall('./owl:Class', ns):
+                nested_id = nested.get(f'{{{ns["rdf"]}}}about') or nested.get('IRI')
+                if nested_id:
+                    parent_class = intern_name(get_local_name(nested_id))
+                    if parent_class and parent_class not in class_info.subclass_of:
+                        class_info.subclass_of.append(parent_class)
+    
+    # Cerca classi equivalenti
+    for equivClass in cls.findall('./owl:equivalentClass', ns):
+        resource = equivClass.get(f'{{{ns["rdf"]}}}resource')
+        if resource:
+            equiv_name = intern_name(get_local_name(resource))
+            if equiv_name and equiv_name not in class_info.equivalent_to:
+                class_info.equivalent_to.append(equiv_name)
+        else:
+            # Cerca classi annidate in equivalentClass
+            for nested in equivClass.findall('./owl:Class', ns):
+                nested_id = nested.get(f'{{{ns["rdf"]}}}about') or nested.get('IRI')
+                if nested_id:
+                    equiv_name = intern_name(get_local_name(nested_id))
+                    if equiv_name and equiv_name not in class_info.equivalent_to:
+                        class_info.equivalent_to.append(equiv_name)
+    
+    # Cerca attributi definiti direttamente nella classe (per diagramma PlantUML)
+    keys = []
+    for property_elem in cls.findall('./owl:hasKey/owl:DataProperty', ns):
+        prop_name = intern_name(get_local_name(property_elem.get('IRI')))
+        if prop_name:
+            keys.append(prop_name)
+    
+    return class_info, keys
 
 def extract_annotations(element, ns):
-    """Estrae le annotazioni da un elemento"""
+    """Estrae le annotazioni da un elemento come tupla di coppie (proprietà, valore)"""
     annotations = []
     
     # Estrai le annotazioni esplicite
@@ -309,10 +350,7 @@ def extract_annotations(element, ns):
         value = literal.text if literal is not None else None
         
         if prop_name and value:
-            annotations.append({
-                'property': normalize_value(prop_name),
-                'value': normalize_value(value)
-            })
+            annotations.append((intern_name(prop_name), normalize_value(value)))
     
     # Estrai anche le annotazioni RDF/XML
     
@@ -323,414 +361,4308 @@ def extract_annotations(element, ns):
     #    })
     
     for comment in element.findall(f'./rdfs:comment', ns):
-        annotations.append({
-            'property': 'comment',
-            'value': normalize_value(comment.text)
-        })
+        annotations.append(('comment', normalize_value(comment.text)))
     
-    return annotations
+    # La tupla vuota è condivisa da tutti gli elementi senza annotazioni
+    return tuple(annotations)
 
-def extract_properties(root, namespaces):
-    """Estrae le proprietà dell'ontologia"""
-    properties = []
+def extract_object_property(prop, ns):
+    """Estrae una ObjectProperty, duplicandola per ciascun dominio trovato"""
+    prop_iri = prop.get(f'{{{ns["rdf"]}}}about') or prop.get(f'{{{ns["rdf"]}}}ID')
+    prop_info = OntProperty(get_local_name(prop_iri), 'ObjectProperty',
+                            annotations=extract_annotations(prop, ns), iri=prop_iri)
     
-    # Definisci i namespace per la ricerca
-    ns = {
-        'rdf': namespaces.get('rdf', 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'),
-        'rdfs': namespaces.get('rdfs', 'http://www.w3.org/2000/01/rdf-schema#'),
-        'owl': namespaces.get('owl', 'http://www.w3.org/2002/07/owl#')
-    }
+    # Estrai dominio
+    domains = []
+    for domain in prop.findall(f'./rdfs:domain', ns):
+        # Controlla se il dominio è una risorsa diretta
+        resource = domain.get(f'{{{ns["rdf"]}}}resource')
+        if resource:
+            domains.append(get_local_name(resource))
+        else:
+            # Cerca classi annidate (ad esempio in unionOf)
+            union_of = domain.find(f'./owl:Class/owl:unionOf', ns)
+            if union_of is not None:
+                # Estrai tutte le classi nella raccolta unionOf
+                for desc in domain.findall(f'.//rdf:Description', ns):
+                    resource = desc.get(f'{{{ns["rdf"]}}}about')
+                    if resource:
+                        domains.append(get_local_name(resource))
     
-    # Cerca ObjectProperty
-    for prop in root.findall('.//owl:ObjectProperty', ns):
-        prop_info = {
-            'name': normalize_value(get_local_name(prop.get(f'{{{ns["rdf"]}}}about') or prop.get(f'{{{ns["rdf"]}}}ID'))),
-            'type': 'ObjectProperty',
-            'domain': None,
-            'range': None,
-            'annotations': extract_annotations(prop, ns)
-        }
+    # Estrai range
+    ranges = []
+    for range_elem in prop.findall(f'./rdfs:range', ns):
+        resource = range_elem.get(f'{{{ns["rdf"]}}}resource')
+        if resource:
+            ranges.append(get_local_name(resource))
+    
+    # Usa il primo range trovato o None
+    prop_info.range = intern_name(ranges[0]) if ranges else None
+    
+    # Se non abbiamo trovato domini, restituisci comunque la proprietà con dominio None
+    if not domains:
+        return [prop_info]
+    
+    # Se abbiamo trovato domini multipli, creiamo una proprietà per ciascun dominio
+    return [prop_info.with_domain(domain) for domain in domains]
+
+def extract_datatype_property(prop, ns):
+    """Estrae una DatatypeProperty"""
+    prop_iri = prop.get(f'{{{ns["rdf"]}}}about') or prop.get(f'{{{ns["rdf"]}}}ID')
+    domain = None
+    range_name = None
+    range_iri = None
+    
+    # Estrai dominio
+    for domain_elem in prop.findall(f'./rdfs:domain', ns):
+        domain = get_local_name(domain_elem.get(f'{{{ns["rdf"]}}}resource'))
+    
+    # Estrai range
+    for range_elem in prop.findall(f'./rdfs:range', ns):
+        range_iri = range_elem.get(f'{{{ns["rdf"]}}}resource')
+        range_name = get_local_name(range_iri)
+    
+    return OntProperty(get_local_name(prop_iri), 'DataProperty', domain, range_name,
+                       extract_annotations(prop, ns), prop_iri, range_iri)
+
+def extract_subclass_axiom(subClassOf, ns):
+    """Estrae la coppia (sottoclasse, superclasse) da un assioma owl:SubClassOf"""
+    sub_cls = None
+    super_cls = None
+    
+    # Trova la sottoclasse
+    sub_class_elem = subClassOf.find('./owl:Class', ns)
+    if sub_class_elem is not None:
+        sub_cls = intern_name(get_local_name(sub_class_elem.get('IRI') or sub_class_elem.get(f'{{{ns["rdf"]}}}about')))
+    
+    # Trova la superclasse
+    super_class_elem = subClassOf.find('./owl:Class[2]', ns)
+    if super_class_elem is not None:
+        super_cls = intern_name(get_local_name(super_class_elem.get('IRI') or super_class_elem.get(f'{{{ns["rdf"]}}}about')))
+    
+    return sub_cls, super_cls
+
+def extract_equivalence_axiom(equivClasses, ns):
+    """Estrae i nomi delle classi di un assioma owl:EquivalentClasses"""
+    class_names = []
+    
+    for cls_elem in equivClasses.findall('./owl:Class', ns):
+        class_name = intern_name(get_local_name(cls_elem.get('IRI') or cls_elem.get(f'{{{ns["rdf"]}}}about')))
+        if class_name:
+            class_names.append(class_name)
+    
+    return class_names
+
+def extract_property_axiom(decl, ns):
+    """Estrae la coppia (proprietà, classe) da un assioma ObjectPropertyDomain o ObjectPropertyRange"""
+    prop_elem = decl.find('./owl:ObjectProperty', ns)
+    class_elem = decl.find('./owl:Class', ns)
+    
+    if prop_elem is None or class_elem is None:
+        return None
+    
+    prop_name = intern_name(get_local_name(prop_elem.get('IRI')))
+    class_name = intern_name(get_local_name(class_elem.get('IRI')))
+    return prop_name, class_name
+
+class StatementIndex:
+    """Indice soggetto -> [(predicato, oggetto)] degli statement reificati.
+    
+    Viene riempito durante l'unica passata sul documento e interrogato sia per il
+    dominio/range delle DatatypeProperty sia per i rdfs:subClassOf reificati.
+    """
+    
+    def __init__(self):
+        self.by_subject = {}
+    
+    def __len__(self):
+        return len(self.by_subject)
+    
+    def add(self, subject, predicate, obj):
+        """Registra uno statement"""
+        # Il predicato può essere un IRI o essere scritto in notazione {namespace}nome
+        if predicate and predicate.startswith('{'):
+            predicate = predicate[1:].replace('}', '', 1)
+        self.by_subject.setdefault(subject, []).append((predicate, obj))
+    
+    def objects(self, subject, predicate):
+        """Restituisce gli oggetti degli statement con il soggetto e il predicato indicati"""
+        return [obj for pred, obj in self.by_subject.get(subject, ()) if pred == predicate]
+
+class OntologyModel:
+    """Modello dell'ontologia condiviso dalle funzioni extract_*.
+    
+    Classi e proprietà sono indicizzate per IRI e per nome locale, così l'aggiunta
+    di assiomi a entità già note non richiede di scorrere le liste.
+    """
+    
+    def __init__(self, namespaces=None):
+        self.namespaces = namespaces or {}
+        self.classes = []
+        self.properties = []
+        self.enumerations = []
         
-        # Estrai dominio
-        domains = []
-        for domain in prop.findall(f'./rdfs:domain', ns):
-            # Controlla se il dominio è una risorsa diretta
-            resource = domain.get(f'{{{ns["rdf"]}}}resource')
-            if resource:
-                domains.append(normalize_value(get_local_name(resource)))
-            else:
-                # Cerca classi annidate (ad esempio in unionOf)
-                union_of = domain.find(f'./owl:Class/owl:unionOf', ns)
-                if union_of is not None:
-                    # Estrai tutte le classi nella raccolta unionOf
-                    for desc in domain.findall(f'.//rdf:Description', ns):
-                        resource = desc.get(f'{{{ns["rdf"]}}}about')
-                        if resource:
-                            domains.append(normalize_value(get_local_name(resource)))
-        
-        # Estrai range
-        ranges = []
-        for range_elem in prop.findall(f'./rdfs:range', ns):
-            resource = range_elem.get(f'{{{ns["rdf"]}}}resource')
-            if resource:
-                ranges.append(normalize_value(get_local_name(resource)))
-        
-        # Se abbiamo trovato domini multipli, creiamo una proprietà per ciascun dominio
-        if domains:
-            for domain in domains:
-                # Copia l'info di base della proprietà
-                domain_prop_info = prop_info.copy()
-                domain_prop_info['domain'] = domain
-                
-                # Usa il primo range trovato o None
-                domain_prop_info['range'] = ranges[0] if ranges else None
-                
-                properties.append(domain_prop_info)
-        else:
-            # Se non abbiamo trovato domini, aggiungi comunque la proprietà con dominio None
-            prop_info['range'] = ranges[0] if ranges else None
-            properties.append(prop_info)
-    
-    # Cerca DataProperty
-    for prop in root.findall('.//owl:DatatypeProperty', ns):
-        prop_info = {
-            'name': normalize_value(get_local_name(prop.get(f'{{{ns["rdf"]}}}about') or prop.get(f'{{{ns["rdf"]}}}ID'))),
-            'type': 'DataProperty',
-            'domain': None,
-            'range': None,
-            'annotations': extract_annotations(prop, ns)
-        }
+        # Indici per nome locale e per IRI
+        self.class_index = {}
+        self.class_iris = {}
+        self.property_index = {}
+        self.property_iris = {}
+        self.enum_index = {}
+        
+        # Assiomi già applicati, per evitare duplicati in tempo costante
+        self.subclass_axioms = set()
+        self.equivalence_axioms = set()
         
-        # Estrai dominio
-        for domain in prop.findall(f'./rdfs:domain', ns):
-            prop_info['domain'] = normalize_value(get_local_name(domain.get(f'{{{ns["rdf"]}}}resource')))
+        # Statement reificati, per soggetto
+        self.statements = StatementIndex()
         
-        # Estrai range
-        for range_elem in prop.findall(f'./rdfs:range', ns):
-            prop_info['range'] = normalize_value(get_local_name(range_elem.get(f'{{{ns["rdf"]}}}resource')))
+        # Numero di elementi trovati per tipo (solo per RDF/XML)
+        self.element_counts = {}
         
-        properties.append(prop_info)
+        # Indici derivati, ricostruiti alla prima richiesta dopo ogni modifica
+        self.hierarchy_index = None
+        self.adjacency_index = None
+        self.enumeration_index = None
     
-    # Cerca anche proprietà dati in formato RDF/RDFS
-    for prop in root.findall('.//*[@rdf:type="http://www.w3.org/2002/07/owl#DatatypeProperty"]', ns):
-        prop_name = normalize_value(get_local_name(prop.get(f'{{{ns["rdf"]}}}about')))
-        if prop_name:
-            prop_info = {
-                'name': prop_name,
-                'type': 'DataProperty',
-                'domain': None,
-                'range': None,
-                'annotations': []
-            }
-            
-            # Cerca dichiarazioni di dominio e range separate
-            for stmt in root.findall(f'.//*[@rdf:subject="{prop.get(f"{{{ns["rdf"]}}}about")}"]', ns):
-                pred = stmt.get(f'{{{ns["rdf"]}}}predicate')
-                obj = stmt.get(f'{{{ns["rdf"]}}}object')
-                
-                if pred == f'{{{ns["rdfs"]}}}domain':
-                    prop_info['domain'] = normalize_value(get_local_name(obj))
-                elif pred == f'{{{ns["rdfs"]}}}range':
-                    prop_info['range'] = normalize_value(get_local_name(obj))
-            
-            properties.append(prop_info)
+    def hierarchy(self):
+        """Indice della gerarchia delle classi (HierarchyIndex), costruito alla prima richiesta"""
+        if self.hierarchy_index is None:
+            self.hierarchy_index = HierarchyIndex(self.classes)
+        return self.hierarchy_index
+    
+    def adjacency(self):
+        """Indice dei vicini nel diagramma (AdjacencyIndex), costruito alla prima richiesta"""
+        if self.adjacency_index is None:
+            enum_references = extract_enum_references(self.properties, self.enumerations_index())
+            self.adjacency_index = AdjacencyIndex(iter_relations(self.classes, self.properties), enum_references)
+        return self.adjacency_index
+    
+    def enumerations_index(self):
+        """Indice delle enumerazioni (EnumerationIndex), costruito alla prima richiesta"""
+        if self.enumeration_index is None:
+            self.enumeration_index = EnumerationIndex(self.enumerations)
+        return self.enumeration_index
+    
+    def find_class(self, key):
+        """Cerca una classe per IRI o per nome locale"""
+        return self.class_iris.get(key) or self.class_index.get(key)
     
-    # Cerca anche dichiarazioni di dominio e range dirette
-    for domain_decl in root.findall('.//owl:ObjectPropertyDomain', ns):
-        prop_elem = domain_decl.find('./owl:ObjectProperty', ns)
-        class_elem = domain_decl.find('./owl:Class', ns)
+    def find_property(self, key):
+        """Cerca una proprietà per IRI o per nome locale (la prima registrata)"""
+        return self.property_iris.get(key) or self.property_index.get(key)
+    
+    def add_class(self, class_info):
+        """Aggiunge una classe se non ne esiste già una con lo stesso nome"""
+        name = class_info.name
+        if name in self.class_index:
+            return False
         
-        if prop_elem is not None and class_elem is not None:
-            prop_name = normalize_value(get_local_name(prop_elem.get('IRI')))
-            domain_class = normalize_value(get_local_name(class_elem.get('IRI')))
-            
-            # Aggiorna una proprietà esistente o aggiungi una nuova
-            existing_prop = next((p for p in properties if p['name'] == prop_name), None)
-            if existing_prop:
-                existing_prop['domain'] = domain_class
-            else:
-                properties.append({
-                    'name': prop_name,
-                    'type': 'ObjectProperty',
-                    'domain': domain_class,
-                    'range': None,
-                    'annotations': []
-                })
-    
-    for range_decl in root.findall('.//owl:ObjectPropertyRange', ns):
-        prop_elem = range_decl.find('./owl:ObjectProperty', ns)
-        class_elem = range_decl.find('./owl:Class', ns)
-        
-        if prop_elem is not None and class_elem is not None:
-            prop_name = normalize_value(get_local_name(prop_elem.get('IRI')))
-            range_class = normalize_value(get_local_name(class_elem.get('IRI')))
-            
-            # Aggiorna una proprietà esistente o aggiungi una nuova
-            existing_prop = next((p for p in properties if p['name'] == prop_name), None)
-            if existing_prop:
-                existing_prop['range'] = range_class
-            else:
-                properties.append({
-                    'name': prop_name,
-                    'type': 'ObjectProperty',
-                    'domain': None,
-                    'range': range_class,
-                    'annotations': []
-                })
-    
-    # Estrai anche le proprietà di tipo attributo (per diagramma PlantUML)
-    for cls in root.findall('.//owl:Class', ns) + root.findall('.//rdfs:Class', ns):
-        class_id = cls.get(f'{{{ns["rdf"]}}}about') or cls.get(f'{{{ns["rdf"]}}}ID')
-        if not class_id:
-            continue
-            
-        class_name = normalize_value(get_local_name(class_id))
-        
-        # Cerca attributi definiti direttamente nella classe
-        for property_elem in cls.findall('./owl:hasKey/owl:DataProperty', ns):
-            prop_name = normalize_value(get_local_name(property_elem.get('IRI')))
-            if prop_name:
-                properties.append({
-                    'name': prop_name,
-                    'type': 'DataProperty',
-                    'domain': class_name,
-                    'range': 'String',  # Default range se non specificato
-                    'annotations': []
-                })
-    
-    return properties
-
-def extract_enum_references(properties):
-    """Estrae i riferimenti alle enumerazioni dalle proprietà"""
-    enum_references = []
+        self.classes.append(class_info)
+        self.class_index[name] = class_info
+        self.hierarchy_index = self.adjacency_index = None
+        if class_info.iri:
+            self.class_iris.setdefault(class_info.iri, class_info)
+        
+        for super_cls in class_info.subclass_of:
+            self.subclass_axioms.add((name, super_cls))
+        for equiv_name in class_info.equivalent_to:
+            self.equivalence_axioms.add((name, equiv_name))
+        return True
     
-    for prop in properties:
-        if prop['type'] == 'DataProperty' and prop['domain'] and prop['range']:
-            # Cerca i range che potrebbero essere enumerazioni
-            # Tipicamente i nomi terminano con 'Type'
-            range_name = normalize_value(prop['range'])
-            if range_name.endswith('Type'):
-                enum_references.append({
-                    'from': normalize_value(prop['domain']),
-                    'to': range_name,
-                    'property': normalize_value(prop['name'])
-                })
+    def upsert_class(self, name, iri=None):
+        """Restituisce la classe indicata, creandola se non esiste"""
+        class_info = (iri and self.class_iris.get(iri)) or self.class_index.get(name)
+        if class_info is None:
+            class_info = OntClass(name, iri)
+            self.add_class(class_info)
+        return class_info
     
-    return enum_references
+    def add_subclass_axiom(self, sub_cls, super_cls):
+        """Registra che sub_cls è sottoclasse di super_cls"""
+        class_info = self.upsert_class(sub_cls)
+        super_cls = intern_name(super_cls)
+        if (class_info.name, super_cls) not in self.subclass_axioms:
+            self.subclass_axioms.add((class_info.name, super_cls))
+            class_info.subclass_of.append(super_cls)
+            self.hierarchy_index = self.adjacency_index = None
+    
+    def add_equivalence_axiom(self, class_name, equiv_name):
+        """Registra che class_name è equivalente a equiv_name"""
+        class_info = self.upsert_class(class_name)
+        equiv_name = intern_name(equiv_name)
+        if (class_info.name, equiv_name) not in self.equivalence_axioms:
+            self.equivalence_axioms.add((class_info.name, equiv_name))
+            class_info.equivalent_to.append(equiv_name)
+            self.hierarchy_index = self.adjacency_index = None
+    
+    def add_property(self, prop_info):
+        """Aggiunge una proprietà (le copie per dominio condividono il nome)"""
+        self.properties.append(prop_info)
+        self.property_index.setdefault(prop_info.name, prop_info)
+        self.adjacency_index = None
+        if prop_info.iri:
+            self.property_iris.setdefault(prop_info.iri, prop_info)
+    
+    def upsert_property(self, name, prop_type='ObjectProperty', iri=None):
+        """Restituisce la proprietà indicata, creandola se non esiste"""
+        prop_info = (iri and self.property_iris.get(iri)) or self.property_index.get(name)
+        # Chi la richiede di solito ne modifica dominio o range
+        self.adjacency_index = None
+        if prop_info is None:
+            prop_info = OntProperty(name, prop_type, iri=iri)
+            self.add_property(prop_info)
+        return prop_info
+    
+    def set_property_end(self, name, key, value):
+        """Imposta il dominio o il range (key) della proprietà indicata, creandola se non esiste"""
+        setattr(self.upsert_property(name), key, value)
+    
+    def add_enumeration(self, enum):
+        """Aggiunge un'enumerazione"""
+        self.enumerations.append(enum)
+        self.enum_index.setdefault(enum.name, enum)
+        self.adjacency_index = self.enumeration_index = None
 
-def extract_relations(classes, properties):
-    """Estrae le relazioni tra le classi basate sulle proprietà oggetto"""
-    relations = []
+class EnumerationIndex:
+    """Enumerazioni del modello indicizzate per IRI e per nome, con i valori come insiemi.
     
-    # Le relazioni provengono dalle ObjectProperty con dominio e range specificati
-    for prop in properties:
-        if prop['type'] == 'ObjectProperty' and prop['domain'] and prop['range']:
-            # Non includere relazioni con dominio "Unknown"
-            domain = normalize_value(prop['domain'])
-            if domain and domain != "Unknown":
-                relations.append({
-                    'from': domain,
-                    'to': normalize_value(prop['range']),
-                    'name': normalize_value(prop['name']),
-                    'type': '-->'
-                })
+    Il range delle DatatypeProperty viene collegato all'enumerazione con lo stesso
+    IRI; se il range non ha un IRI (assiomi OWL/XML) vale il nome locale.
+    """
     
-    # Aggiungi anche le relazioni di sottoclasse
-    for cls in classes:
-        for superclass in cls.get('subClassOf', []):
-            if superclass:  # Verifica che non sia None o vuoto
-                # Normalizza il valore della superclasse
-                superclass_str = normalize_value(superclass)
-                if superclass_str and superclass_str != "Unknown":
-                    relations.append({
-                        'from': superclass_str,
-                        'to': normalize_value(cls['name']),
-                        'name': 'subClassOf',
-                        'type': '<|--'
-                    })
-        
-        # Aggiungi le relazioni di equivalenza
-        for equiv_class in cls.get('equivalentTo', []):
-            equiv_class_str = normalize_value(equiv_class)
-            if equiv_class_str and equiv_class_str != "Unknown":
-                relations.append({
-                    'from': normalize_value(cls['name']),
-                    'to': equiv_class_str,
-                    'name': 'equivalentTo',
-                    'type': '..'  # Una linea punteggiata per equivalenza
-                })
-    
-    # Rimuovi duplicati delle relazioni di equivalenza
-    # (poiché se A equivale a B, abbiamo aggiunto sia A--B che B--A)
-    unique_relations = []
-    equiv_pairs = set()
+    def __init__(self, enumerations):
+        self.by_iri = {}
+        self.by_name = {}
+        for enum in enumerations:
+            if enum.iri:
+                self.by_iri.setdefault(enum.iri, enum)
+            self.by_name.setdefault(enum.name, enum)
+        self.value_sets = {}
     
-    for rel in relations:
-        if rel['name'] == 'equivalentTo':
-            # Ordina i nomi per creare una chiave univoca indipendente dall'ordine
-            pair = tuple(sorted([rel['from'], rel['to']]))
-            if pair not in equiv_pairs and "Unknown" not in pair:
-                equiv_pairs.add(pair)
-                unique_relations.append(rel)
-        else:
-            # Assicurati che nessuna estremità della relazione sia "Unknown"
-            if rel['from'] != "Unknown" and rel['to'] != "Unknown":
-                unique_relations.append(rel)
+    def __contains__(self, name):
+        return name in self.by_name
     
-    return unique_relations
+    def bind(self, prop):
+        """Enumerazione usata come range da una DatatypeProperty, o None"""
+        if prop.type != 'DataProperty' or not prop.range:
+            return None
+        if prop.range_iri:
+            return self.by_iri.get(prop.range_iri)
+        return self.by_name.get(prop.range)
+    
+    def members(self, name):
+        """Valori di un'enumerazione come frozenset, calcolato alla prima richiesta"""
+        values = self.value_sets.get(name)
+        if values is None:
+            values = self.value_sets[name] = frozenset(self.by_name[name].values)
+        return values
+    
+    def contains(self, name, value):
+        """Vero se value è uno dei valori dell'enumerazione name"""
+        return name in self.by_name and value in self.members(name)
 
-def generate_plantuml(classes, properties, relations, enumerations, enum_references):
-    """Genera il diagramma PlantUML dall'ontologia"""
-    plantuml = '@startuml\n\n'
-    plantuml += '!theme vibrant\n\n'
-    plantuml += 'title EU Cancer Ontology Model\n\n'
-    
-    # Definisci legenda
-    plantuml += 'legend\n'
-    plantuml += '  |= Tipo di relazione |= Significato |\n'
-    plantuml += '  | A <|-- B | B è sottoclasse di A |\n'
-    plantuml += '  | A --> B | A ha una relazione con B |\n'
-    plantuml += '  | A .. B : equivalentTo | A è equivalente a B |\n'
-    plantuml += '  | A --> B : type | A utilizza l\'enumerazione B |\n'
-    plantuml += 'endlegend\n\n'
-    
-    # Aggiungi le definizioni delle enumerazioni
-    for enum in enumerations:
-        plantuml += f'enum "{enum["name"]}" {{\n'
+class HierarchyIndex:
+    """Chiusura della gerarchia delle classi, calcolata una volta per modello.
+    
+    Le classi equivalenti (e quelle in un ciclo di subClassOf) sono unite in un
+    gruppo con union-find. I gruppi sono numerati in ordine topologico, superclassi
+    prima, e antenati e discendenti di ogni gruppo sono bitset (int) sui numeri dei
+    gruppi: le domande di ascendenza richiedono tempo costante.
+    """
+    
+    def __init__(self, classes):
+        classes = list(classes)
+        names = [cls.name for cls in classes]
+        for cls in classes:
+            names.extend(cls.subclass_of)
+            names.extend(cls.equivalent_to)
+        names = [name for name in dict.fromkeys(names) if name and name != "Unknown"]
+        position = {name: i for i, name in enumerate(names)}
+        parent = list(range(len(names)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
         
-        # Aggiungi i valori dell'enumerazione
-        for value in enum['values']:
-            plantuml += f'  {value}\n'
+        def union(a, b):
+            a, b = find(a), find(b)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
         
-        # Aggiungi commento se presente
-        if enum['comment']:
-            plantuml += '\n  .. comment ..\n'
-            comment = enum['comment']
-            if len(comment) > 50:
-                comment = comment[:47] + '...'
-            plantuml += f'  {comment}\n'
+        edges = []
+        for cls in classes:
+            i = position.get(cls.name)
+            if i is None:
+                continue
+            for other in cls.equivalent_to:
+                if other in position:
+                    union(i, position[other])
+            edges.extend((i, position[other]) for other in cls.subclass_of if other in position)
         
-        plantuml += '}\n\n'
+        # Le classi in un ciclo di subClassOf sono equivalenti
+        for component in strongly_connected_components(len(names), [(find(a), find(b)) for a, b in edges]):
+            for member in component[1:]:
+                union(component[0], member)
+        
+        # Superclassi dirette di ogni gruppo
+        roots = list(dict.fromkeys(find(i) for i in range(len(names))))
+        supers = {root: set() for root in roots}
+        for a, b in edges:
+            a, b = find(a), find(b)
+            if a != b:
+                supers[a].add(b)
+        subs = {root: [] for root in roots}
+        for root in roots:
+            for sup in supers[root]:
+                subs[sup].append(root)
+        
+        # Ordine topologico (algoritmo di Kahn), a parità nell'ordine del modello
+        pending = {root: len(supers[root]) for root in roots}
+        ready = deque(root for root in roots if not pending[root])
+        order = []
+        while ready:
+            root = ready.popleft()
+            order.append(root)
+            for sub in subs[root]:
+                pending[sub] -= 1
+                if not pending[sub]:
+                    ready.append(sub)
+        
+        group_id = {root: g for g, root in enumerate(order)}
+        self.group_of = {name: group_id[find(i)] for i, name in enumerate(names)}
+        self.members = [[] for _ in order]
+        for name, g in self.group_of.items():
+            self.members[g].append(name)
+        self.parents = [sorted(group_id[sup] for sup in supers[root]) for root in order]
+        self.children = [sorted(group_id[sub] for sub in subs[root]) for root in order]
+        
+        # Bitset degli antenati (in ordine topologico) e dei discendenti (in ordine inverso)
+        self.ancestor_bits = ancestors = [0] * len(order)
+        self.depths = depths = [0] * len(order)
+        for g in range(len(order)):
+            for p in self.parents[g]:
+                ancestors[g] |= ancestors[p] | (1 << p)
+                depths[g] = max(depths[g], depths[p] + 1)
+        self.descendant_bits = descendants = [0] * len(order)
+        for g in reversed(range(len(order))):
+            for c in self.children[g]:
+                descendants[g] |= descendants[c] | (1 << c)
     
-    # Raggruppa le proprietà dati per classe di dominio
-    class_attributes = {}
+    def __contains__(self, name):
+        return name in self.group_of
     
-    for prop in properties:
-        if prop['type'] == 'DataProperty' and prop['domain']:
-            domain = normalize_value(prop['domain'])
-            if domain and domain != "Unknown":
-                range_type = normalize_value(prop['range']) if prop['range'] else 'String'
-                prop_name = normalize_value(prop['name'])
-                
-                if domain not in class_attributes:
-                    class_attributes[domain] = []
-                
-                class_attributes[domain].append({
-                    'name': prop_name,
-                    'type': range_type
-                })
+    def __len__(self):
+        return len(self.members)
     
-    # Aggiungi classi con i loro attributi
-    for cls in classes:
-        # Assicurati che il nome della classe sia una stringa
-        class_name = normalize_value(cls["name"])
-        
-        plantuml += f'class "{class_name}" {{\n'
+    def names(self, bits):
+        """Nomi delle classi dei gruppi presenti nel bitset, in ordine topologico"""
+        result = []
+        while bits:
+            low = bits & -bits
+            result.extend(self.members[low.bit_length() - 1])
+            bits ^= low
+        return result
+    
+    def order(self):
+        """Classi in ordine topologico: ogni classe segue le sue superclassi"""
+        return [name for members in self.members for name in members]
+    
+    def roots(self):
+        """Classi senza superclassi"""
+        return [name for g, members in enumerate(self.members) if not self.parents[g] for name in members]
+    
+    def equivalents(self, name):
+        """Classi equivalenti a name (esclusa name stessa)"""
+        return [other for other in self.members[self.group_of[name]] if other != name]
+    
+    def ancestors(self, name):
+        """Tutte le superclassi, dirette e indirette"""
+        return self.names(self.ancestor_bits[self.group_of[name]])
+    
+    def descendants(self, name):
+        """Tutte le sottoclassi, dirette e indirette"""
+        return self.names(self.descendant_bits[self.group_of[name]])
+    
+    def descendant_count(self, name):
+        """Numero di sottoclassi dirette e indirette (contando i gruppi di equivalenza una volta)"""
+        return self.descendant_bits[self.group_of[name]].bit_count()
+    
+    def is_subclass_of(self, sub, sup):
+        """Vero se sub è sup, le è equivalente o ne discende"""
+        a = self.group_of.get(sub)
+        b = self.group_of.get(sup)
+        if a is None or b is None:
+            return False
+        return a == b or bool(self.ancestor_bits[a] >> b & 1)
+    
+    def depth(self, name):
+        """Lunghezza del cammino più lungo da una radice"""
+        return self.depths[self.group_of[name]]
+
+class AdjacencyIndex:
+    """Vicini di ogni classe ed enumerazione del diagramma, in entrambe le direzioni.
+    
+    Costruito dalle relazioni di iter_relations e dai riferimenti alle enumerazioni,
+    permette visite in ampiezza limitate che toccano solo i nodi raggiungibili.
+    """
+    
+    def __init__(self, relations, enum_references=()):
+        neighbors = {}
+        for relation in (*relations, *enum_references):
+            if relation.source and relation.target:
+                neighbors.setdefault(relation.source, {})[relation.target] = None
+                neighbors.setdefault(relation.target, {})[relation.source] = None
+        self.neighbors = {name: tuple(adjacent) for name, adjacent in neighbors.items()}
+    
+    def bfs(self, start, depth):
+        """Distanza da start dei nodi raggiungibili in al più depth passi"""
+        return bounded_bfs(lambda node: self.neighbors.get(node, ()), start, depth)
+
+def bounded_bfs(neighbors, start, depth):
+    """Visita in ampiezza da start fino a depth passi; neighbors(nodo) restituisce i vicini"""
+    distances = {start: 0}
+    frontier = [start]
+    for distance in range(1, depth + 1):
+        next_frontier = []
+        for node in frontier:
+            for neighbor in neighbors(node):
+                if neighbor not in distances:
+                    distances[neighbor] = distance
+                    next_frontier.append(neighbor)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return distances
+
+def focus_view(model, focus, depth=2):
+    """Classi ed enumerazioni entro depth passi da focus, come (nomi delle classi, nomi delle enumerazioni)"""
+    class_info = model.find_class(focus)
+    if class_info is None and focus not in model.enum_index:
+        raise ValueError(f"Classe o enumerazione non trovata: {focus}")
+    # Il diagramma usa i nomi locali: un IRI va ricondotto al nome della classe
+    if class_info is not None:
+        focus = class_info.name
+    reached = model.adjacency().bfs(focus, depth)
+    class_names = [name for name in reached if name in model.class_index]
+    enum_names = [name for name in reached if name in model.enum_index]
+    return class_names, enum_names
+
+def strongly_connected_components(count, edges):
+    """Componenti fortemente connesse con più di un nodo (algoritmo di Tarjan, iterativo)"""
+    successors = [[] for _ in range(count)]
+    for a, b in edges:
+        if a != b:
+            successors[a].append(b)
+    
+    index = [None] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack = []
+    components = []
+    counter = 0
+    for start in range(count):
+        if index[start] is not None:
+            continue
+        work = [(start, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                index[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            recurse = False
+            for i in range(child, len(successors[node])):
+                succ = successors[node][i]
+                if index[succ] is None:
+                    work.append((node, i + 1))
+                    work.append((succ, 0))
+                    recurse = True
+                    break
+                if on_stack[succ]:
+                    low[node] = min(low[node], index[succ])
+            if recurse:
+                continue
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    components.append(component)
+            if work:
+                parent_node = work[-1][0]
+                low[parent_node] = min(low[parent_node], low[node])
+    return components
+
+class StreamingExtractor:
+    """Raccoglie classi, proprietà, enumerazioni e assiomi visitando ogni elemento una sola volta.
+    
+    Riceve gli eventi start/end di iterparse (o di iter_tree_events) e registra un record
+    per ogni elemento riconosciuto; result() li combina poi in un OntologyModel.
+    """
+    
+    def __init__(self, namespaces):
+        self.namespaces = namespaces
+        self.ns = ns = build_search_namespaces(namespaces)
+        LOCAL_NAMES.add_namespaces(namespaces)
+        rdf, rdfs, owl = ns['rdf'], ns['rdfs'], ns['owl']
         
-        # Aggiungi attributi (proprietà dati)
-        if class_name in class_attributes:
-            for attr in class_attributes[class_name]:
-                plantuml += f'  +{attr["type"]} {attr["name"]}\n'
+        # Gestori eseguiti a fine elemento, quando il sottoalbero è completo
+        self.handlers = {
+            f'{{{owl}}}Class': ('owl_classes', extract_class),
+            f'{{{rdfs}}}Class': ('rdfs_classes', extract_class),
+            f'{{{rdf}}}Description': ('enumerations', extract_enumeration),
+            f'{{{owl}}}ObjectProperty': ('object_properties', extract_object_property),
+            f'{{{owl}}}DatatypeProperty': ('datatype_properties', extract_datatype_property),
+            f'{{{owl}}}SubClassOf': ('subclass_axioms', extract_subclass_axiom),
+            f'{{{owl}}}EquivalentClasses': ('equivalence_axioms', extract_equivalence_axiom),
+            f'{{{owl}}}ObjectPropertyDomain': ('domain_axioms', extract_property_axiom),
+            f'{{{owl}}}ObjectPropertyRange': ('range_axioms', extract_property_axiom),
+        }
+        self.records = {bucket: [] for bucket, _ in self.handlers.values()}
         
-        # Aggiungi una riga vuota se ci sono sia attributi che annotazioni
-        if class_name in class_attributes and cls['annotations']:
-            plantuml += '\n'
+        # Record ricavati dai soli attributi (forma reificata RDF/RDFS)
+        self.records['reified_subclasses'] = []
+        self.records['reified_datatypes'] = []
+        self.statements = StatementIndex()
         
-        # Aggiungi annotazioni come note
-        for annotation in cls['annotations']:
-            prop_name = normalize_value(annotation["property"])
-            plantuml += f'  .. {prop_name} ..\n'
-            
-            # Pulisci il valore dell'annotazione per il formato PlantUML
-            value = normalize_value(annotation['value'])
-            if value and len(value) > 50:
-                value = value[:47] + '...'
-            plantuml += f'  {value}\n'
+        self.rdf_about = f'{{{rdf}}}about'
+        self.rdf_type = f'{{{rdf}}}type'
+        self.rdf_subject = f'{{{rdf}}}subject'
+        self.rdf_predicate = f'{{{rdf}}}predicate'
+        self.rdf_object = f'{{{rdf}}}object'
         
-        plantuml += '}\n\n'
-    
-    # Aggiungi relazioni
-    for relation in relations:
-        if relation['from'] and relation['to']:
-            # Normalizza i valori
-            from_class = normalize_value(relation['from'])
-            to_class = normalize_value(relation['to'])
-            rel_type = relation['type']
-            rel_name = relation['name']
-            
-            if rel_type == '<|--':
-                # Relazione di ereditarietà
-                plantuml += f'"{from_class}" {rel_type} "{to_class}"\n'
-            elif rel_name == 'equivalentTo':
-                # Relazione di equivalenza con stile specifico
-                plantuml += f'"{from_class}" .. "{to_class}" : {rel_name}\n'
-            else:
-                # Relazione normale
-                plantuml += f'"{from_class}" {rel_type} "{to_class}" : {rel_name}\n'
+        # Posizione riservata per gli elementi aperti ma non ancora chiusi
+        self.pending = {}
     
-    # Aggiungi relazioni con le enumerazioni
-    for ref in enum_references:
-        from_class = normalize_value(ref['from'])
-        to_enum = normalize_value(ref['to'])
-        prop_name = normalize_value(ref['property'])
+    def start(self, elem):
+        """Registra un elemento all'apertura"""
+        handler = self.handlers.get(elem.tag)
+        if handler is not None:
+            # Riserva la posizione nell'ordine del documento: il contenuto arriva a fine elemento
+            bucket = self.records[handler[0]]
+            self.pending[elem] = len(bucket)
+            bucket.append(None)
+        
+        attrib = elem.attrib
+        if not attrib:
+            return
+        
+        rdf_type = attrib.get(self.rdf_type)
+        subject = attrib.get(self.rdf_subject)
+        if subject is not None:
+            predicate = attrib.get(self.rdf_predicate)
+            if rdf_type == 'http://www.w3.org/2000/01/rdf-schema#subClassOf':
+                # Statement con rdf:type=rdfs:subClassOf: il predicato è implicito
+                self.records['reified_subclasses'].append(subject)
+                predicate = predicate or rdf_type
+            self.statements.add(subject, predicate, attrib.get(self.rdf_object))
         
-        # Verifica che l'enumerazione esista
-        if any(enum['name'] == to_enum for enum in enumerations):
-            plantuml += f'"{from_class}" --> "{to_enum}" : {prop_name}\n'
+        if rdf_type == 'http://www.w3.org/2002/07/owl#DatatypeProperty':
+            self.records['reified_datatypes'].append(attrib.get(self.rdf_about))
     
-    plantuml += '@enduml'
+    def end(self, elem):
+        """Completa il record di un elemento alla chiusura"""
+        index = self.pending.pop(elem, None)
+        if index is not None:
+            bucket, handler = self.handlers[elem.tag]
+            self.records[bucket][index] = handler(elem, self.ns)
     
-    return plantuml
-
-def convert_owl2plantuml(input_file, output_file):
-    """Converte un file OWL in formato PlantUML"""
-    try:
-        # Parsa il file OWL
-        tree = ET.parse(input_file)
-        root = tree.getroot()
+    def result(self, model=None):
+        """Combina i record raccolti in un OntologyModel (o nel modello indicato)"""
+        if model is None:
+            model = OntologyModel(self.namespaces)
+        model.statements = statements = self.statements
+        records = self.records
+        # Solo gli elementi da cui è stato estratto qualcosa (non i nodi delle liste, ad esempio)
+        model.element_counts = {bucket: len(bucket_records) - bucket_records.count(None)
+                                for bucket, bucket_records in records.items()}
+        rdfs = self.ns['rdfs']
         
-        # Estrai i namespace
-        namespaces = parse_namespaces(root)
+        # Classi dichiarate, senza duplicati
+        for class_info, _ in self.class_records():
+            model.add_class(class_info)
         
-        # Estrai gli elementi dell'ontologia
-        classes = extract_classes(root, namespaces)
-        properties = extract_properties(root, namespaces)
-        enumerations = extract_enumerations(root, namespaces)
-        enum_references = extract_enum_references(properties)
-        relations = extract_relations(classes, properties)
+        # Dichiarazioni di SubClassOf dirette
+        for sub_cls, super_cls in records['subclass_axioms']:
+            if sub_cls and super_cls:
+                model.add_subclass_axiom(sub_cls, super_cls)
         
-        # Genera il PlantUML
-        plantuml_content = generate_plantuml(classes, properties, relations, enumerations, enum_references)
+        # Relazioni di sottoclasse in formato RDF/RDFS, dall'indice degli statement
+        for subject in dict.fromkeys(records['reified_subclasses']):
+            sub_cls = get_local_name(subject)
+            for obj in statements.objects(subject, f'{rdfs}subClassOf'):
+                model.add_subclass_axiom(sub_cls, get_local_name(obj))
         
-        # Scrivi il risultato su file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(plantuml_content)
+        # Equivalenze tra gruppi di almeno due classi
+        for equiv_group in records['equivalence_axioms']:
+            if len(equiv_group) < 2:
+                continue
+            for i, class_name in enumerate(equiv_group):
+                for j in range(len(equiv_group)):
+                    if i != j:  # Evita di rendere una classe equivalente a se stessa
+                        model.add_equivalence_axiom(class_name, equiv_group[j])
         
-        print(f"File PlantUML generato con successo: {output_file}")
+        for domain_props in records['object_properties']:
+            for prop_info in domain_props:
+                model.add_property(prop_info)
+        for prop_info in records['datatype_properties']:
+            model.add_property(prop_info)
         
-    except Exception as e:
-        print(f"Errore durante la conversione: {e}")
-        raise
+        # Proprietà dati in formato RDF/RDFS
+        for prop_about in records['reified_datatypes']:
+            # Dichiarazioni di dominio e range separate (vale l'ultima)
+            domains = statements.objects(prop_about, f'{rdfs}domain')
+            ranges = statements.objects(prop_about, f'{rdfs}range')
+            model.add_property(OntProperty(
+                get_local_name(prop_about), 'DataProperty',
+                get_local_name(domains[-1]) if domains else None,
+                get_local_name(ranges[-1]) if ranges else None,
+                iri=prop_about,
+                range_iri=ranges[-1] if ranges else None
+            ))
+        
+        # Dichiarazioni di dominio e range dirette
+        for axioms, key in ((records['domain_axioms'], 'domain'), (records['range_axioms'], 'range')):
+            for axiom in axioms:
+                if axiom is not None:
+                    prop_name, class_name = axiom
+                    model.set_property_end(prop_name, key, class_name)
+        
+        # Proprietà di tipo attributo dichiarate con owl:hasKey
+        for class_info, keys in self.class_records():
+            for prop_name in keys:
+                # Range di default 'String' se non specificato
+                model.add_property(OntProperty(prop_name, 'DataProperty', class_info.name, 'String'))
+        
+        for enum in records['enumerations']:
+            if enum:
+                model.add_enumeration(enum)
+        
+        return model
+    
+    def class_records(self):
+        """Restituisce i record delle classi dichiarate, prima owl:Class e poi rdfs:Class"""
+        for bucket in ('owl_classes', 'rdfs_classes'):
+            for record in self.records[bucket]:
+                if record is not None:
+                    yield record
 
-def main():
-    """Funzione principale"""
-    parser = argparse.ArgumentParser(description='Converti un file OWL in diagramma PlantUML')
-    parser.add_argument('input', help='File OWL di input')
-    parser.add_argument('output', help='File PlantUML di output')
+def iter_tree_events(root):
+    """Genera gli eventi start/end di un albero già costruito, come farebbe iterparse"""
+    yield 'start', root
+    stack = [(root, iter(root))]
+    while stack:
+        elem, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            yield 'end', elem
+        else:
+            yield 'start', child
+            stack.append((child, iter(child)))
+
+def extract_ontology(root, namespaces):
+    """Costruisce l'OntologyModel da un albero già costruito in un'unica visita"""
+    extractor = StreamingExtractor(namespaces)
+    for event, elem in iter_tree_events(root):
+        if event == 'start':
+            extractor.start(elem)
+        else:
+            extractor.end(elem)
+    return extractor.result()
+
+def stream_ontology(source, store=None):
+    """Costruisce l'OntologyModel da un file RDF/XML con iterparse, in un'unica passata.
     
-    args = parser.parse_args()
+    Gli elementi di primo livello vengono rimossi appena elaborati, così la memoria
+    occupata resta limitata al più grande di essi. Con un ModelStore anche i record
+    e il modello finiscono nel database (vedi StoreExtractor) e viene restituito uno
+    StoreModel.
+    """
+    extractor = None
+    root = None
+    depth = 0
+    declared = {}
+    
+    for event, elem in ET.iterparse(source, events=('start-ns', 'start', 'end')):
+        if event == 'start-ns':
+            # Prefissi dichiarati con xmlns, utili alla risoluzione dei nomi locali
+            prefix, uri = elem
+            declared.setdefault(prefix, uri)
+            continue
+        
+        if event == 'start':
+            if root is None:
+                # I namespace sono disponibili già all'apertura della radice
+                root = elem
+                namespaces = parse_namespaces(root)
+                for prefix, uri in declared.items():
+                    namespaces.setdefault(prefix, uri)
+                extractor = StreamingExtractor(namespaces) if store is None else StoreExtractor(namespaces, store)
+            depth += 1
+            extractor.start(elem)
+        else:
+            depth -= 1
+            extractor.end(elem)
+            if depth == 1:
+                root.clear()
+    
+    return extractor.result()
+
+def extract_enumerations(root, namespaces, model=None):
+    """Estrae le enumerazioni dal documento OWL"""
+    if model is None:
+        model = extract_ontology(root, namespaces)
+    return model.enumerations
+
+def extract_classes(root, namespaces, model=None):
+    """Estrae le classi dall'ontologia"""
+    if model is None:
+        model = extract_ontology(root, namespaces)
+    return model.classes
+
+def extract_properties(root, namespaces, model=None):
+    """Estrae le proprietà dell'ontologia"""
+    if model is None:
+        model = extract_ontology(root, namespaces)
+    return model.properties
+
+# Namespace usati dai front-end basati su triple
+RDF = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+RDFS = 'http://www.w3.org/2000/01/rdf-schema#'
+OWL = 'http://www.w3.org/2002/07/owl#'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+
+class BlankNode(str):
+    """Identificatore di un nodo anonimo"""
+    __slots__ = ()
+
+class Literal(str):
+    """Valore letterale (tipo di dato e lingua non servono al diagramma)"""
+    __slots__ = ()
+
+class TripleModelBuilder:
+    """Costruisce l'OntologyModel da una sequenza di triple RDF.
+    
+    Le triple vengono raggruppate per soggetto e predicato man mano che arrivano;
+    result() applica poi le stesse regole dell'estrazione RDF/XML.
+    """
+    
+    def __init__(self, namespaces=None):
+        self.namespaces = dict(namespaces or {})
+        # soggetto -> {predicato: [oggetti]}, in ordine di prima apparizione
+        self.subjects = {}
     
-    convert_owl2plantuml(args.input, args.output)
+    def add(self, subject, predicate, obj):
+        """Registra una tripla"""
+        predicates = self.subjects.get(subject)
+        if predicates is None:
+            predicates = self.subjects[subject] = {}
+        objects = predicates.get(predicate)
+        if objects is None:
+            predicates[predicate] = [obj]
+        else:
+            objects.append(obj)
+    
+    def add_triples(self, triples):
+        """Registra tutte le triple di una sequenza (anche un generatore)"""
+        for subject, predicate, obj in triples:
+            self.add(subject, predicate, obj)
+    
+    def objects(self, subject, predicate):
+        """Restituisce gli oggetti delle triple con il soggetto e il predicato indicati"""
+        return self.subjects.get(subject, {}).get(predicate, ())
+    
+    def list_items(self, node):
+        """Decodifica iterativamente una rdf:List"""
+        items = []
+        seen = set()
+        while node and node != f'{RDF}nil' and node not in seen:
+            seen.add(node)
+            first = self.objects(node, f'{RDF}first')
+            if first:
+                items.append(first[0])
+            rest = self.objects(node, f'{RDF}rest')
+            node = rest[0] if rest else None
+        return items
+    
+    def comments(self, predicates):
+        """Restituisce le annotazioni rdfs:comment di un soggetto"""
+        return tuple(('comment', normalize_value(str(comment)))
+                     for comment in predicates.get(f'{RDFS}comment', ()))
+    
+    def resource_names(self, objects):
+        """Restituisce i nomi locali degli oggetti che sono IRI, senza duplicati"""
+        names = []
+        for obj in objects:
+            if not isinstance(obj, (BlankNode, Literal)):
+                name = intern_name(get_local_name(obj))
+                if name not in names:
+                    names.append(name)
+        return names
+    
+    def resource_name(self, obj):
+        """Nome locale di un oggetto, "Unknown" se non è un IRI (come per rdf:resource mancante)"""
+        if isinstance(obj, (BlankNode, Literal)):
+            return get_local_name(None)
+        return get_local_name(obj)
+    
+    def build_class(self, subject, predicates):
+        """Crea la classe e le chiavi owl:hasKey di un soggetto tipizzato come classe"""
+        class_info = OntClass(get_local_name(subject), subject, self.comments(predicates),
+                              self.resource_names(predicates.get(f'{RDFS}subClassOf', ())),
+                              self.resource_names(predicates.get(f'{OWL}equivalentClass', ())))
+        keys = []
+        for key_list in predicates.get(f'{OWL}hasKey', ()):
+            keys.extend(self.resource_names(self.list_items(key_list)))
+        return class_info, keys
+    
+    def build_enumeration(self, subject, predicates):
+        """Crea l'enumerazione di un soggetto equivalente a un rdfs:Datatype con owl:oneOf"""
+        for equiv in predicates.get(f'{OWL}equivalentClass', ()):
+            for one_of in self.objects(equiv, f'{OWL}oneOf'):
+                values = [str(value) for value in self.list_items(one_of) if str(value)]
+                if values:
+                    comments = predicates.get(f'{RDFS}comment', ())
+                    return Enumeration(get_local_name(subject), values,
+                                       str(comments[0]) if comments else "", subject)
+        return None
+    
+    def build_object_properties(self, subject, predicates):
+        """Crea una ObjectProperty per ciascun dominio (anche quelli in owl:unionOf)"""
+        prop_info = OntProperty(get_local_name(subject), 'ObjectProperty',
+                                annotations=self.comments(predicates), iri=subject)
+        
+        domains = []
+        for domain in predicates.get(f'{RDFS}domain', ()):
+            if isinstance(domain, BlankNode):
+                for union_of in self.objects(domain, f'{OWL}unionOf'):
+                    domains.extend(self.resource_names(self.list_items(union_of)))
+            elif not isinstance(domain, Literal):
+                domains.append(get_local_name(domain))
+        
+        ranges = self.resource_names(predicates.get(f'{RDFS}range', ()))
+        prop_info.range = ranges[0] if ranges else None
+        
+        if not domains:
+            return [prop_info]
+        return [prop_info.with_domain(domain) for domain in domains]
+    
+    def build_datatype_property(self, subject, predicates, statements):
+        """Crea una DatatypeProperty (vale l'ultimo dominio e l'ultimo range dichiarati)"""
+        domains = list(predicates.get(f'{RDFS}domain', ())) + statements.objects(subject, f'{RDFS}domain')
+        ranges = list(predicates.get(f'{RDFS}range', ())) + statements.objects(subject, f'{RDFS}range')
+        range_iri = ranges[-1] if ranges and not isinstance(ranges[-1], (BlankNode, Literal)) else None
+        return OntProperty(get_local_name(subject), 'DataProperty',
+                           self.resource_name(domains[-1]) if domains else None,
+                           self.resource_name(ranges[-1]) if ranges else None,
+                           self.comments(predicates), subject, str(range_iri) if range_iri else None)
+    
+    def result(self):
+        """Costruisce l'OntologyModel dalle triple raccolte"""
+        namespaces = dict(self.namespaces)
+        for prefix, uri in (('rdf', RDF), ('rdfs', RDFS), ('owl', OWL), ('xsd', XSD)):
+            namespaces.setdefault(prefix, uri)
+        LOCAL_NAMES.add_namespaces(namespaces)
+        
+        model = OntologyModel(namespaces)
+        
+        # Statement reificati (rdf:subject/rdf:predicate/rdf:object)
+        for predicates in self.subjects.values():
+            for subject in predicates.get(f'{RDF}subject', ()):
+                for predicate in predicates.get(f'{RDF}predicate', ()):
+                    for obj in predicates.get(f'{RDF}object', ()):
+                        model.statements.add(subject, predicate, obj)
+        
+        owl_classes = []
+        rdfs_classes = []
+        object_properties = []
+        datatype_properties = []
+        for subject, predicates in self.subjects.items():
+            if isinstance(subject, BlankNode):
+                continue
+            types = predicates.get(f'{RDF}type', ())
+            
+            if f'{OWL}Class' in types:
+                owl_classes.append(self.build_class(subject, predicates))
+            elif f'{RDFS}Class' in types:
+                rdfs_classes.append(self.build_class(subject, predicates))
+            if f'{OWL}ObjectProperty' in types:
+                object_properties.extend(self.build_object_properties(subject, predicates))
+            if f'{OWL}DatatypeProperty' in types:
+                datatype_properties.append(self.build_datatype_property(subject, predicates, model.statements))
+            
+            enum = self.build_enumeration(subject, predicates)
+            if enum is not None:
+                model.add_enumeration(enum)
+        
+        # Prima le owl:Class e poi le rdfs:Class, come nell'estrazione RDF/XML
+        class_records = owl_classes + rdfs_classes
+        for class_info, _ in class_records:
+            model.add_class(class_info)
+        
+        # Relazioni di sottoclasse reificate
+        for subject, pairs in model.statements.by_subject.items():
+            for predicate, obj in pairs:
+                if predicate == f'{RDFS}subClassOf':
+                    model.add_subclass_axiom(get_local_name(subject), get_local_name(obj))
+        
+        for prop_info in object_properties + datatype_properties:
+            model.add_property(prop_info)
+        
+        # Proprietà di tipo attributo dichiarate con owl:hasKey
+        for class_info, keys in class_records:
+            for prop_name in keys:
+                model.add_property(OntProperty(prop_name, 'DataProperty', class_info.name, 'String'))
+        
+        return model
+
+def read_text(source):
+    """Legge il contenuto testuale di un percorso o di un oggetto file-like"""
+    if hasattr(source, 'read'):
+        data = source.read()
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    return data
+
+# Token del linguaggio Turtle, provati nell'ordine indicato
+# Nei numeri il punto è decimale solo se seguito da cifre (o da un esponente),
+# altrimenti chiude lo statement: ':A :card 1.'
+TURTLE_TOKEN = re.compile(r'''
+    (?P<skip>[ \t\r\n]+|\#[^\r\n]*)
+  | (?P<iri><[^<>"{}|^`\\\x00-\x20]*>)
+  | (?P<long_string>"""(?:[^"\\]|\\.|"(?!""))*"""|\'\'\'(?:[^'\\]|\\.|'(?!''))*\'\'\')
+  | (?P<string>"(?:[^"\\\r\n]|\\.)*"|'(?:[^'\\\r\n]|\\.)*')
+  | (?P<langtag>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+  | (?P<datatype>\^\^)
+  | (?P<number>[+-]?(?:[0-9]+\.[0-9]*[eE][+-]?[0-9]+|[0-9]*\.[0-9]+(?:[eE][+-]?[0-9]+)?|[0-9]+(?:[eE][+-]?[0-9]+)?))
+  | (?P<bnode>_:[\w.-]*[\w-])
+  | (?P<pname>(?:[A-Za-z][\w.-]*)?:(?:[\w.:%-]|\\[^\s])*)
+  | (?P<word>[A-Za-z]+)
+  | (?P<punct>[.;,\[\]()])
+''', re.VERBOSE)
+
+# Schema iniziale degli IRI assoluti (RFC 3987)
+IRI_SCHEME = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:')
+
+TURTLE_ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+def unescape_turtle(value):
+    """Decodifica le sequenze di escape di una stringa Turtle"""
+    if '\\' not in value:
+        return value
+    
+    def replace(match):
+        escape = match.group(1)
+        if escape[0] in 'uU':
+            return chr(int(escape[1:], 16))
+        return TURTLE_ESCAPES.get(escape, escape)
+    
+    return re.sub(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)', replace, value)
+
+def tokenize_turtle(text):
+    """Divide un documento Turtle in token (tipo, valore)"""
+    pos = 0
+    end = len(text)
+    match_token = TURTLE_TOKEN.match
+    while pos < end:
+        match = match_token(text, pos)
+        if match is None:
+            line = text.count('\n', 0, pos) + 1
+            raise ValueError(f"Token Turtle non valido alla riga {line}: {text[pos:pos + 20]!r}")
+        
+        kind = match.lastgroup
+        value = match.group(kind)
+        pos = match.end()
+        if kind == 'skip':
+            continue
+        if kind == 'pname' and value.endswith('.'):
+            # Il punto finale chiude lo statement e non fa parte del nome
+            stripped = value.rstrip('.')
+            pos -= len(value) - len(stripped)
+            value = stripped
+        yield kind, value
+
+class TurtleParser:
+    """Parser Turtle senza dipendenze che produce le triple una alla volta.
+    
+    Copre le direttive @prefix/@base (anche in forma SPARQL), nomi prefissati,
+    nodi anonimi [ ... ], collezioni ( ... ) e letterali con lingua o tipo.
+    """
+    
+    def __init__(self, text, base=''):
+        self.tokens = tokenize_turtle(text)
+        self.lookahead = None
+        self.prefixes = {}
+        self.base = base
+        self.bnode_count = 0
+        self.pending = []
+    
+    def peek(self):
+        if self.lookahead is None:
+            self.lookahead = next(self.tokens, (None, None))
+        return self.lookahead
+    
+    def next(self):
+        token = self.peek()
+        self.lookahead = None
+        return token
+    
+    def expect(self, value):
+        kind, token = self.next()
+        if token != value:
+            raise ValueError(f"Atteso {value!r} nel documento Turtle, trovato {token!r}")
+    
+    def new_bnode(self):
+        # I nomi generati iniziano con '.', che non è ammesso nelle etichette del documento
+        self.bnode_count += 1
+        return BlankNode(f'_:.{self.bnode_count}')
+    
+    def resolve(self, iri):
+        """Risolve un IRI relativo rispetto a @base; gli IRI assoluti restano invariati"""
+        if not self.base or IRI_SCHEME.match(iri):
+            return iri
+        resolved = urljoin(self.base, iri)
+        # urljoin scarta il frammento vuoto ('<#>', 'ontologia#')
+        if iri.endswith('#') and not resolved.endswith('#'):
+            resolved += '#'
+        return resolved
+    
+    def expand(self, pname):
+        prefix, _, local = pname.partition(':')
+        if prefix not in self.prefixes:
+            raise ValueError(f"Prefisso Turtle non dichiarato: {prefix!r}")
+        return self.prefixes[prefix] + re.sub(r'\\(.)', r'\1', local)
+    
+    def triples(self):
+        """Genera le triple del documento, statement per statement"""
+        while self.peek()[0] is not None:
+            self.statement()
+            yield from self.pending
+            self.pending.clear()
+    
+    def statement(self):
+        kind, value = self.peek()
+        if kind == 'langtag' and value in ('@prefix', '@base'):
+            self.next()
+            self.directive(value[1:])
+            self.expect('.')
+        elif kind == 'word' and value.lower() in ('prefix', 'base'):
+            self.next()
+            self.directive(value.lower())
+        else:
+            if kind == 'punct' and value == '[':
+                subject = self.blank_node_property_list()
+                if self.peek()[1] != '.':
+                    self.predicate_object_list(subject)
+            else:
+                subject = self.subject()
+                self.predicate_object_list(subject)
+            self.expect('.')
+    
+    def directive(self, name):
+        if name == 'prefix':
+            kind, prefix = self.next()
+            _, iri = self.next()
+            self.prefixes[prefix[:-1]] = self.resolve(iri[1:-1])
+        else:
+            _, iri = self.next()
+            self.base = self.resolve(iri[1:-1])
+    
+    def subject(self):
+        kind, value = self.peek()
+        if kind == 'punct' and value == '(':
+            return self.collection()
+        return self.iri_or_bnode()
+    
+    def iri_or_bnode(self):
+        kind, value = self.next()
+        if kind == 'iri':
+            return self.resolve(unescape_turtle(value[1:-1]))
+        if kind == 'pname':
+            return self.expand(value)
+        if kind == 'bnode':
+            return BlankNode(value)
+        raise ValueError(f"Atteso un IRI nel documento Turtle, trovato {value!r}")
+    
+    def predicate_object_list(self, subject):
+        while True:
+            kind, value = self.peek()
+            if kind == 'word' and value == 'a':
+                self.next()
+                predicate = f'{RDF}type'
+            else:
+                predicate = self.iri_or_bnode()
+            
+            self.pending.append((subject, predicate, self.object()))
+            while self.peek()[1] == ',':
+                self.next()
+                self.pending.append((subject, predicate, self.object()))
+            
+            # Dopo ';' il predicato successivo è facoltativo
+            if self.peek()[1] != ';':
+                return
+            while self.peek()[1] == ';':
+                self.next()
+            if self.peek()[1] in ('.', ']', None):
+                return
+    
+    def object(self):
+        kind, value = self.peek()
+        if kind == 'punct' and value == '[':
+            return self.blank_node_property_list()
+        if kind == 'punct' and value == '(':
+            return self.collection()
+        if kind in ('string', 'long_string'):
+            self.next()
+            quote = 3 if kind == 'long_string' else 1
+            literal = Literal(unescape_turtle(value[quote:-quote]))
+            kind, value = self.peek()
+            if kind == 'langtag':
+                self.next()
+            elif kind == 'datatype':
+                self.next()
+                self.iri_or_bnode()
+            return literal
+        if kind == 'number' or (kind == 'word' and value in ('true', 'false')):
+            self.next()
+            return Literal(value)
+        return self.iri_or_bnode()
+    
+    def blank_node_property_list(self):
+        self.expect('[')
+        node = self.new_bnode()
+        if self.peek()[1] != ']':
+            self.predicate_object_list(node)
+        self.expect(']')
+        return node
+    
+    def collection(self):
+        self.expect('(')
+        head = None
+        previous = None
+        while self.peek()[1] != ')':
+            if self.peek()[0] is None:
+                raise ValueError("Collezione Turtle non chiusa")
+            node = self.new_bnode()
+            item = self.object()
+            if previous is None:
+                head = node
+            else:
+                self.pending.append((previous, f'{RDF}rest', node))
+            self.pending.append((node, f'{RDF}first', item))
+            previous = node
+        self.next()
+        
+        if previous is None:
+            return f'{RDF}nil'
+        self.pending.append((previous, f'{RDF}rest', f'{RDF}nil'))
+        return head
+
+def read_turtle(source):
+    """Costruisce l'OntologyModel da un file Turtle (.ttl)"""
+    parser = TurtleParser(read_text(source))
+    builder = TripleModelBuilder()
+    builder.add_triples(parser.triples())
+    builder.namespaces.update(parser.prefixes)
+    if parser.base:
+        builder.namespaces.setdefault('base', parser.base)
+    return builder.result()
+
+class JsonLdContext:
+    """Contesto JSON-LD: definizioni dei termini, @vocab e @base"""
+    
+    def __init__(self):
+        self.terms = {}  # termine -> (IRI, coercizione del tipo, container)
+        self.vocab = None
+        self.base = ''
+    
+    def update(self, context):
+        """Restituisce un nuovo contesto con le definizioni di context applicate"""
+        updated = JsonLdContext()
+        updated.terms = dict(self.terms)
+        updated.vocab = self.vocab
+        updated.base = self.base
+        
+        for local_context in context if isinstance(context, list) else [context]:
+            if local_context is None:
+                updated = JsonLdContext()
+                continue
+            if not isinstance(local_context, dict):
+                raise ValueError(f"Contesto JSON-LD remoto non supportato: {local_context!r}")
+            
+            if '@base' in local_context:
+                updated.base = local_context['@base'] or ''
+            if '@vocab' in local_context:
+                updated.vocab = local_context['@vocab']
+            
+            # Prima registra i termini, poi espandi gli IRI che usano altri termini come prefisso
+            pending = {}
+            for term, definition in local_context.items():
+                if term.startswith('@'):
+                    continue
+                if definition is None:
+                    updated.terms.pop(term, None)
+                elif isinstance(definition, str):
+                    pending[term] = (definition, None, None)
+                else:
+                    pending[term] = (definition.get('@id', term), definition.get('@type'),
+                                     definition.get('@container'))
+            updated.terms.update(pending)
+            for term, (iri, coercion, container) in pending.items():
+                coercion = updated.expand_iri(coercion) if coercion else None
+                updated.terms[term] = (updated.expand_iri(iri), coercion, container)
+        
+        return updated
+    
+    def expand_iri(self, value, vocab=True):
+        """Espande un termine, un IRI compatto o un IRI relativo"""
+        if value.startswith('@'):
+            return value
+        if vocab and value in self.terms and self.terms[value][0] != value:
+            return self.terms[value][0]
+        
+        prefix, colon, suffix = value.partition(':')
+        if colon:
+            if prefix == '_' or suffix.startswith('//'):
+                return value
+            if prefix in self.terms:
+                return self.terms[prefix][0] + suffix
+            return value
+        
+        if vocab and self.vocab:
+            return self.vocab + value
+        return urljoin(self.base, value) if self.base else value
+    
+    def prefixes(self):
+        """Restituisce i termini che definiscono un namespace (IRI terminante con '#' o '/')"""
+        return {term: iri for term, (iri, _, _) in self.terms.items()
+                if isinstance(iri, str) and iri.endswith(('#', '/'))}
+
+class JsonLdReader:
+    """Converte i nodi di un documento JSON-LD (espanso o compattato) in triple"""
+    
+    def __init__(self, builder):
+        self.add = builder.add
+        self.bnode_count = 0
+        self.contexts = []
+    
+    def new_bnode(self):
+        # I nomi generati iniziano con '.', come nel parser Turtle
+        self.bnode_count += 1
+        return BlankNode(f'_:.{self.bnode_count}')
+    
+    def node_id(self, value, context):
+        if value.startswith('_:'):
+            return BlankNode(value)
+        return context.expand_iri(value, vocab=False)
+    
+    def read(self, document, context=None):
+        """Legge un documento: un nodo, una lista di nodi o un oggetto con @graph"""
+        context = context or JsonLdContext()
+        if isinstance(document, list):
+            for item in document:
+                self.read(item, context)
+            return
+        
+        if '@context' in document:
+            context = context.update(document['@context'])
+            self.contexts.append(context)
+        
+        # Un oggetto con solo @graph (ed eventualmente @context) non è un nodo
+        if '@graph' in document and not set(document) - {'@context', '@graph', '@id'}:
+            for item in document['@graph'] if isinstance(document['@graph'], list) else [document['@graph']]:
+                self.read(item, context)
+        else:
+            self.node(document, context)
+    
+    def node(self, obj, context):
+        """Registra le triple di un nodo e ne restituisce l'identificatore"""
+        if '@context' in obj:
+            context = context.update(obj['@context'])
+            self.contexts.append(context)
+        
+        subject = self.node_id(obj['@id'], context) if '@id' in obj else self.new_bnode()
+        for key, value in obj.items():
+            if key in ('@context', '@id'):
+                continue
+            if key == '@type':
+                for type_iri in value if isinstance(value, list) else [value]:
+                    self.add(subject, f'{RDF}type', context.expand_iri(type_iri))
+            elif key == '@graph':
+                self.read(value, context)
+            elif not key.startswith('@'):
+                predicate = context.expand_iri(key)
+                if ':' not in predicate:
+                    # I termini non definiti vengono ignorati, come prevede JSON-LD
+                    continue
+                definition = context.terms.get(key, (None, None, None))
+                if definition[2] == '@list' and isinstance(value, list):
+                    value = {'@list': value}
+                for item in value if isinstance(value, list) else [value]:
+                    obj_term = self.value(item, definition[1], context)
+                    if obj_term is not None:
+                        self.add(subject, predicate, obj_term)
+        return subject
+    
+    def value(self, item, coercion, context):
+        """Converte un valore JSON-LD in IRI, nodo anonimo o letterale"""
+        if item is None:
+            return None
+        if isinstance(item, bool):
+            return Literal('true' if item else 'false')
+        if isinstance(item, (int, float)):
+            return Literal(str(item))
+        if isinstance(item, str):
+            if coercion == '@id':
+                return self.node_id(item, context)
+            if coercion == '@vocab':
+                return context.expand_iri(item)
+            return Literal(item)
+        if isinstance(item, list):
+            return self.rdf_list(item, coercion, context)
+        
+        if '@value' in item:
+            return Literal(str(item['@value']))
+        if '@list' in item:
+            return self.rdf_list(item['@list'], coercion, context)
+        if set(item) <= {'@id'} and '@id' in item:
+            return self.node_id(item['@id'], context)
+        return self.node(item, context)
+    
+    def rdf_list(self, items, coercion, context):
+        """Costruisce una rdf:List con i valori indicati"""
+        head = f'{RDF}nil'
+        previous = None
+        for item in items:
+            obj_term = self.value(item, coercion, context)
+            if obj_term is None:
+                continue
+            node = self.new_bnode()
+            if previous is None:
+                head = node
+            else:
+                self.add(previous, f'{RDF}rest', node)
+            self.add(node, f'{RDF}first', obj_term)
+            previous = node
+        if previous is not None:
+            self.add(previous, f'{RDF}rest', f'{RDF}nil')
+        return head
+
+def read_jsonld(source):
+    """Costruisce l'OntologyModel da JSON-LD: percorso, file-like o documento già decodificato"""
+    if isinstance(source, (dict, list)):
+        document = source
+    else:
+        document = json.loads(read_text(source))
+    
+    builder = TripleModelBuilder()
+    reader = JsonLdReader(builder)
+    reader.read(document)
+    for context in reader.contexts:
+        builder.namespaces.update(context.prefixes())
+    return builder.result()
+
+def iter_text_lines(source):
+    """Restituisce le righe di un percorso o di un oggetto file-like senza leggerlo tutto"""
+    if not hasattr(source, 'read'):
+        with open(source, encoding='utf-8-sig') as f:
+            yield from f
+        return
+    
+    if not isinstance(source.read(0), bytes):
+        yield from source
+        return
+    
+    stream = io.TextIOWrapper(source, encoding='utf-8-sig')
+    try:
+        yield from stream
+    finally:
+        # Non chiudere il file del chiamante insieme al wrapper
+        stream.detach()
+
+# Token di OWL Functional Syntax
+OFN_TOKEN = re.compile(r'''
+    (?P<skip>\s+|\#[^\n]*)
+  | (?P<iri><[^>\s]*>)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<datatype>\^\^)
+  | (?P<langtag>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+  | (?P<equals>=)
+  | (?P<name>[^\s()<>"=^@\#]+)
+''', re.VERBOSE)
+
+def tokenize_ofn(lines):
+    """Divide in token un documento OWL Functional Syntax, una riga alla volta.
+    
+    Solo le stringhe su più righe vengono accumulate finché non sono chiuse.
+    """
+    buffer = ''
+    line_number = 0
+    for line in lines:
+        line_number += 1
+        buffer += line
+        pos = 0
+        end = len(buffer)
+        while pos < end:
+            match = OFN_TOKEN.match(buffer, pos)
+            if match is None:
+                if buffer[pos] == '"':
+                    # Stringa non ancora chiusa: serve la riga successiva
+                    break
+                raise ValueError(f"Token OWL Functional Syntax non valido alla riga {line_number}: "
+                                 f"{buffer[pos:pos + 20]!r}")
+            kind = match.lastgroup
+            pos = match.end()
+            if kind != 'skip':
+                yield kind, match.group(kind)
+        buffer = buffer[pos:]
+    
+    if buffer.strip():
+        raise ValueError("Stringa non chiusa alla fine del documento OWL Functional Syntax")
+
+def parse_ofn(tokens, prefixes):
+    """Raggruppa i token in espressioni annidate e restituisce gli assiomi uno alla volta.
+    
+    Un'espressione è una lista [costruttore, argomenti...]; gli argomenti sono
+    espressioni, IRI completi ('<...>'), nomi abbreviati o Literal. Le direttive
+    Prefix vengono registrate in prefixes; gli assiomi dentro Ontology(...) non
+    vengono conservati dopo essere stati restituiti.
+    """
+    top = []
+    stack = []
+    skip_datatype = False
+    
+    for kind, value in tokens:
+        current = stack[-1] if stack else top
+        if kind == 'open':
+            # Il costruttore è il nome che precede la parentesi (vuoto per HasKey); i nomi
+            # abbreviati (prefisso:nome) sono argomenti, come la classe di HasKey(:C () (:p))
+            last = current[-1] if current else None
+            is_name = (isinstance(last, str) and not isinstance(last, Literal) and not last.startswith('<')
+                       and ':' not in last)
+            name = current.pop() if is_name else ''
+            stack.append([name])
+        elif kind == 'close':
+            if not stack:
+                raise ValueError("Parentesi chiusa senza apertura nel documento OWL Functional Syntax")
+            expr = stack.pop()
+            if not stack:
+                if expr[0] == 'Prefix' and len(expr) >= 3:
+                    prefixes[expr[1][:-1]] = expr[2][1:-1]
+                top.clear()
+            elif len(stack) == 1 and stack[0][0] == 'Ontology':
+                yield expr
+            else:
+                stack[-1].append(expr)
+        elif kind == 'string':
+            current.append(Literal(re.sub(r'\\(["\\])', r'\1', value[1:-1])))
+        elif kind == 'datatype':
+            skip_datatype = True
+        elif kind in ('iri', 'name'):
+            if skip_datatype:
+                # Il tipo di dato dei letterali non serve al diagramma
+                skip_datatype = False
+            else:
+                current.append(value)
+    
+    if stack:
+        raise ValueError("Parentesi non chiuse alla fine del documento OWL Functional Syntax")
+
+class OfnReader:
+    """Traduce gli assiomi OWL Functional Syntax in triple per il TripleModelBuilder"""
+    
+    # Tipo RDF delle entità dichiarate con Declaration(...)
+    DECLARATION_TYPES = {
+        'Class': f'{OWL}Class',
+        'ObjectProperty': f'{OWL}ObjectProperty',
+        'DataProperty': f'{OWL}DatatypeProperty',
+        'AnnotationProperty': f'{OWL}AnnotationProperty',
+        'Datatype': f'{RDFS}Datatype',
+        'NamedIndividual': f'{OWL}NamedIndividual',
+    }
+    
+    def __init__(self, builder, prefixes):
+        self.add = builder.add
+        self.prefixes = prefixes
+        self.bnode_count = 0
+    
+    def new_bnode(self):
+        # I nomi generati iniziano con '.', come negli altri front-end
+        self.bnode_count += 1
+        return BlankNode(f'_:.{self.bnode_count}')
+    
+    def iri(self, term):
+        """Espande un IRI completo o abbreviato"""
+        if term.startswith('<'):
+            return term[1:-1]
+        if term.startswith('_:'):
+            return BlankNode(term)
+        prefix, colon, local = term.partition(':')
+        if not colon or prefix not in self.prefixes:
+            raise ValueError(f"Prefisso OWL Functional Syntax non dichiarato: {term!r}")
+        return self.prefixes[prefix] + local
+    
+    def term(self, arg):
+        """Converte un argomento in IRI o Literal (None per le espressioni)"""
+        if isinstance(arg, list):
+            return None
+        if isinstance(arg, Literal):
+            return arg
+        return self.iri(arg)
+    
+    def rdf_list(self, items):
+        """Costruisce una rdf:List con gli elementi indicati"""
+        head = f'{RDF}nil'
+        previous = None
+        for item in items:
+            node = self.new_bnode()
+            if previous is None:
+                head = node
+            else:
+                self.add(previous, f'{RDF}rest', node)
+            self.add(node, f'{RDF}first', item)
+            previous = node
+        if previous is not None:
+            self.add(previous, f'{RDF}rest', f'{RDF}nil')
+        return head
+    
+    def class_expression(self, arg):
+        """IRI della classe, nodo owl:unionOf oppure nodo anonimo per le altre espressioni"""
+        if not isinstance(arg, list):
+            return self.term(arg)
+        node = self.new_bnode()
+        if arg[0] == 'ObjectUnionOf':
+            self.add(node, f'{RDF}type', f'{OWL}Class')
+            self.add(node, f'{OWL}unionOf', self.rdf_list([self.class_expression(a) for a in arg[1:]]))
+        return node
+    
+    def data_range(self, arg):
+        """IRI del tipo di dato, nodo owl:oneOf oppure nodo anonimo per le altre espressioni"""
+        if not isinstance(arg, list):
+            return self.term(arg)
+        node = self.new_bnode()
+        if arg[0] == 'DataOneOf':
+            self.add(node, f'{RDF}type', f'{RDFS}Datatype')
+            self.add(node, f'{OWL}oneOf', self.rdf_list([self.term(a) for a in arg[1:]]))
+        return node
+    
+    def axiom(self, axiom):
+        """Registra le triple corrispondenti a un assioma (quelli non usati dal diagramma sono ignorati)"""
+        name = axiom[0]
+        # Le annotazioni dell'assioma precedono gli argomenti e non servono
+        args = [arg for arg in axiom[1:] if not (isinstance(arg, list) and arg[0] == 'Annotation')]
+        
+        if name == 'Declaration' and args and isinstance(args[0], list):
+            rdf_type = self.DECLARATION_TYPES.get(args[0][0])
+            if rdf_type and len(args[0]) > 1:
+                self.add(self.term(args[0][1]), f'{RDF}type', rdf_type)
+        elif name == 'SubClassOf' and len(args) == 2:
+            if not isinstance(args[0], list):
+                self.add(self.term(args[0]), f'{RDFS}subClassOf', self.class_expression(args[1]))
+        elif name == 'EquivalentClasses' and len(args) >= 2:
+            # Come nelle serializzazioni RDF, la prima classe è il soggetto
+            if not isinstance(args[0], list):
+                first = self.term(args[0])
+                for other in args[1:]:
+                    self.add(first, f'{OWL}equivalentClass', self.class_expression(other))
+        elif name == 'DatatypeDefinition' and len(args) == 2:
+            self.add(self.term(args[0]), f'{OWL}equivalentClass', self.data_range(args[1]))
+        elif name in ('ObjectPropertyDomain', 'DataPropertyDomain') and len(args) == 2:
+            self.add(self.term(args[0]), f'{RDFS}domain', self.class_expression(args[1]))
+        elif name == 'ObjectPropertyRange' and len(args) == 2:
+            self.add(self.term(args[0]), f'{RDFS}range', self.class_expression(args[1]))
+        elif name == 'DataPropertyRange' and len(args) == 2:
+            self.add(self.term(args[0]), f'{RDFS}range', self.data_range(args[1]))
+        elif name == 'AnnotationAssertion' and len(args) == 3:
+            if not isinstance(args[1], list) and not isinstance(args[2], list):
+                self.add(self.term(args[1]), self.term(args[0]), self.term(args[2]))
+        elif name == 'HasKey' and args and not isinstance(args[0], list):
+            keys = [self.term(key) for group in args[1:] if isinstance(group, list) for key in group[1:]]
+            self.add(self.term(args[0]), f'{OWL}hasKey', self.rdf_list(keys))
+
+def read_ofn(source):
+    """Costruisce l'OntologyModel da un file OWL Functional Syntax (.ofn), riga per riga"""
+    builder = TripleModelBuilder()
+    prefixes = {}
+    reader = OfnReader(builder, prefixes)
+    for axiom in parse_ofn(tokenize_ofn(iter_text_lines(source)), prefixes):
+        reader.axiom(axiom)
+    builder.namespaces.update(prefixes)
+    return builder.result()
+
+# Tipi XMI degli elementi letti dal front-end UML
+UML_CLASSIFIERS = frozenset({'uml:Class', 'uml:Interface', 'uml:Enumeration', 'uml:DataType', 'uml:PrimitiveType'})
+UML_PACKAGES = frozenset({'uml:Package', 'uml:Model', 'uml:Profile'})
+
+# Pacchetti di supporto che MagicDraw/Concept Modeler copia in ogni esportazione:
+# i loro elementi servono a risolvere i tipi ma non vengono disegnati
+UML_LIBRARY_PACKAGES = frozenset({'UML Standard Profile', 'Concept Modeling Support Library',
+                                  'Dublin Core Metadata', 'W3C Reference Models'})
+
+def href_name(href):
+    """Nome di un elemento esterno riferito con href (es. ...PrimitiveTypes.library.uml#String)"""
+    return href.rpartition('#')[2] or href
+
+def read_profile_types(path, fragment=''):
+    """Supertipi diretti delle stereotipie (EClass) definite nel package Ecore di un profilo.
+    
+    La lettura si ferma alla fine dell'elemento con xmi:id uguale a fragment: le
+    definizioni Ecore stanno in testa al file, il resto del profilo non serve.
+    """
+    names = {}
+    supertypes = {}
+    xmi_id = None
+    with open(path, 'rb') as f:
+        for event, elem in ET.iterparse(f, events=('start-ns', 'end')):
+            if event == 'start-ns':
+                if elem[0] == 'xmi':
+                    xmi_id = f'{{{elem[1]}}}id'
+                continue
+            if elem.tag == 'eClassifiers' and elem.get('name'):
+                names[elem.get(xmi_id)] = elem.get('name')
+                supertypes[elem.get('name')] = elem.get('eSuperTypes', '').split()
+                elem.clear()
+            elif fragment and elem.get(xmi_id) == fragment:
+                break
+    return {name: [names[href_name(ref)] for ref in refs if href_name(ref) in names]
+            for name, refs in supertypes.items()}
+
+class UmlProfiles:
+    """Profili applicati a un modello UML, letti solo quando una stereotipia li richiede.
+    
+    xsi:schemaLocation associa il namespace di ogni profilo al suo file; il file viene
+    aperto la prima volta che serve una stereotipia di quel namespace. Senza il file
+    (o per un input senza directory) ogni stereotipia vale solo per il proprio nome.
+    """
+    
+    def __init__(self, schema_location='', directory=None):
+        self.locations = {}
+        parts = schema_location.split()
+        for namespace, location in zip(parts[::2], parts[1::2]):
+            path, _, fragment = location.partition('#')
+            if path and directory is not None:
+                self.locations[namespace] = (os.path.join(directory, path), fragment)
+        self.supertypes = {}
+        self.loaded = []
+    
+    def types(self, namespace):
+        """Supertipi delle stereotipie di un namespace, leggendo il profilo alla prima richiesta"""
+        types = self.supertypes.get(namespace)
+        if types is None:
+            types = {}
+            location = self.locations.get(namespace)
+            if location is not None:
+                try:
+                    types = read_profile_types(*location)
+                    self.loaded.append(location[0])
+                except (OSError, ET.ParseError):
+                    pass
+            self.supertypes[namespace] = types
+        return types
+    
+    def ancestors(self, namespace, name):
+        """La stereotipia e tutte quelle da cui deriva"""
+        types = self.types(namespace)
+        result = {name}
+        pending = [name]
+        while pending:
+            for parent in types.get(pending.pop(), ()):
+                if parent not in result:
+                    result.add(parent)
+                    pending.append(parent)
+        return result
+
+class UmlModelReader:
+    """Raccoglie classi, enumerazioni, attributi e associazioni di un modello UML/XMI.
+    
+    Riceve gli eventi di iterparse e riduce ogni elemento a un record appena chiuso,
+    così il suo sottoalbero può essere liberato. I riferimenti per xmi:id vengono
+    risolti in result(), quando sono note anche le stereotipie applicate in fondo al file.
+    """
+    
+    def __init__(self, namespaces, profiles):
+        xmi = namespaces.get('xmi', 'http://www.omg.org/spec/XMI/20131001')
+        self.xmi_id = f'{{{xmi}}}id'
+        self.xmi_idref = f'{{{xmi}}}idref'
+        self.xmi_type = f'{{{xmi}}}type'
+        self.xmi_extension = f'{{{xmi}}}Extension'
+        self.namespaces = namespaces
+        self.profiles = profiles
+        self.uml = namespaces.get('uml')
+        
+        self.libraries = []  # per ogni pacchetto aperto, se è di supporto
+        self.classifiers = {}  # xmi:id -> record, nell'ordine del documento
+        self.associations = []
+        self.stereotypes = []  # (namespace, stereotipia, attributi)
+    
+    def reference(self, elem, name):
+        """Elemento riferito come attributo o figlio: xmi:id interno o nome dell'elemento esterno"""
+        value = elem.get(name)
+        if value is not None:
+            return value
+        child = elem.find(name)
+        if child is None:
+            return None
+        value = child.get(self.xmi_idref)
+        if value is not None:
+            return value
+        # MagicDraw riporta il percorso degli elementi di altri progetti (es. W3C Reference Models::XSD::date)
+        extension = child.find('.//referenceExtension')
+        if extension is not None and extension.get('referentPath'):
+            return extension.get('referentPath').rpartition('::')[2]
+        return href_name(child.get('href', '')) or None
+    
+    def references(self, elem, name):
+        """Elementi riferiti da un attributo con più xmi:id o da più figli con xmi:idref"""
+        refs = elem.get(name, '').split()
+        refs.extend(child.get(self.xmi_idref) for child in elem.findall(name) if child.get(self.xmi_idref))
+        return refs
+    
+    def start(self, elem):
+        """Tiene traccia dei pacchetti aperti"""
+        if elem.tag == 'packagedElement' and elem.get(self.xmi_type) in UML_PACKAGES:
+            inside = bool(self.libraries) and self.libraries[-1]
+            self.libraries.append(inside or elem.get('name') in UML_LIBRARY_PACKAGES)
+    
+    def end(self, elem, depth):
+        """Registra un elemento alla chiusura e lo libera"""
+        if elem.tag == 'packagedElement':
+            xmi_type = elem.get(self.xmi_type)
+            if xmi_type in UML_CLASSIFIERS:
+                self.classifier(elem, xmi_type)
+            elif xmi_type == 'uml:Association':
+                self.association(elem)
+            elif xmi_type in UML_PACKAGES:
+                self.libraries.pop()
+            elem.clear()
+        elif elem.tag == self.xmi_extension:
+            # Diagrammi e altri dati dello strumento; restano solo i percorsi dei riferimenti esterni
+            if elem.find('referenceExtension') is None:
+                elem.clear()
+        elif depth == 2 and elem.tag.startswith('{') and elem.tag[1:].partition('}')[0] != self.uml:
+            # Applicazione di una stereotipia (es. <Profilo:Stereotipia base_Class="..."/>)
+            if any(key.startswith('base_') for key in elem.attrib):
+                namespace, _, name = elem.tag[1:].partition('}')
+                self.stereotypes.append((namespace, name, dict(elem.attrib)))
+            elem.clear()
+    
+    def classifier(self, elem, xmi_type):
+        record = {
+            'type': xmi_type,
+            'name': elem.get('name') or '',
+            'library': bool(self.libraries) and self.libraries[-1],
+            'generalizations': [],
+            'attributes': [],
+            'literals': [],
+            'comments': [],
+        }
+        for child in elem:
+            tag = child.tag
+            if tag == 'generalization':
+                general = self.reference(child, 'general')
+                if general:
+                    record['generalizations'].append((child.get(self.xmi_id), general))
+            elif tag == 'ownedAttribute':
+                record['attributes'].append((child.get(self.xmi_id), child.get('name') or '',
+                                             self.reference(child, 'type'), self.reference(child, 'association')))
+            elif tag == 'ownedLiteral' and child.get('name'):
+                record['literals'].append(child.get('name'))
+            elif tag == 'ownedComment':
+                body = child.get('body')
+                if body is None:
+                    body_elem = child.find('body')
+                    body = body_elem.text if body_elem is not None else None
+                if body and body.strip():
+                    record['comments'].append((child.get(self.xmi_id), body))
+        self.classifiers[elem.get(self.xmi_id)] = record
+    
+    def association(self, elem):
+        ends = {child.get(self.xmi_id): (child.get('name') or '', self.reference(child, 'type'))
+                for child in elem if child.tag == 'ownedEnd'}
+        self.associations.append((elem.get('name') or '', self.references(elem, 'memberEnd'), ends,
+                                  self.references(elem, 'navigableOwnedEnd'),
+                                  bool(self.libraries) and self.libraries[-1]))
+    
+    def result(self):
+        """Risolve riferimenti e stereotipie e costruisce l'OntologyModel"""
+        classifiers = self.classifiers
+        
+        # Elementi a cui può servire una stereotipia: i profili vengono letti solo per questi
+        targets = set(classifiers)
+        for record in classifiers.values():
+            targets.update(gen_id for gen_id, _ in record['generalizations'])
+            targets.update(attr[0] for attr in record['attributes'])
+            targets.update(comment_id for comment_id, _ in record['comments'])
+        
+        iris = {}
+        equivalences = set()
+        annotation_names = {}
+        comment_properties = {}
+        for namespace, name, attrib in self.stereotypes:
+            base = next((value for key, value in attrib.items() if key.startswith('base_')), None)
+            if base not in targets:
+                continue
+            # MagicDraw scrive i nomi delle stereotipie con '_' (Equivalent_Class)
+            kinds = {kind.replace('_', '') for kind in self.profiles.ancestors(namespace, name)}
+            if 'Resource' in kinds and attrib.get('IRI'):
+                iris[base] = attrib['IRI']
+            if 'AnnotationProperty' in kinds:
+                annotation_names[attrib.get(self.xmi_id)] = attrib.get('label') or get_local_name(attrib.get('IRI'))
+            if 'EquivalentClass' in kinds:
+                equivalences.add(base)
+            if attrib.get('annotationProperty'):
+                comment_properties[base] = attrib['annotationProperty']
+        
+        def name_of(ref):
+            """Nome nel diagramma: nome locale dell'IRI se noto, altrimenti il nome UML"""
+            if ref in iris:
+                return get_local_name(iris[ref])
+            record = classifiers.get(ref)
+            return record['name'] if record is not None else ref
+        
+        model = OntologyModel(self.namespaces)
+        model.element_counts = {'classifiers': len(classifiers), 'associations': len(self.associations),
+                                'stereotypes': len(self.stereotypes), 'profiles_read': len(self.profiles.loaded)}
+        
+        end_types = {}
+        equivalent_pairs = []
+        for ref, record in classifiers.items():
+            for attr_id, _, type_ref, _ in record['attributes']:
+                end_types[attr_id] = (ref, type_ref)
+            name = name_of(ref)
+            if record['library'] or not name:
+                # Le classi anonime (es. unioni) non hanno un nome da disegnare
+                continue
+            
+            annotations = tuple((annotation_names.get(comment_properties.get(comment_id), 'comment'), body)
+                                for comment_id, body in record['comments'])
+            if record['type'] == 'uml:Enumeration':
+                comment = next((body for key, body in annotations if key == 'comment'), '')
+                model.add_enumeration(Enumeration(name, record['literals'], comment, iris.get(ref)))
+            elif record['type'] in ('uml:Class', 'uml:Interface'):
+                subclass_of = []
+                for gen_id, general in record['generalizations']:
+                    if gen_id in equivalences:
+                        equivalent_pairs.append((name, name_of(general)))
+                    else:
+                        subclass_of.append(intern_name(name_of(general)))
+                model.add_class(OntClass(name, iris.get(ref), annotations, subclass_of))
+            else:
+                continue
+            
+            for attr_id, attr_name, type_ref, association in record['attributes']:
+                self.add_end(model, name, attr_id, attr_name, type_ref, iris, name_of)
+        
+        # Estremi navigabili posseduti dall'associazione: il dominio è il tipo dell'altro estremo
+        for assoc_name, members, ends, navigable, library in self.associations:
+            if library:
+                continue
+            for end_id in navigable:
+                if end_id not in ends:
+                    continue
+                end_name, type_ref = ends[end_id]
+                other = next((member for member in members if member != end_id), None)
+                domain = ends[other][1] if other in ends else end_types.get(other, (None, None))[1]
+                if domain is not None:
+                    self.add_end(model, name_of(domain), end_id, end_name or assoc_name, type_ref, iris, name_of)
+        
+        for name, other in equivalent_pairs:
+            model.add_equivalence_axiom(name, other)
+            model.add_equivalence_axiom(other, name)
+        return model
+    
+    def add_end(self, model, domain, attr_id, attr_name, type_ref, iris, name_of):
+        """Aggiunge un attributo o un estremo di associazione come proprietà del modello"""
+        if type_ref is None:
+            return
+        type_name = name_of(type_ref) or None
+        record = self.classifiers.get(type_ref)
+        if record is not None and record['type'] in ('uml:Class', 'uml:Interface'):
+            prop_type = 'ObjectProperty'
+        else:
+            prop_type = 'DataProperty'
+        if attr_id in iris:
+            name = get_local_name(iris[attr_id])
+        else:
+            # Estremo senza nome: per convenzione UML il nome del tipo in minuscolo
+            name = attr_name or (type_name[:1].lower() + type_name[1:] if type_name else '')
+        if not name:
+            return
+        model.add_property(OntProperty(name, prop_type, domain, type_name, iri=iris.get(attr_id),
+                                       range_iri=iris.get(type_ref)))
+
+def read_uml(source):
+    """Costruisce l'OntologyModel da un modello UML/XMI di Eclipse (.uml) con iterparse.
+    
+    Gli elementi vengono liberati appena letti; i profili indicati in xsi:schemaLocation
+    vengono cercati accanto al file e letti solo per le stereotipie effettivamente usate.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        directory = os.path.dirname(os.path.abspath(source))
+    else:
+        # Solo per i file veri: i membri di un archivio hanno un nome ma non una directory
+        name = getattr(source, 'name', None)
+        directory = os.path.dirname(os.path.abspath(name)) if isinstance(name, str) and os.path.isfile(name) else None
+    
+    declared = {}
+    reader = None
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(source, events=('start-ns', 'start', 'end')):
+        if event == 'start-ns':
+            prefix, uri = elem
+            declared.setdefault(prefix, uri)
+            continue
+        
+        if event == 'start':
+            if root is None:
+                root = elem
+                xsi = declared.get('xsi', 'http://www.w3.org/2001/XMLSchema-instance')
+                profiles = UmlProfiles(elem.get(f'{{{xsi}}}schemaLocation', ''), directory)
+                reader = UmlModelReader(declared, profiles)
+            depth += 1
+            reader.start(elem)
+        else:
+            reader.end(elem, depth)
+            depth -= 1
+            if depth == 1:
+                root.clear()
+    
+    if reader is None:
+        raise ValueError("Documento XMI vuoto")
+    return reader.result()
+
+# Membro di un progetto MagicDraw (.mdzip) con il modello UML in XMI; gli altri
+# contengono diagrammi, opzioni e riferimenti ai progetti usati
+MDZIP_MODEL_MEMBER = 'com.nomagic.magicdraw.uml_model.model'
+
+def read_mdzip(source):
+    """Costruisce l'OntologyModel da un progetto MagicDraw (.mdzip) senza estrarlo.
+    
+    Dall'archivio viene letto solo il membro con il modello, decompresso man mano
+    che il front-end UML lo consuma: niente file temporanei né altri membri.
+    """
+    with zipfile.ZipFile(source) as archive:
+        try:
+            info = archive.getinfo(MDZIP_MODEL_MEMBER)
+        except KeyError:
+            raise ValueError(f"Archivio MagicDraw senza modello UML ({MDZIP_MODEL_MEMBER})") from None
+        with archive.open(info) as member:
+            return read_uml(member)
+
+# Front-end di input scelti in base all'estensione del file (RDF/XML per le altre)
+INPUT_READERS = {
+    '.ttl': read_turtle,
+    '.jsonld': read_jsonld,
+    '.json': read_jsonld,
+    '.ofn': read_ofn,
+    '.uml': read_uml,
+    '.xmi': read_uml,
+    '.mdzip': read_mdzip,
+}
+
+# Front-end per nome del formato, per gli input senza estensione
+FORMAT_READERS = {
+    'rdfxml': stream_ontology,
+    'turtle': read_turtle,
+    'jsonld': read_jsonld,
+    'ofn': read_ofn,
+    'xmi': read_uml,
+    'mdzip': read_mdzip,
+}
+
+# Inizio di un documento XML: dichiarazione, commento/DOCTYPE o tag (non un IRI Turtle)
+XML_START = re.compile(r'<[?!]|<[A-Za-z_][\w.-]*(?::[\w.-]+)?[\s/>]')
+
+def sniff_format(data):
+    """Riconosce il formato di un documento (bytes o str) dai primi caratteri"""
+    head = data[:4096]
+    if isinstance(head, (bytes, bytearray)):
+        if head.startswith(b'PK\x03\x04'):
+            # Archivio zip: progetto MagicDraw
+            return 'mdzip'
+        head = bytes(head).decode('utf-8', 'ignore')
+    head = head.lstrip('\ufeff \t\r\n')
+    # Salta i commenti iniziali di Turtle e Functional Syntax
+    while head.startswith('#'):
+        head = head.partition('\n')[2].lstrip()
+    
+    if XML_START.match(head):
+        # XMI (UML) dichiara il proprio namespace già nell'elemento radice
+        return 'xmi' if re.search(r'xmlns:xmi=|omg\.org/spec/XMI', head) else 'rdfxml'
+    if head.startswith(('{', '[')):
+        return 'jsonld'
+    if re.match(r'(?:Prefix|Ontology)\s*\(', head):
+        return 'ofn'
+    return 'turtle'
+
+def format_reader(format, data=None):
+    """Front-end per un nome di formato o un'estensione; senza formato lo riconosce da data"""
+    if format is None:
+        format = sniff_format(data)
+    reader = FORMAT_READERS.get(format) or INPUT_READERS.get('.' + format.lstrip('.').lower())
+    if reader is None:
+        raise ValueError(f"Formato di input non supportato: {format!r}")
+    return reader
+
+# Versione dell'estrattore: va incrementata quando cambia il modello prodotto,
+# così le voci di cache create dalle versioni precedenti non vengono più usate
+EXTRACTOR_VERSION = '17.15'
+
+def input_key(input_file, format=None):
+    """Hash del contenuto di un file di input, del suo formato e di EXTRACTOR_VERSION"""
+    format = format or os.path.splitext(input_file)[1].lower()
+    digest = hashlib.sha256(f'{EXTRACTOR_VERSION}\0{format}\0'.encode())
+    with open(input_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ModelCache:
+    """Cache su disco dei modelli estratti, indicizzata per contenuto del file di input.
+    
+    La chiave è l'hash dei byte dell'input, della sua estensione e di EXTRACTOR_VERSION;
+    una voce viene letta solo quando la chiave corrisponde. Quando la dimensione totale
+    supera max_bytes vengono eliminate le voci usate meno di recente. Le voci sono file
+    pickle: usare solo directory di cui ci si fida.
+    """
+    
+    SUFFIX = '.model.pickle'
+    
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def key(self, input_file, format=None):
+        """Calcola la chiave leggendo il file a blocchi"""
+        return input_key(input_file, format)
+    
+    def path(self, key):
+        return os.path.join(self.directory, key + self.SUFFIX)
+    
+    def get(self, key):
+        """Restituisce il modello salvato con questa chiave, o None"""
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                model = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Voce danneggiata o scritta da una versione incompatibile: si riestrae
+            self.misses += 1
+            self.discard(path)
+            return None
+        
+        # Segna la voce come usata di recente
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return model
+    
+    def put(self, key, model):
+        """Salva il modello in modo atomico e libera spazio se necessario"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            self.discard(tmp_path)
+            raise
+        self.evict()
+    
+    def evict(self):
+        """Elimina le voci più vecchie finché la cache non rientra in max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self.discard(path)
+            total -= size
+    
+    @staticmethod
+    def discard(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def load_ontology(input_file, cache=None, format=None):
+    """Costruisce l'OntologyModel scegliendo il front-end in base all'estensione del file.
+    
+    Oltre a un percorso, input_file può essere un documento in bytes, un oggetto
+    file-like, un albero ElementTree già costruito, un documento JSON-LD già
+    decodificato (dict o list) o un OntologyModel, restituito così com'è. format
+    ('rdfxml', 'turtle', 'jsonld', 'ofn', 'xmi', 'mdzip' o un'estensione) indica il front-end; se
+    manca viene scelto dall'estensione o riconosciuto dal contenuto. Con una
+    ModelCache, i file già estratti vengono caricati dalla cache.
+    """
+    if isinstance(input_file, OntologyModel):
+        return input_file
+    if isinstance(input_file, (dict, list)):
+        return read_jsonld(input_file)
+    if isinstance(input_file, ET.ElementTree):
+        input_file = input_file.getroot()
+    if isinstance(input_file, ET.Element):
+        return extract_ontology(input_file, parse_namespaces(input_file))
+    
+    if isinstance(input_file, (bytes, bytearray, memoryview)):
+        data = bytes(input_file)
+        return format_reader(format, data)(io.BytesIO(data))
+    
+    if hasattr(input_file, 'read'):
+        if format is None:
+            peek = getattr(input_file, 'peek', None)
+            head = peek(4096) if peek is not None else None
+            if not head:
+                # Senza peek il contenuto va letto per riconoscerne il formato
+                data = input_file.read()
+                stream = io.BytesIO(data) if isinstance(data, bytes) else io.StringIO(data)
+                return format_reader(None, data)(stream)
+            return format_reader(None, head)(input_file)
+        return format_reader(format)(input_file)
+    
+    key = None
+    if cache is not None and isinstance(input_file, (str, os.PathLike)):
+        input_file = os.fspath(input_file)
+        key = cache.key(input_file, format)
+        model = cache.get(key)
+        if model is not None:
+            return model
+    
+    if format is not None:
+        reader = format_reader(format)
+    else:
+        extension = os.path.splitext(str(input_file))[1].lower()
+        reader = INPUT_READERS.get(extension, stream_ontology)
+    model = reader(input_file)
+    
+    if key is not None:
+        cache.put(key, model)
+    return model
+
+def extract_enum_references(properties, enumerations=None):
+    """Estrae i riferimenti alle enumerazioni dalle proprietà.
+    
+    Con un EnumerationIndex il range viene collegato all'enumerazione definita con lo
+    stesso IRI; senza, vale il criterio storico dei nomi che terminano con 'Type'.
+    """
+    enum_references = []
+    
+    for prop in properties:
+        if prop.type == 'DataProperty' and prop.domain and prop.range:
+            if enumerations is None:
+                # Tipicamente i nomi delle enumerazioni terminano con 'Type'
+                if prop.range.endswith('Type'):
+                    enum_references.append(Relation(prop.domain, prop.range, prop.name, '-->'))
+            elif prop.domain != "Unknown":
+                enum = enumerations.bind(prop)
+                if enum is not None:
+                    enum_references.append(Relation(prop.domain, enum.name, prop.name, '-->'))
+    
+    return enum_references
+
+def iter_relations(classes, properties):
+    """Genera le relazioni tra le classi basate sulle proprietà oggetto, senza duplicati"""
+    # Coppie di classi equivalenti già emesse
+    # (se A equivale a B, le classi riportano sia A--B che B--A)
+    equiv_pairs = set()
+    
+    # Le relazioni provengono dalle ObjectProperty con dominio e range specificati
+    for prop in properties:
+        if prop.type == 'ObjectProperty' and prop.domain and prop.range:
+            # Non includere relazioni con un'estremità "Unknown"
+            if prop.domain != "Unknown" and prop.range != "Unknown":
+                yield Relation(prop.domain, prop.range, prop.name, '-->')
+    
+    # Aggiungi anche le relazioni di sottoclasse
+    for cls in classes:
+        for superclass in cls.subclass_of:
+            # Verifica che non sia None, vuoto o "Unknown"
+            if superclass and superclass != "Unknown" and cls.name != "Unknown":
+                yield Relation(superclass, cls.name, 'subClassOf', '<|--')
+        
+        # Aggiungi le relazioni di equivalenza (linea punteggiata)
+        for equiv_class in cls.equivalent_to:
+            if equiv_class and equiv_class != "Unknown":
+                # Ordina i nomi per creare una chiave univoca indipendente dall'ordine
+                pair = tuple(sorted([cls.name, equiv_class]))
+                if pair not in equiv_pairs and "Unknown" not in pair:
+                    equiv_pairs.add(pair)
+                    yield Relation(cls.name, equiv_class, 'equivalentTo', '..')
+
+def extract_relations(classes, properties):
+    """Estrae le relazioni tra le classi basate sulle proprietà oggetto"""
+    return list(iter_relations(classes, properties))
+
+# Intestazione e legenda del diagramma
+PLANTUML_HEADER = ('@startuml\n\n'
+                   '!theme vibrant\n\n'
+                   'title EU Cancer Ontology Model\n\n'
+                   'legend\n'
+                   '  |= Tipo di relazione |= Significato |\n'
+                   '  | A <|-- B | B è sottoclasse di A |\n'
+                   '  | A --> B | A ha una relazione con B |\n'
+                   '  | A .. B : equivalentTo | A è equivalente a B |\n'
+                   '  | A --> B : type | A utilizza l\'enumerazione B |\n'
+                   'endlegend\n\n')
+
+def group_attributes(properties):
+    """Raggruppa le proprietà dati per classe di dominio, come coppie (tipo, nome)"""
+    class_attributes = {}
+    for prop in properties:
+        if prop.type == 'DataProperty' and prop.domain and prop.domain != "Unknown":
+            class_attributes.setdefault(prop.domain, []).append((prop.range or 'String', prop.name))
+    return class_attributes
+
+# Numero massimo di valori mostrati per enumerazione (gli altri vengono riassunti)
+ENUM_VALUE_LIMIT = 50
+
+def enum_fragment(enum, limit=ENUM_VALUE_LIMIT):
+    """Blocco PlantUML di un'enumerazione; oltre limit valori (0 per tutti) mostra solo il conteggio dei restanti"""
+    lines = [f'enum "{enum.name}" {{\n']
+    
+    # Aggiungi i valori dell'enumerazione
+    values, omitted = shown_values(enum, limit)
+    lines.extend(f'  {value}\n' for value in values)
+    if omitted:
+        lines.append(f'  .. altri {omitted} valori ..\n')
+    
+    # Aggiungi commento se presente
+    if enum.comment:
+        comment = enum.comment
+        if len(comment) > 50:
+            comment = comment[:47] + '...'
+        lines.append(f'\n  .. comment ..\n  {comment}\n')
+    
+    lines.append('}\n\n')
+    return ''.join(lines)
+
+def class_fragment(cls, attributes):
+    """Blocco PlantUML di una classe con i suoi attributi (coppie (tipo, nome))"""
+    lines = [f'class "{cls.name}" {{\n']
+    
+    # Aggiungi attributi (proprietà dati)
+    for attr_type, attr_name in attributes:
+        lines.append(f'  +{attr_type} {attr_name}\n')
+    
+    # Aggiungi una riga vuota se ci sono sia attributi che annotazioni
+    if attributes and cls.annotations:
+        lines.append('\n')
+    
+    # Aggiungi annotazioni come note
+    for prop_name, value in cls.annotations:
+        # Pulisci il valore dell'annotazione per il formato PlantUML
+        if value and len(value) > 50:
+            value = value[:47] + '...'
+        lines.append(f'  .. {prop_name} ..\n  {value}\n')
+    
+    lines.append('}\n\n')
+    return ''.join(lines)
+
+def iter_relation_lines(relations, enum_references, enum_names):
+    """Righe PlantUML delle relazioni e dei riferimenti alle enumerazioni esistenti"""
+    for relation in relations:
+        if relation.source and relation.target:
+            if relation.type == '<|--':
+                # Relazione di ereditarietà
+                yield f'"{relation.source}" {relation.type} "{relation.target}"\n'
+            elif relation.name == 'equivalentTo':
+                # Relazione di equivalenza con stile specifico
+                yield f'"{relation.source}" .. "{relation.target}" : {relation.name}\n'
+            else:
+                # Relazione normale
+                yield f'"{relation.source}" {relation.type} "{relation.target}" : {relation.name}\n'
+    
+    # Aggiungi relazioni con le enumerazioni, solo se l'enumerazione esiste
+    for ref in enum_references:
+        if ref.target in enum_names:
+            yield f'"{ref.source}" --> "{ref.target}" : {ref.name}\n'
+
+def iter_plantuml(classes, properties, relations, enumerations, enum_references, stubs=(),
+                  enum_limit=ENUM_VALUE_LIMIT, attributes=None):
+    """Genera il diagramma PlantUML dall'ontologia un blocco alla volta.
+    
+    relations ed enum_references possono essere generatori: vengono consumati solo
+    dopo che enumerazioni e classi sono già state emesse. stubs sono i nomi delle
+    classi disegnate in altri diagrammi e qui solo richiamate dalle relazioni;
+    enum_limit è il numero massimo di valori mostrati per enumerazione. attributes,
+    se indicato, sostituisce group_attributes(properties): basta che abbia get(nome, default).
+    """
+    yield PLANTUML_HEADER
+    
+    # Aggiungi le definizioni delle enumerazioni, ricordandone i nomi
+    enum_names = set()
+    for enum in enumerations:
+        enum_names.add(enum.name)
+        yield enum_fragment(enum, enum_limit)
+    
+    # Aggiungi classi con i loro attributi
+    class_attributes = group_attributes(properties) if attributes is None else attributes
+    for cls in classes:
+        yield class_fragment(cls, class_attributes.get(cls.name, ()))
+    
+    # Classi di altre parti del diagramma
+    for name in stubs:
+        yield f'class "{name}" <<external>>\n'
+    if stubs:
+        yield '\n'
+    
+    # Aggiungi relazioni
+    yield from iter_relation_lines(relations, enum_references, enum_names)
+    
+    yield '@enduml'
+
+def write_plantuml(sink, classes, properties, relations, enumerations, enum_references, buffer_size=64 * 1024,
+                   stubs=(), enum_limit=ENUM_VALUE_LIMIT, attributes=None):
+    """Scrive il diagramma PlantUML su un oggetto file-like (file, sys.stdout, socket.makefile('w')).
+    
+    I blocchi vengono accumulati fino a buffer_size caratteri prima di ogni write,
+    così la memoria usata non dipende dalla dimensione del diagramma.
+    """
+    buffer = []
+    size = 0
+    for chunk in iter_plantuml(classes, properties, relations, enumerations, enum_references, stubs, enum_limit,
+                               attributes):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            sink.write(''.join(buffer))
+            buffer.clear()
+            size = 0
+    
+    if buffer:
+        sink.write(''.join(buffer))
+    if hasattr(sink, 'flush'):
+        sink.flush()
+
+def generate_plantuml(classes, properties, relations, enumerations, enum_references):
+    """Genera il diagramma PlantUML dall'ontologia"""
+    return ''.join(iter_plantuml(classes, properties, relations, enumerations, enum_references))
+
+def entity_key(entity):
+    """Chiave con cui un'entità viene confrontata tra due versioni del modello"""
+    if isinstance(entity, OntProperty):
+        # Le ObjectProperty con più domini hanno una copia per dominio
+        return ('property', entity.type, entity.name, entity.domain)
+    if isinstance(entity, Enumeration):
+        return ('enum', entity.name)
+    return ('class', entity.name)
+
+def entity_signature(entity):
+    """Contenuto di un'entità in forma confrontabile"""
+    return tuple(tuple(value) if isinstance(value, list) else value
+                 for value in (getattr(entity, slot) for slot in entity.__slots__))
+
+def diff_models(old, new):
+    """Confronta due modelli per classe, proprietà ed enumerazione.
+    
+    Restituisce una lista di (operazione, entità) con operazione '+', '-' o '~';
+    per le entità rimosse viene riportata la versione precedente.
+    """
+    def index(model):
+        entities = {}
+        for entity in (*model.classes, *model.properties, *model.enumerations):
+            entities[entity_key(entity)] = entity
+        return entities
+    
+    before = index(old) if old is not None else {}
+    after = index(new)
+    changes = []
+    for key, entity in after.items():
+        previous = before.get(key)
+        if previous is None:
+            changes.append(('+', entity))
+        elif entity_signature(previous) != entity_signature(entity):
+            changes.append(('~', entity))
+    for key, entity in before.items():
+        if key not in after:
+            changes.append(('-', entity))
+    return changes
+
+def describe_change(operation, entity):
+    """Descrizione di una modifica per il resoconto della modalità watch"""
+    key = entity_key(entity)
+    if key[0] == 'property':
+        return f'{operation} {entity.type} {entity.name} ({entity.domain or "Unknown"})'
+    return f'{operation} {key[0]} {entity.name}'
+
+class DiagramState:
+    """Ultimo modello convertito e blocchi PlantUML già generati, per la rigenerazione incrementale.
+    
+    A ogni update vengono rigenerati solo i blocchi delle classi e delle enumerazioni
+    toccate dalle modifiche; le righe delle relazioni vengono sempre ricalcolate.
+    enum_limit è il numero massimo di valori mostrati per enumerazione.
+    """
+    
+    def __init__(self, enum_limit=ENUM_VALUE_LIMIT):
+        self.model = None
+        self.text = None
+        self.fragments = {}
+        self.enum_limit = enum_limit
+    
+    def update(self, model):
+        """Applica un nuovo modello e restituisce (modifiche, testo del diagramma)"""
+        changes = diff_models(self.model, model)
+        class_attributes = group_attributes(model.properties)
+        
+        # Blocchi da rigenerare: entità modificate e classi di dominio degli attributi
+        stale = set()
+        for operation, entity in changes:
+            key = entity_key(entity)
+            if key[0] == 'property':
+                if entity.type == 'DataProperty' and entity.domain:
+                    stale.add(('class', entity.domain))
+            else:
+                stale.add(key)
+        for key in stale:
+            self.fragments.pop(key, None)
+        
+        parts = [PLANTUML_HEADER]
+        enum_names = set()
+        for enum in model.enumerations:
+            enum_names.add(enum.name)
+            key = ('enum', enum.name)
+            if key not in self.fragments:
+                self.fragments[key] = enum_fragment(enum, self.enum_limit)
+            parts.append(self.fragments[key])
+        
+        for cls in model.classes:
+            key = ('class', cls.name)
+            if key not in self.fragments:
+                self.fragments[key] = class_fragment(cls, class_attributes.get(cls.name, ()))
+            parts.append(self.fragments[key])
+        
+        # Scarta i blocchi delle entità non più presenti
+        live = {('enum', name) for name in enum_names}
+        live.update(('class', cls.name) for cls in model.classes)
+        for key in set(self.fragments) - live:
+            del self.fragments[key]
+        
+        relations = iter_relations(model.classes, model.properties)
+        enum_references = extract_enum_references(model.properties, model.enumerations_index())
+        parts.extend(iter_relation_lines(relations, enum_references, enum_names))
+        parts.append('@enduml')
+        
+        self.model = model
+        return changes, ''.join(parts)
+
+def write_if_changed(path, text, previous):
+    """Riscrive il file (in modo atomico) solo se il contenuto è cambiato"""
+    if text == previous and os.path.exists(path):
+        return False
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        ModelCache.discard(tmp_path)
+        raise
+    return True
+
+def watch_owl2plantuml(input_file, output_file, interval=0.5, cache=None, max_updates=None,
+                       enum_limit=ENUM_VALUE_LIMIT):
+    """Rigenera il diagramma ogni volta che il file di input cambia.
+    
+    Il file viene controllato ogni interval secondi; a ogni modifica vengono riportate
+    le entità aggiunte (+), rimosse (-) o modificate (~) e l'output viene riscritto
+    solo se il diagramma è cambiato. Un input non valido (ad esempio durante un
+    salvataggio parziale) viene segnalato e la sorveglianza continua.
+    """
+    state = DiagramState(enum_limit)
+    last_seen = None
+    updates = 0
+    
+    while max_updates is None or updates < max_updates:
+        try:
+            stat = os.stat(input_file)
+            seen = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            # L'editor può sostituire il file con una rinomina
+            seen = None
+        
+        if seen is not None and seen != last_seen:
+            last_seen = seen
+            updates += 1
+            try:
+                model = load_ontology(input_file, cache)
+            except Exception as e:
+                print(f"Errore durante la lettura di {input_file}: {e}", file=sys.stderr)
+            else:
+                first = state.model is None
+                changes, text = state.update(model)
+                written = write_if_changed(output_file, text, state.text)
+                state.text = text
+                if first:
+                    print(f"File PlantUML generato: {output_file}")
+                else:
+                    for operation, entity in changes:
+                        print(describe_change(operation, entity))
+                    if written:
+                        print(f"File PlantUML aggiornato: {output_file}")
+                    else:
+                        print("Nessuna modifica al diagramma")
+                sys.stdout.flush()
+        
+        if max_updates is None or updates < max_updates:
+            time.sleep(interval)
+    return state
+
+def write_model_plantuml(sink, model, class_names=None, external=False, enum_names=None,
+                         enum_limit=ENUM_VALUE_LIMIT):
+    """Scrive il diagramma di un modello, eventualmente limitato alle classi indicate.
+    
+    Con class_names vengono tenute solo le classi elencate, le loro proprietà, le
+    relazioni tra di esse e le enumerazioni che usano (solo quelle in enum_names, se
+    indicato). Con external vengono tenute anche le relazioni verso le altre classi,
+    disegnate come stub <<external>>. Per enum_limit vedi iter_plantuml.
+    """
+    classes = model.classes
+    properties = model.properties
+    enumerations = model.enumerations
+    index = model.enumerations_index()
+    
+    if class_names is None:
+        relations = iter_relations(classes, properties)
+        write_plantuml(sink, classes, properties, relations, enumerations,
+                       extract_enum_references(properties, index), enum_limit=enum_limit)
+        return
+    
+    keep = set(class_names)
+    if external:
+        properties = [prop for prop in properties if prop.domain in keep
+                      or (prop.type == 'ObjectProperty' and prop.range in keep)]
+        relations = [relation for relation in iter_relations(classes, properties)
+                     if relation.source in keep or relation.target in keep]
+        stubs = list(dict.fromkeys(name for relation in relations
+                                   for name in (relation.source, relation.target) if name not in keep))
+    else:
+        properties = [prop for prop in properties if prop.domain in keep
+                      and (prop.type != 'ObjectProperty' or prop.range in keep)]
+        relations = (relation for relation in iter_relations(classes, properties)
+                     if relation.source in keep and relation.target in keep)
+        stubs = ()
+    classes = [cls for cls in classes if cls.name in keep]
+    
+    enum_references = extract_enum_references([prop for prop in properties if prop.domain in keep], index)
+    used = {ref.target for ref in enum_references}
+    if enum_names is not None:
+        used.intersection_update(enum_names)
+    enumerations = [enum for enum in enumerations if enum.name in used]
+    write_plantuml(sink, classes, properties, relations, enumerations, enum_references,
+                   stubs=stubs, enum_limit=enum_limit)
+
+class SpilledRecords:
+    """Record di un bucket di StreamingExtractor conservati in una tabella temporanea SQLite.
+    
+    Sostituisce la lista del bucket (append, assegnazione per posizione, len e
+    iterazione in ordine) tenendo in memoria un solo record alla volta. I None,
+    come le posizioni riservate da start(), non vengono scritti: le posizioni
+    mancanti valgono None.
+    """
+    
+    def __init__(self, connection, bucket):
+        self.connection = connection
+        self.bucket = bucket
+        self.length = 0
+    
+    def append(self, record):
+        self.length += 1
+        self[self.length - 1] = record
+    
+    def __setitem__(self, index, record):
+        if record is not None:
+            self.connection.execute('INSERT OR REPLACE INTO temp.records (bucket, position, record) VALUES (?, ?, ?)',
+                                    (self.bucket, index, pickle.dumps(record, pickle.HIGHEST_PROTOCOL)))
+    
+    def __len__(self):
+        return self.length
+    
+    def count(self, value):
+        """Come list.count, per None: le posizioni che non sono state scritte"""
+        if value is not None:
+            raise ValueError("SpilledRecords conta solo i None")
+        cursor = self.connection.execute('SELECT COUNT(*) FROM temp.records WHERE bucket = ?', (self.bucket,))
+        return self.length - cursor.fetchone()[0]
+    
+    def __iter__(self):
+        cursor = self.connection.execute('SELECT position, record FROM temp.records WHERE bucket = ? ORDER BY position',
+                                         (self.bucket,))
+        expected = 0
+        for position, record in cursor:
+            yield from [None] * (position - expected)
+            yield pickle.loads(record)
+            expected = position + 1
+        yield from [None] * (self.length - expected)
+
+class StoreExtractor(StreamingExtractor):
+    """StreamingExtractor a memoria limitata: i record finiscono in SQLite e il risultato nel ModelStore.
+    
+    Restano in memoria solo gli statement reificati (StatementIndex), che servono a
+    result() per le relazioni in formato RDF/RDFS.
+    """
+    
+    def __init__(self, namespaces, store):
+        super().__init__(namespaces)
+        self.store = store
+        store.connection.execute('CREATE TEMP TABLE IF NOT EXISTS records (bucket TEXT, position INTEGER, record BLOB, '
+                                 'PRIMARY KEY (bucket, position)) WITHOUT ROWID')
+        self.records = {bucket: SpilledRecords(store.connection, bucket) for bucket in self.records}
+    
+    def result(self, model=None):
+        """Scrive il modello nel ModelStore e restituisce lo StoreModel usato"""
+        model = super().result(model if model is not None else StoreModel(self.store, self.namespaces))
+        self.store.connection.execute('DROP TABLE temp.records')
+        return model
+
+class StoreModel:
+    """Destinazione di StreamingExtractor.result che scrive nel ModelStore invece che in memoria.
+    
+    Applica le regole di OntologyModel (classi senza duplicati per nome, assiomi
+    senza ripetizioni, dominio e range sulla prima proprietà con quel nome)
+    verificandole con query sugli indici del database.
+    """
+    
+    def __init__(self, store, namespaces=None):
+        self.store = store
+        self.connection = store.connection
+        self.namespaces = namespaces or {}
+        self.statements = StatementIndex()
+        self.element_counts = {}
+    
+    def add_class(self, class_info):
+        """Aggiunge una classe se non ne esiste già una con lo stesso nome"""
+        cursor = self.connection.execute('INSERT OR IGNORE INTO classes (name, iri, annotations) VALUES (?, ?, ?)',
+                                         (class_info.name, class_info.iri, json.dumps(class_info.annotations)))
+        if not cursor.rowcount:
+            return False
+        
+        class_id = cursor.lastrowid
+        self.connection.executemany('INSERT INTO subclass_of (class_id, target) VALUES (?, ?)',
+                                    [(class_id, super_cls) for super_cls in class_info.subclass_of])
+        self.connection.executemany('INSERT INTO equivalent_to (class_id, target) VALUES (?, ?)',
+                                    [(class_id, equiv_name) for equiv_name in class_info.equivalent_to])
+        return True
+    
+    def upsert_class(self, name):
+        """Chiave della classe indicata, creandola se non esiste"""
+        row = self.connection.execute('SELECT id FROM classes WHERE name = ?', (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        return self.connection.execute("INSERT INTO classes (name, annotations) VALUES (?, '[]')",
+                                       (intern_name(name),)).lastrowid
+    
+    def add_axiom(self, table, class_name, target):
+        """Aggiunge a class_name l'assioma di table (subclass_of o equivalent_to) se manca"""
+        class_id = self.upsert_class(class_name)
+        target = intern_name(target)
+        row = self.connection.execute(f'SELECT 1 FROM {table} WHERE class_id = ? AND target IS ?',
+                                      (class_id, target)).fetchone()
+        if row is None:
+            self.connection.execute(f'INSERT INTO {table} (class_id, target) VALUES (?, ?)', (class_id, target))
+    
+    def add_subclass_axiom(self, sub_cls, super_cls):
+        """Registra che sub_cls è sottoclasse di super_cls"""
+        self.add_axiom('subclass_of', sub_cls, super_cls)
+    
+    def add_equivalence_axiom(self, class_name, equiv_name):
+        """Registra che class_name è equivalente a equiv_name"""
+        self.add_axiom('equivalent_to', class_name, equiv_name)
+    
+    def add_property(self, prop_info):
+        """Aggiunge una proprietà"""
+        self.connection.execute(
+            'INSERT INTO properties (name, iri, type, domain, range, range_iri, annotations) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (prop_info.name, prop_info.iri, prop_info.type, prop_info.domain, prop_info.range, prop_info.range_iri,
+             json.dumps(prop_info.annotations)))
+    
+    def set_property_end(self, name, key, value):
+        """Imposta il dominio o il range (key) della prima proprietà con quel nome, creandola se non esiste"""
+        if key not in ('domain', 'range'):
+            raise ValueError(f"Estremità non valida: {key}")
+        row = self.connection.execute('SELECT id FROM properties WHERE name = ? ORDER BY id LIMIT 1', (name,)).fetchone()
+        if row is None:
+            self.add_property(OntProperty(name, 'ObjectProperty', **{key: value}))
+        else:
+            self.connection.execute(f'UPDATE properties SET {key} = ? WHERE id = ?', (value, row[0]))
+    
+    def add_enumeration(self, enum):
+        """Aggiunge un'enumerazione"""
+        enum_id = self.connection.execute('INSERT INTO enumerations (name, iri, comment) VALUES (?, ?, ?)',
+                                          (enum.name, enum.iri, enum.comment)).lastrowid
+        self.connection.executemany('INSERT INTO enum_values (enum_id, position, value) VALUES (?, ?, ?)',
+                                    [(enum_id, i, value) for i, value in enumerate(enum.values)])
+
+class ModelStore:
+    """Modello dell'ontologia conservato in un database SQLite, per le ontologie che non stanno in memoria.
+    
+    Classi, proprietà, assiomi ed enumerazioni sono righe di tabelle indicizzate per
+    nome, dominio, range e IRI: il diagramma viene generato leggendo un'entità alla
+    volta e le viste filtrate (classi scelte, --focus) diventano query. Il database
+    resta valido tra un'esecuzione e l'altra finché l'input non cambia (vedi load_store).
+    """
+    
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS classes (id INTEGER PRIMARY KEY, name TEXT UNIQUE, iri TEXT, annotations TEXT);
+        CREATE INDEX IF NOT EXISTS classes_iri ON classes (iri);
+        CREATE TABLE IF NOT EXISTS subclass_of (id INTEGER PRIMARY KEY, class_id INTEGER, target TEXT);
+        CREATE INDEX IF NOT EXISTS subclass_of_class ON subclass_of (class_id, target);
+        CREATE INDEX IF NOT EXISTS subclass_of_target ON subclass_of (target);
+        CREATE TABLE IF NOT EXISTS equivalent_to (id INTEGER PRIMARY KEY, class_id INTEGER, target TEXT);
+        CREATE INDEX IF NOT EXISTS equivalent_to_class ON equivalent_to (class_id, target);
+        CREATE INDEX IF NOT EXISTS equivalent_to_target ON equivalent_to (target);
+        CREATE TABLE IF NOT EXISTS properties (id INTEGER PRIMARY KEY, name TEXT, iri TEXT, type TEXT,
+                                               domain TEXT, range TEXT, range_iri TEXT, annotations TEXT);
+        CREATE INDEX IF NOT EXISTS properties_name ON properties (name);
+        CREATE INDEX IF NOT EXISTS properties_domain ON properties (domain, type);
+        CREATE INDEX IF NOT EXISTS properties_range ON properties (range, type);
+        CREATE INDEX IF NOT EXISTS properties_range_iri ON properties (range_iri);
+        CREATE TABLE IF NOT EXISTS enumerations (id INTEGER PRIMARY KEY, name TEXT, iri TEXT, comment TEXT);
+        CREATE INDEX IF NOT EXISTS enumerations_name ON enumerations (name);
+        CREATE INDEX IF NOT EXISTS enumerations_iri ON enumerations (iri);
+        CREATE TABLE IF NOT EXISTS enum_values (enum_id INTEGER, position INTEGER, value TEXT,
+                                                PRIMARY KEY (enum_id, position)) WITHOUT ROWID;
+    '''
+    
+    # Enumerazione collegata al range di una DatatypeProperty p, come EnumerationIndex.bind
+    ENUM_TARGET = '''CASE WHEN p.range_iri IS NOT NULL AND p.range_iri != ''
+        THEN (SELECT e.name FROM enumerations e WHERE e.iri = p.range_iri ORDER BY e.id LIMIT 1)
+        ELSE (SELECT e.name FROM enumerations e WHERE e.name = p.range ORDER BY e.id LIMIT 1) END'''
+    
+    # Proprietà dati con dominio che possono riferirsi a un'enumerazione
+    ENUM_SOURCES = ("FROM properties p WHERE p.type = 'DataProperty' AND p.domain NOT IN ('', 'Unknown') "
+                    "AND p.range != ''")
+    
+    def __init__(self, path=':memory:', cache_kb=16 * 1024):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        # Limita la cache delle pagine: il resto del database rimane su disco
+        self.connection.execute(f'PRAGMA cache_size = -{int(cache_kb)}')
+        self.connection.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.connection.close()
+    
+    def meta(self, key):
+        """Valore registrato in meta, o None"""
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key, value):
+        self.connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+    
+    def clear(self):
+        """Svuota il database prima di una nuova estrazione"""
+        for table in ('meta', 'classes', 'subclass_of', 'equivalent_to', 'properties', 'enumerations', 'enum_values'):
+            self.connection.execute(f'DELETE FROM {table}')
+    
+    def import_model(self, model):
+        """Copia nel database un OntologyModel già estratto e restituisce lo StoreModel usato"""
+        target = StoreModel(self, model.namespaces)
+        target.element_counts = dict(model.element_counts)
+        for class_info in model.classes:
+            target.add_class(class_info)
+        for prop_info in model.properties:
+            target.add_property(prop_info)
+        for enum in model.enumerations:
+            target.add_enumeration(enum)
+        return target
+    
+    def counts(self):
+        """Numero di entità nel database e di elementi trovati per tipo durante l'estrazione"""
+        counts = {table: self.connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('classes', 'properties', 'enumerations')}
+        counts['elements'] = json.loads(self.meta('elements') or '{}')
+        return counts
+    
+    def select(self, names):
+        """Imposta la vista usata dalle query con view=True: le classi con i nomi indicati"""
+        self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS selection (name TEXT PRIMARY KEY)')
+        self.connection.execute('DELETE FROM temp.selection')
+        self.connection.executemany('INSERT OR IGNORE INTO temp.selection (name) VALUES (?)',
+                                    [(name,) for name in names])
+    
+    def targets(self, table, class_id):
+        """Superclassi (subclass_of) o classi equivalenti (equivalent_to) di una classe, in ordine"""
+        cursor = self.connection.execute(f'SELECT target FROM {table} WHERE class_id = ? ORDER BY id', (class_id,))
+        return [target for (target,) in cursor]
+    
+    def classes(self, view=False):
+        """Classi in ordine di estrazione (solo quelle della vista, con view)"""
+        query = 'SELECT id, name, iri, annotations FROM classes'
+        if view:
+            query += ' WHERE name IN (SELECT name FROM temp.selection)'
+        for class_id, name, iri, annotations in self.connection.execute(query + ' ORDER BY id'):
+            yield OntClass(name, iri, tuple(map(tuple, json.loads(annotations))),
+                           self.targets('subclass_of', class_id), self.targets('equivalent_to', class_id))
+    
+    def properties(self, prop_type=None, view=False):
+        """Proprietà in ordine di estrazione, del tipo indicato.
+        
+        Con view restano quelle con il dominio nella vista e, per le ObjectProperty,
+        anche il range, come in write_model_plantuml.
+        """
+        clauses = []
+        params = []
+        if prop_type is not None:
+            clauses.append('type = ?')
+            params.append(prop_type)
+        if view:
+            clauses.append("domain IN (SELECT name FROM temp.selection) AND "
+                           "(type != 'ObjectProperty' OR range IN (SELECT name FROM temp.selection))")
+        query = 'SELECT name, type, domain, range, annotations, iri, range_iri FROM properties'
+        if clauses:
+            query += ' WHERE ' + ' AND '.join(clauses)
+        for name, prop_type, domain, range_, annotations, iri, range_iri in self.connection.execute(
+                query + ' ORDER BY id', params):
+            yield OntProperty(name, prop_type, domain, range_, tuple(map(tuple, json.loads(annotations))),
+                              iri, range_iri)
+    
+    def enumerations(self, names=None):
+        """Enumerazioni in ordine di estrazione (solo quelle in names, se indicato)"""
+        query = 'SELECT id, name, iri, comment FROM enumerations'
+        params = ()
+        if names is not None:
+            query += ' WHERE name IN (SELECT value FROM json_each(?))'
+            params = (json.dumps(sorted(names)),)
+        for enum_id, name, iri, comment in self.connection.execute(query + ' ORDER BY id', params):
+            cursor = self.connection.execute('SELECT value FROM enum_values WHERE enum_id = ? ORDER BY position',
+                                             (enum_id,))
+            yield Enumeration(name, [value for (value,) in cursor], comment, iri)
+    
+    def attributes(self, class_name):
+        """Attributi della classe come coppie (tipo, nome), come in group_attributes"""
+        if not class_name or class_name == "Unknown":
+            return []
+        cursor = self.connection.execute(
+            "SELECT range, name FROM properties WHERE domain = ? AND type = 'DataProperty' ORDER BY id", (class_name,))
+        return [(range_ or 'String', name) for range_, name in cursor]
+    
+    def enum_references(self, view=False):
+        """Riferimenti alle enumerazioni, come extract_enum_references con l'EnumerationIndex"""
+        query = f'SELECT p.domain, {self.ENUM_TARGET}, p.name {self.ENUM_SOURCES}'
+        if view:
+            query += ' AND p.domain IN (SELECT name FROM temp.selection)'
+        for domain, target, name in self.connection.execute(query + ' ORDER BY p.id'):
+            if target is not None:
+                yield Relation(domain, target, name, '-->')
+    
+    def find(self, key):
+        """Nome della classe con questo IRI o nome locale, o dell'enumerazione con questo nome, o None"""
+        for query in ('SELECT name FROM classes WHERE iri = ? ORDER BY id LIMIT 1',
+                      'SELECT name FROM classes WHERE name = ?',
+                      'SELECT name FROM enumerations WHERE name = ? LIMIT 1'):
+            row = self.connection.execute(query, (key,)).fetchone()
+            if row is not None:
+                return row[0]
+        return None
+    
+    def kinds(self, names):
+        """Divide i nomi in (nomi di classi, nomi di enumerazioni), mantenendone l'ordine"""
+        class_names = [name for name in names
+                       if self.connection.execute('SELECT 1 FROM classes WHERE name = ?', (name,)).fetchone()]
+        enum_names = [name for name in names
+                      if self.connection.execute('SELECT 1 FROM enumerations WHERE name = ?', (name,)).fetchone()]
+        return class_names, enum_names
+    
+    def neighbors(self, name):
+        """Vicini di una classe o enumerazione nel diagramma, come in AdjacencyIndex"""
+        valid = "NOT IN ('', 'Unknown')"
+        query = f'''
+            SELECT range FROM properties WHERE domain = :name AND type = 'ObjectProperty' AND domain {valid} AND range {valid}
+            UNION ALL
+            SELECT domain FROM properties WHERE range = :name AND type = 'ObjectProperty' AND domain {valid} AND range {valid}
+            UNION ALL
+            SELECT a.target FROM classes c JOIN subclass_of a ON a.class_id = c.id WHERE c.name = :name AND c.name {valid} AND a.target {valid}
+            UNION ALL
+            SELECT c.name FROM subclass_of a JOIN classes c ON c.id = a.class_id WHERE a.target = :name AND c.name {valid} AND a.target {valid}
+            UNION ALL
+            SELECT a.target FROM classes c JOIN equivalent_to a ON a.class_id = c.id WHERE c.name = :name AND c.name {valid} AND a.target {valid}
+            UNION ALL
+            SELECT c.name FROM equivalent_to a JOIN classes c ON c.id = a.class_id WHERE a.target = :name AND c.name {valid} AND a.target {valid}
+            UNION ALL
+            SELECT {self.ENUM_TARGET} {self.ENUM_SOURCES} AND p.domain = :name
+            UNION ALL
+            SELECT p.domain {self.ENUM_SOURCES} AND {self.ENUM_TARGET} = :name
+                AND (p.range = :name OR p.range_iri IN (SELECT iri FROM enumerations WHERE name = :name))
+        '''
+        rows = self.connection.execute(query, {'name': name})
+        return list(dict.fromkeys(neighbor for (neighbor,) in rows if neighbor))
+
+def load_store(input_file, path, format=None):
+    """Apre il ModelStore in path e vi estrae input_file, se non è già quello estratto l'ultima volta.
+    
+    I file RDF/XML vengono letti da stream_ontology a memoria limitata, con i record
+    parziali in una tabella temporanea; gli altri formati vengono estratti in memoria
+    e poi copiati nel database.
+    """
+    store = ModelStore(path)
+    key = input_key(input_file, format)
+    if store.meta('input') == key:
+        return store
+    
+    store.clear()
+    if format is not None:
+        reader = format_reader(format)
+    else:
+        reader = INPUT_READERS.get(os.path.splitext(input_file)[1].lower(), stream_ontology)
+    if reader is stream_ontology:
+        model = stream_ontology(input_file, store)
+    else:
+        model = store.import_model(reader(input_file))
+    store.set_meta('elements', json.dumps(model.element_counts))
+    store.set_meta('input', key)
+    store.connection.commit()
+    return store
+
+def store_focus_view(store, focus, depth=2):
+    """Come focus_view, con i vicini letti dal ModelStore a ogni passo della visita"""
+    name = store.find(focus)
+    if name is None:
+        raise ValueError(f"Classe o enumerazione non trovata: {focus}")
+    return store.kinds(list(bounded_bfs(store.neighbors, name, depth)))
+
+class StoreAttributes:
+    """Attributi delle classi letti dal ModelStore alla richiesta, con l'interfaccia di group_attributes"""
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def get(self, name, default=()):
+        return self.store.attributes(name) or default
+
+def write_store_plantuml(sink, store, class_names=None, enum_names=None, enum_limit=ENUM_VALUE_LIMIT):
+    """Scrive il diagramma di un ModelStore, come write_model_plantuml senza stub esterni.
+    
+    Classi, proprietà ed enumerazioni vengono lette dal database durante la
+    scrittura; con class_names la vista è filtrata dalle query stesse.
+    """
+    attributes = StoreAttributes(store)
+    if class_names is None:
+        relations = iter_relations(store.classes(), store.properties('ObjectProperty'))
+        write_plantuml(sink, store.classes(), (), relations, store.enumerations(), store.enum_references(),
+                       enum_limit=enum_limit, attributes=attributes)
+        return
+    
+    keep = set(class_names)
+    store.select(keep)
+    relations = (relation for relation in iter_relations(store.classes(view=True),
+                                                         store.properties('ObjectProperty', view=True))
+                 if relation.source in keep and relation.target in keep)
+    enum_references = list(store.enum_references(view=True))
+    used = {ref.target for ref in enum_references}
+    if enum_names is not None:
+        used.intersection_update(enum_names)
+    write_plantuml(sink, store.classes(view=True), (), relations, store.enumerations(used), enum_references,
+                   enum_limit=enum_limit, attributes=attributes)
+
+def partition_classes(model, max_classes=40):
+    """Divide le classi in parti connesse da disegnare separatamente.
+    
+    Ogni gerarchia subClassOf (con le classi equivalenti) resta in una sola parte;
+    le gerarchie piccole vengono poi unite a quella con cui condividono più
+    ObjectProperty, finché la parte non supera max_classes. Una gerarchia più
+    grande di max_classes forma comunque una parte a sé.
+    Restituisce una lista di (nome della parte, nomi delle classi in ordine del modello).
+    """
+    names = [cls.name for cls in model.classes]
+    position = {name: i for i, name in enumerate(names)}
+    parent = list(range(len(names)))
+    
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            # Il rappresentante è la classe che compare prima nel modello
+            parent[max(a, b)] = min(a, b)
+    
+    for cls in model.classes:
+        for other in (*cls.subclass_of, *cls.equivalent_to):
+            if other in position:
+                union(position[cls.name], position[other])
+    
+    # Collegamenti tra gerarchie dovuti alle ObjectProperty
+    def links():
+        weights = {}
+        for relation in iter_relations((), model.properties):
+            if relation.source in position and relation.target in position:
+                a, b = find(position[relation.source]), find(position[relation.target])
+                if a != b:
+                    pair = (min(a, b), max(a, b))
+                    weights[pair] = weights.get(pair, 0) + 1
+        return weights
+    
+    sizes = {}
+    for i in range(len(names)):
+        root = find(i)
+        sizes[root] = sizes.get(root, 0) + 1
+    
+    # Unione golosa: prima i collegamenti più forti, a parità tra le parti più piccole
+    merged = True
+    while merged:
+        merged = False
+        weights = links()
+        for (a, b), _ in sorted(weights.items(), key=lambda item: (-item[1], sizes[item[0][0]] + sizes[item[0][1]], item[0])):
+            a, b = find(a), find(b)
+            if a != b and sizes[a] + sizes[b] <= max_classes:
+                size = sizes.pop(a) + sizes.pop(b)
+                union(a, b)
+                sizes[find(a)] = size
+                merged = True
+    
+    parts = {}
+    for i, name in enumerate(names):
+        parts.setdefault(find(i), []).append(name)
+    
+    # Ogni parte prende il nome della radice con più discendenti che contiene
+    # (le classi "Unknown" o senza nome non fanno parte della gerarchia)
+    hierarchy = model.hierarchy()
+    
+    def descendants(name):
+        return hierarchy.descendant_count(name) if name in hierarchy else 0
+    
+    result = []
+    for members in parts.values():
+        roots = [name for name in members if name in hierarchy and not hierarchy.ancestors(name)]
+        label = max(roots or members[:1], key=lambda name: (descendants(name), -position[name]))
+        result.append((label, members))
+    return result
+
+def partition_path(output_file, label):
+    """Percorso del file di una parte: <output senza estensione>-<nome della parte>.puml"""
+    base, extension = os.path.splitext(output_file)
+    safe_label = re.sub(r'[^\w.-]', '_', label)
+    return f"{base}-{safe_label}{extension or '.puml'}"
+
+def write_partitions(model, output_file, max_classes=40, enum_limit=ENUM_VALUE_LIMIT):
+    """Scrive ogni parte del modello in un file .puml separato e restituisce i percorsi"""
+    paths = []
+    for label, members in partition_classes(model, max_classes):
+        path = partition_path(output_file, label)
+        with open(path, 'w', encoding='utf-8') as f:
+            write_model_plantuml(f, model, members, external=True, enum_limit=enum_limit)
+        paths.append(path)
+    return paths
+
+class BatchJob:
+    """Vista da generare in modalità batch: input, file di output ed eventuali classi da includere
+    o classe attorno a cui limitare il diagramma (focus, entro depth relazioni)"""
+    __slots__ = ('input', 'output', 'classes', 'focus', 'depth', 'enum_limit')
+    
+    def __init__(self, input, output, classes=None, focus=None, depth=2, enum_limit=ENUM_VALUE_LIMIT):
+        self.input = input
+        self.output = output
+        self.classes = classes
+        self.focus = focus
+        self.depth = depth
+        self.enum_limit = enum_limit
+    
+    def __repr__(self):
+        return f'BatchJob({self.input!r}, {self.output!r})'
+
+def expand_inputs(pattern):
+    """File che corrispondono a un pattern glob, in ordine alfabetico"""
+    matches = sorted(glob.glob(pattern, recursive=True))
+    return matches if matches else [pattern]
+
+def output_path(template, input_file):
+    """Percorso di output di una vista; {stem} e {name} indicano il file di input"""
+    name = os.path.basename(input_file)
+    return template.format(stem=os.path.splitext(name)[0], name=name)
+
+def load_manifest(path, enum_limit=ENUM_VALUE_LIMIT):
+    """Legge un manifest JSON di job batch.
+    
+    Formato: {"inputs": [{"input": "OWL/*.rdf", "views": [{"output": "out/{stem}.puml"},
+    {"output": "out/{stem}-core.puml", "classes": ["CancerCondition", ...]},
+    {"output": "out/{stem}-site.puml", "focus": "BodySite", "depth": 1, "enum_limit": 10}]}]}.
+    I percorsi relativi sono risolti rispetto alla directory del manifest; enum_limit
+    vale per le viste che non lo indicano.
+    """
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    
+    jobs = []
+    for entry in manifest.get('inputs', []):
+        views = entry.get('views') or [{'output': '{stem}.puml'}]
+        for input_file in expand_inputs(os.path.join(base, entry['input'])):
+            for view in views:
+                output = os.path.join(base, output_path(view['output'], input_file))
+                jobs.append(BatchJob(input_file, output, view.get('classes'), view.get('focus'), view.get('depth', 2),
+                                     view.get('enum_limit', enum_limit)))
+    return jobs
+
+def glob_jobs(patterns, output_dir, enum_limit=ENUM_VALUE_LIMIT):
+    """Un job per ogni file che corrisponde ai pattern, con output in output_dir"""
+    jobs = []
+    for pattern in patterns:
+        for input_file in expand_inputs(pattern):
+            jobs.append(BatchJob(input_file, os.path.join(output_dir, output_path('{stem}.puml', input_file)),
+                                 enum_limit=enum_limit))
+    return jobs
+
+def batch_parse(input_file, cache=None):
+    """Estrae il modello di un input (eseguita nei processi del pool)"""
+    return load_ontology(input_file, cache)
+
+def batch_render(model, job):
+    """Genera una vista su file (eseguita nei processi del pool)"""
+    # La vista va calcolata prima di aprire il file, per non lasciarlo vuoto in caso di errore
+    class_names, enum_names = job.classes, None
+    if job.focus is not None:
+        class_names, enum_names = focus_view(model, job.focus, job.depth)
+        if job.classes is not None:
+            class_names = [name for name in class_names if name in set(job.classes)]
+    
+    directory = os.path.dirname(job.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(job.output, 'w', encoding='utf-8') as f:
+        write_model_plantuml(f, model, class_names, enum_names=enum_names, enum_limit=job.enum_limit)
+    return job.output
+
+def run_batch(jobs, workers=None, cache=None):
+    """Esegue i job batch su un pool di processi.
+    
+    Ogni input viene estratto una sola volta, poi le viste vengono generate in
+    parallelo. Restituisce una lista di (job, errore o None) nell'ordine dei job,
+    indipendentemente dall'ordine di completamento.
+    """
+    seen = set()
+    duplicates = set()
+    for job in jobs:
+        output = os.path.abspath(job.output)
+        (duplicates if output in seen else seen).add(output)
+    if duplicates:
+        raise ValueError(f"Più job scrivono sullo stesso file: {', '.join(sorted(duplicates))}")
+    
+    inputs = list(dict.fromkeys(job.input for job in jobs))
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        parsed = {input_file: pool.submit(batch_parse, input_file, cache) for input_file in inputs}
+        
+        models = {}
+        errors = {}
+        for input_file, future in parsed.items():
+            try:
+                models[input_file] = future.result()
+            except Exception as e:
+                errors[input_file] = e
+        
+        rendered = [pool.submit(batch_render, models[job.input], job) if job.input in models else None
+                    for job in jobs]
+        
+        results = []
+        for job, future in zip(jobs, rendered):
+            if future is None:
+                results.append((job, errors[job.input]))
+                continue
+            try:
+                future.result()
+                results.append((job, None))
+            except Exception as e:
+                results.append((job, e))
+    return results
+
+def report_batch(results, stream=None):
+    """Stampa l'esito di ogni job (su stdout se stream non è indicato); restituisce il numero di job falliti"""
+    # sys.stdout va letto qui e non come default, perché può essere sostituito dopo l'import
+    stream = sys.stdout if stream is None else stream
+    failed = 0
+    for job, error in results:
+        if error is None:
+            print(f"OK      {job.input} -> {job.output}", file=stream)
+        else:
+            failed += 1
+            print(f"ERRORE  {job.input} -> {job.output}: {error}", file=stream)
+    print(f"{len(results) - failed} job completati, {failed} falliti", file=stream)
+    return failed
+
+def diagram_content(model):
+    """Elementi comuni a tutti i formati di output: attributi per classe, relazioni e riferimenti alle enumerazioni"""
+    properties = model.properties
+    relations = [relation for relation in iter_relations(model.classes, properties)
+                 if relation.source and relation.target]
+    enum_references = [ref for ref in extract_enum_references(properties, model.enumerations_index())
+                       if ref.target in model.enum_index]
+    return group_attributes(properties), relations, enum_references
+
+def shown_values(enum, limit=ENUM_VALUE_LIMIT):
+    """Valori di un'enumerazione da mostrare e numero di quelli omessi"""
+    if limit and len(enum.values) > limit:
+        return enum.values[:limit], len(enum.values) - limit
+    return enum.values, 0
+
+def mermaid_id(name):
+    """Identificatore Mermaid di un nome (i caratteri non ammessi diventano '_')"""
+    return re.sub(r'\W', '_', name)
+
+def write_mermaid(sink, model, enum_limit=ENUM_VALUE_LIMIT):
+    """Scrive il modello come classDiagram Mermaid"""
+    class_attributes, relations, enum_references = diagram_content(model)
+    
+    def declare(name):
+        # Le etichette servono solo per i nomi che non sono identificatori validi
+        identifier = mermaid_id(name)
+        return identifier if identifier == name else f'{identifier}["{name}"]'
+    
+    sink.write('classDiagram\n')
+    for enum in model.enumerations:
+        values, omitted = shown_values(enum, enum_limit)
+        sink.write(f'  class {declare(enum.name)} {{\n    <<enumeration>>\n')
+        sink.writelines(f'    {value}\n' for value in values)
+        if omitted:
+            sink.write(f'    altri {omitted} valori\n')
+        sink.write('  }\n')
+    
+    for cls in model.classes:
+        attributes = class_attributes.get(cls.name, ())
+        if attributes:
+            sink.write(f'  class {declare(cls.name)} {{\n')
+            sink.writelines(f'    +{attr_type} {attr_name}\n' for attr_type, attr_name in attributes)
+            sink.write('  }\n')
+        else:
+            sink.write(f'  class {declare(cls.name)}\n')
+    
+    for relation in relations:
+        source, target = mermaid_id(relation.source), mermaid_id(relation.target)
+        if relation.type == '<|--':
+            sink.write(f'  {source} <|-- {target}\n')
+        elif relation.name == 'equivalentTo':
+            sink.write(f'  {source} .. {target} : equivalentTo\n')
+        else:
+            sink.write(f'  {source} --> {target} : {relation.name}\n')
+    for ref in enum_references:
+        sink.write(f'  {mermaid_id(ref.source)} --> {mermaid_id(ref.target)} : {ref.name}\n')
+
+def dot_escape(text):
+    """Protegge i caratteri speciali delle etichette record di Graphviz"""
+    return re.sub(r'([{}|<>"\\])', r'\\\1', str(text))
+
+def write_dot(sink, model, enum_limit=ENUM_VALUE_LIMIT):
+    """Scrive il modello come grafo Graphviz DOT (nodi record, frecce in stile UML)"""
+    class_attributes, relations, enum_references = diagram_content(model)
+    
+    sink.write('digraph ontology {\n'
+               '  rankdir=BT;\n'
+               '  node [shape=record, fontname="Helvetica", fontsize=10];\n'
+               '  edge [fontname="Helvetica", fontsize=9];\n')
+    for enum in model.enumerations:
+        values, omitted = shown_values(enum, enum_limit)
+        lines = [dot_escape(value) for value in values]
+        if omitted:
+            lines.append(f'altri {omitted} valori')
+        body = ''.join(f'{line}\\l' for line in lines)
+        sink.write(f'  "{dot_escape(enum.name)}" [label="{{«enumeration»\\n{dot_escape(enum.name)}|{body}}}"];\n')
+    
+    for cls in model.classes:
+        body = ''.join(f'+{dot_escape(attr_type)} {dot_escape(attr_name)}\\l'
+                       for attr_type, attr_name in class_attributes.get(cls.name, ()))
+        sink.write(f'  "{dot_escape(cls.name)}" [label="{{{dot_escape(cls.name)}|{body}}}"];\n')
+    
+    for relation in relations:
+        source, target = dot_escape(relation.source), dot_escape(relation.target)
+        if relation.type == '<|--':
+            # Dalla sottoclasse alla superclasse, con la punta vuota
+            sink.write(f'  "{target}" -> "{source}" [arrowhead=empty];\n')
+        elif relation.name == 'equivalentTo':
+            sink.write(f'  "{source}" -> "{target}" [dir=none, style=dashed, label="equivalentTo"];\n')
+        else:
+            sink.write(f'  "{source}" -> "{target}" [label="{dot_escape(relation.name)}"];\n')
+    for ref in enum_references:
+        sink.write(f'  "{dot_escape(ref.source)}" -> "{dot_escape(ref.target)}" '
+                   f'[style=dashed, label="{dot_escape(ref.name)}"];\n')
+    sink.write('}\n')
+
+def entity_dict(entity):
+    """Campi di un'entità del modello come dizionario"""
+    return {slot: getattr(entity, slot) for slot in type(entity).__slots__}
+
+def write_json_model(sink, model, enum_limit=None):
+    """Scrive il modello normalizzato in JSON (enum_limit è ignorato: i valori sono sempre completi)"""
+    _, relations, enum_references = diagram_content(model)
+    document = {
+        'version': EXTRACTOR_VERSION,
+        'namespaces': model.namespaces,
+        'classes': [entity_dict(cls) for cls in model.classes],
+        'properties': [entity_dict(prop) for prop in model.properties],
+        'enumerations': [entity_dict(enum) for enum in model.enumerations],
+        'relations': [entity_dict(relation) for relation in relations],
+        'enum_references': [entity_dict(ref) for ref in enum_references],
+    }
+    json.dump(document, sink, ensure_ascii=False, indent=2)
+    sink.write('\n')
+
+# Misure del renderer SVG integrato, in pixel
+SVG_FONT_SIZE = 12
+SVG_LINE_HEIGHT = 16
+SVG_PADDING = 6
+SVG_NODE_GAP = 30
+SVG_LAYER_GAP = 70
+SVG_MARGIN = 20
+
+# Caratteri più stretti e più larghi della media (in em, font sans-serif)
+NARROW_CHARS = frozenset("iljtfrI.,:;|!'()[] ")
+WIDE_CHARS = frozenset('mwMW@%')
+
+@functools.lru_cache(maxsize=8192)
+def text_width(text, size=SVG_FONT_SIZE):
+    """Larghezza stimata di una riga di testo (senza misurare il font vero)"""
+    em = 0.0
+    for char in text:
+        if char in NARROW_CHARS:
+            em += 0.3
+        elif char in WIDE_CHARS:
+            em += 0.85
+        elif char.isupper():
+            em += 0.68
+        else:
+            em += 0.56
+    return em * size
+
+@functools.lru_cache(maxsize=8192)
+def node_size(title, lines):
+    """Larghezza e altezza di un riquadro con intestazione e righe (tuple di stringhe)"""
+    width = max([text_width(line) * 1.1 for line in title] + [text_width(line) for line in lines])
+    height = (len(title) + len(lines)) * SVG_LINE_HEIGHT + 3 * SVG_PADDING
+    return max(width + 2 * SVG_PADDING, 60), height
+
+def count_inversions(values):
+    """Numero di coppie i < j con values[i] > values[j] (interi non negativi)"""
+    size = max(values, default=0) + 1
+    tree = [0] * (size + 1)
+    inversions = 0
+    for seen, value in enumerate(values):
+        # Valori già visti non maggiori di value (albero di Fenwick)
+        i, not_greater = value + 1, 0
+        while i:
+            not_greater += tree[i]
+            i -= i & -i
+        inversions += seen - not_greater
+        i = value + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return inversions
+
+def diagram_layers(model, names, edges):
+    """Livello di ogni nodo del diagramma.
+    
+    Le classi che fanno parte di una gerarchia stanno al livello della loro profondità
+    in subClassOf; gli altri nodi vanno un livello sotto il primo vicino già
+    collocato, e i gruppi scollegati partono dal livello 0.
+    """
+    hierarchy = model.hierarchy()
+    layer = {}
+    for name in names:
+        group = hierarchy.group_of.get(name)
+        if group is not None and (hierarchy.parents[group] or hierarchy.children[group]):
+            layer[name] = hierarchy.depths[group]
+    
+    neighbors = {name: [] for name in names}
+    for source, target in edges:
+        neighbors[source].append(target)
+        neighbors[target].append(source)
+    
+    def spread(queue):
+        while queue:
+            name = queue.popleft()
+            for other in neighbors[name]:
+                if other not in layer:
+                    layer[other] = layer[name] + 1
+                    queue.append(other)
+    
+    spread(deque(layer))
+    for name in names:
+        if name not in layer:
+            layer[name] = 0
+            spread(deque([name]))
+    return layer
+
+class LayeredLayout:
+    """Disposizione a livelli (Sugiyama) di un grafo con nodi rettangolari.
+    
+    Gli archi che attraversano più livelli vengono spezzati con nodi fittizi, l'ordine
+    in ogni livello è scelto con passate del baricentro tenendo quello con meno
+    incroci, e le coordinate avvicinano ogni nodo alla media dei suoi vicini senza
+    sovrapposizioni. route() restituisce la spezzata di ogni arco.
+    """
+    
+    def __init__(self, sizes, edges, layers, sweeps=8, passes=4):
+        self.sizes = dict(sizes)
+        self.layer = dict(layers)
+        self.rows = [[] for _ in range(max(self.layer.values(), default=-1) + 1)]
+        for name in sizes:
+            self.rows[self.layer[name]].append(name)
+        
+        # Catene di nodi di ogni arco; i nodi fittizi sono tuple (arco, livello)
+        self.chains = []
+        self.down = {}
+        self.up = {}
+        for i, (source, target) in enumerate(edges):
+            a, b = self.layer[source], self.layer[target]
+            chain = [source]
+            step = 1 if b > a else -1
+            for level in range(a + step, b, step) if a != b else ():
+                dummy = (i, level)
+                self.layer[dummy] = level
+                self.sizes[dummy] = (0, 0)
+                self.rows[level].append(dummy)
+                chain.append(dummy)
+            chain.append(target)
+            if a != b:
+                for u, v in zip(chain, chain[1:]):
+                    upper, lower = (u, v) if self.layer[u] < self.layer[v] else (v, u)
+                    self.down.setdefault(upper, []).append(lower)
+                    self.up.setdefault(lower, []).append(upper)
+            self.chains.append(chain)
+        
+        self.reduce_crossings(sweeps)
+        self.assign_coordinates(passes)
+    
+    def crossings(self):
+        """Incroci tra gli archi di livelli adiacenti"""
+        position = {name: i for row in self.rows for i, name in enumerate(row)}
+        total = 0
+        for row in self.rows[:-1]:
+            pairs = sorted((position[u], position[v]) for u in row for v in self.down.get(u, ()))
+            total += count_inversions([v for _, v in pairs])
+        return total
+    
+    def reduce_crossings(self, sweeps):
+        """Ordina i livelli con il baricentro dei vicini, alternando discese e risalite"""
+        best, best_rows = self.crossings(), [list(row) for row in self.rows]
+        for sweep in range(sweeps):
+            if not best:
+                break
+            downward = sweep % 2 == 0
+            neighbors = self.up if downward else self.down
+            levels = range(1, len(self.rows)) if downward else range(len(self.rows) - 2, -1, -1)
+            for level in levels:
+                fixed = {name: i for i, name in enumerate(self.rows[level - 1 if downward else level + 1])}
+                current = {name: i for i, name in enumerate(self.rows[level])}
+                
+                def barycenter(name):
+                    linked = [fixed[other] for other in neighbors.get(name, ())]
+                    return sum(linked) / len(linked) if linked else current[name]
+                
+                self.rows[level].sort(key=barycenter)
+            crossings = self.crossings()
+            if crossings < best:
+                best, best_rows = crossings, [list(row) for row in self.rows]
+        self.rows = best_rows
+    
+    def pack(self, row, desired):
+        """Colloca i nodi di un livello vicino alle ascisse desiderate, in ordine e senza sovrapposizioni"""
+        right = None
+        for name in row:
+            half = self.sizes[name][0] / 2
+            if right is None:
+                x = desired[name]
+            else:
+                gap = SVG_NODE_GAP if self.sizes[name][0] else SVG_NODE_GAP / 2
+                x = max(desired[name], right + gap + half)
+            self.x[name] = x
+            right = x + half
+        # Sposta tutto il livello per compensare la spinta verso destra
+        shift = sum(desired[name] - self.x[name] for name in row) / len(row)
+        for name in row:
+            self.x[name] += shift
+    
+    def assign_coordinates(self, passes):
+        """Ascisse e ordinate dei centri dei nodi"""
+        self.x = {}
+        self.y = {}
+        self.tops = []
+        top = SVG_MARGIN
+        for row in self.rows:
+            height = max((self.sizes[name][1] for name in row), default=0)
+            self.tops.append(top)
+            for name in row:
+                self.y[name] = top + height / 2
+            top += height + SVG_LAYER_GAP
+        
+        for row in self.rows:
+            if row:
+                self.pack(row, dict.fromkeys(row, 0))
+        for sweep in range(passes):
+            downward = sweep % 2 == 0
+            levels = range(len(self.rows)) if downward else range(len(self.rows) - 1, -1, -1)
+            for level in levels:
+                row = self.rows[level]
+                desired = {}
+                for name in row:
+                    linked = [self.x[other] for other in self.up.get(name, []) + self.down.get(name, [])]
+                    desired[name] = sum(linked) / len(linked) if linked else self.x[name]
+                if row:
+                    self.pack(row, desired)
+        
+        left = min((self.x[name] - self.sizes[name][0] / 2 for row in self.rows for name in row), default=0)
+        for name in self.x:
+            self.x[name] += SVG_MARGIN - left
+    
+    def border(self, name, toward):
+        """Punto del bordo di un nodo sulla retta dal suo centro verso toward"""
+        x, y = self.x[name], self.y[name]
+        width, height = self.sizes[name]
+        dx, dy = toward[0] - x, toward[1] - y
+        scales = [width / 2 / abs(dx) if dx else None, height / 2 / abs(dy) if dy else None]
+        scales = [scale for scale in scales if scale is not None]
+        if not scales:
+            return x, y
+        scale = min(scales)
+        return x + dx * scale, y + dy * scale
+    
+    def route(self, index):
+        """Punti della spezzata dell'arco index, dal nodo di partenza a quello di arrivo"""
+        chain = self.chains[index]
+        source, target = chain[0], chain[-1]
+        if source == target:
+            # Anello a destra del nodo
+            x, y = self.x[source] + self.sizes[source][0] / 2, self.y[source]
+            return [(x, y - 8), (x + 24, y - 8), (x + 24, y + 8), (x, y + 8)]
+        if len(chain) == 2 and self.layer[source] == self.layer[target]:
+            # Arco nello stesso livello: passa sopra i nodi
+            middle = ((self.x[source] + self.x[target]) / 2, self.tops[self.layer[source]] - SVG_LAYER_GAP / 3)
+            return [self.border(source, middle), middle, self.border(target, middle)]
+        points = [(self.x[name], self.y[name]) for name in chain]
+        points[0] = self.border(source, points[1])
+        points[-1] = self.border(target, points[-2])
+        return points
+
+def svg_escape(text):
+    """Protegge i caratteri speciali XML nel testo e negli attributi"""
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+SVG_STYLE = ('text{font-family:Helvetica,Arial,sans-serif;font-size:%dpx;fill:#222}'
+             '.title{font-weight:bold;text-anchor:middle}.stereotype{font-style:italic;text-anchor:middle}'
+             '.label{font-size:%dpx;fill:#444;text-anchor:middle}'
+             '.class rect{fill:#fefece;stroke:#a80036}.enum rect{fill:#eef6e8;stroke:#2f7d32}'
+             'path{fill:none;stroke:#555}.dashed{stroke-dasharray:5,4}' % (SVG_FONT_SIZE, SVG_FONT_SIZE - 2))
+
+def write_svg(sink, model, enum_limit=ENUM_VALUE_LIMIT):
+    """Disegna il modello direttamente in SVG con la disposizione a livelli, senza PlantUML"""
+    class_attributes, relations, enum_references = diagram_content(model)
+    
+    # Riquadri: nome -> (intestazione, righe, tipo)
+    boxes = {}
+    for enum in model.enumerations:
+        values, omitted = shown_values(enum, enum_limit)
+        lines = tuple(values) + ((f'.. altri {omitted} valori ..',) if omitted else ())
+        boxes[enum.name] = (('«enumeration»', enum.name), lines, 'enum')
+    for cls in model.classes:
+        lines = tuple(f'+{attr_type} {attr_name}' for attr_type, attr_name in class_attributes.get(cls.name, ()))
+        boxes.setdefault(cls.name, ((cls.name,), lines, 'class'))
+    
+    # Archi: le sottoclassi puntano alla superclasse come in UML
+    edges = []
+    for relation in relations:
+        if relation.type == '<|--':
+            edges.append((relation.target, relation.source, '', 'extends'))
+        elif relation.name == 'equivalentTo':
+            edges.append((relation.source, relation.target, relation.name, 'equivalent'))
+        else:
+            edges.append((relation.source, relation.target, relation.name, 'association'))
+    edges.extend((ref.source, ref.target, ref.name, 'association') for ref in enum_references)
+    for source, target, _, _ in edges:
+        for name in (source, target):
+            boxes.setdefault(name, ((name,), (), 'class'))
+    
+    sizes = {name: node_size(title, lines) for name, (title, lines, _) in boxes.items()}
+    pairs = [(source, target) for source, target, _, _ in edges]
+    layout = LayeredLayout(sizes, pairs, diagram_layers(model, list(boxes), pairs))
+    routes = [layout.route(i) for i in range(len(edges))]
+    
+    width = max([layout.x[name] + sizes[name][0] / 2 for name in boxes]
+                + [x for points in routes for x, _ in points], default=0) + SVG_MARGIN
+    height = max([layout.y[name] + sizes[name][1] / 2 for name in boxes]
+                 + [y for points in routes for _, y in points], default=0) + SVG_MARGIN
+    top = min([y for points in routes for _, y in points] + [SVG_MARGIN]) - SVG_MARGIN
+    
+    sink.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height - top:.0f}" '
+               f'viewBox="0 {top:.0f} {width:.0f} {height - top:.0f}">\n'
+               f'<style>{SVG_STYLE}</style>\n<defs>\n'
+               '<marker id="extends" viewBox="0 0 12 12" refX="11" refY="6" markerWidth="12" markerHeight="12" '
+               'orient="auto"><path d="M1,1 L11,6 L1,11 Z" style="fill:#fff"/></marker>\n'
+               '<marker id="arrow" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="9" markerHeight="9" '
+               'orient="auto"><path d="M1,1 L9,5 L1,9"/></marker>\n</defs>\n')
+    
+    labels = []
+    for (source, target, name, kind), points in zip(edges, routes):
+        d = 'M' + ' L'.join(f'{x:.1f},{y:.1f}' for x, y in points)
+        if kind == 'extends':
+            sink.write(f'<path d="{d}" marker-end="url(#extends)"/>\n')
+        elif kind == 'equivalent':
+            sink.write(f'<path class="dashed" d="{d}"/>\n')
+        else:
+            sink.write(f'<path d="{d}" marker-end="url(#arrow)"/>\n')
+        if name:
+            (x1, y1), (x2, y2) = points[(len(points) - 1) // 2], points[len(points) // 2 or 1]
+            labels.append(f'<text class="label" x="{(x1 + x2) / 2:.1f}" y="{(y1 + y2) / 2 - 3:.1f}">'
+                          f'{svg_escape(name)}</text>\n')
+    
+    for name, (title, lines, kind) in boxes.items():
+        box_width, box_height = sizes[name]
+        left, box_top = layout.x[name] - box_width / 2, layout.y[name] - box_height / 2
+        center = layout.x[name]
+        parts = [f'<g class="{kind}"><rect x="{left:.1f}" y="{box_top:.1f}" width="{box_width:.1f}" '
+                 f'height="{box_height:.1f}" rx="3"/>']
+        y = box_top + SVG_PADDING
+        for i, line in enumerate(title):
+            y += SVG_LINE_HEIGHT
+            css = 'title' if i == len(title) - 1 else 'stereotype'
+            parts.append(f'<text class="{css}" x="{center:.1f}" y="{y - 4:.1f}">{svg_escape(line)}</text>')
+        y += SVG_PADDING
+        parts.append(f'<path d="M{left:.1f},{y:.1f} H{left + box_width:.1f}"/>')
+        for line in lines:
+            y += SVG_LINE_HEIGHT
+            parts.append(f'<text x="{left + SVG_PADDING:.1f}" y="{y - 4:.1f}">{svg_escape(line)}</text>')
+        parts.append('</g>\n')
+        sink.write(''.join(parts))
+    
+    sink.writelines(labels)
+    sink.write('</svg>\n')
+
+# Formati di output: funzione che scrive il modello su un oggetto file-like
+EMITTERS = {
+    'plantuml': lambda sink, model, enum_limit=ENUM_VALUE_LIMIT: write_model_plantuml(sink, model, enum_limit=enum_limit),
+    'mermaid': write_mermaid,
+    'dot': write_dot,
+    'json': write_json_model,
+    'svg': write_svg,
+}
+
+def emit_one(emitter, model, target, enum_limit):
+    """Scrive un formato su un percorso, '-' (standard output) o un oggetto file-like"""
+    if hasattr(target, 'write'):
+        emitter(target, model, enum_limit=enum_limit)
+    elif target == '-':
+        emitter(sys.stdout, model, enum_limit=enum_limit)
+    else:
+        with open(target, 'w', encoding='utf-8') as f:
+            emitter(f, model, enum_limit=enum_limit)
+    return target
+
+def emit_all(model, targets, workers=None, enum_limit=ENUM_VALUE_LIMIT):
+    """Scrive lo stesso modello in più formati in parallelo.
+    
+    targets è una lista di (formato, destinazione). Gli indici del modello vengono
+    costruiti prima di avviare i thread, così gli emitter lo leggono soltanto.
+    Restituisce una lista di (formato, destinazione, errore o None) nell'ordine di targets.
+    """
+    for format, _ in targets:
+        if format not in EMITTERS:
+            raise ValueError(f"Formato di output non supportato: {format!r}")
+    model.enumerations_index()
+    model.adjacency()
+    if any(format == 'svg' for format, _ in targets):
+        # Usata dal layout SVG per assegnare i livelli
+        model.hierarchy()
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or len(targets) or 1) as pool:
+        futures = [pool.submit(emit_one, EMITTERS[format], model, target, enum_limit) for format, target in targets]
+        results = []
+        for (format, target), future in zip(targets, futures):
+            try:
+                future.result()
+                results.append((format, target, None))
+            except Exception as e:
+                results.append((format, target, e))
+    return results
+
+def plantuml_chunks(source, format=None, cache=None):
+    """Genera il diagramma PlantUML di un'ontologia un blocco alla volta.
+    
+    source è uno degli input accettati da load_ontology; l'estrazione avviene alla
+    prima richiesta di un blocco.
+    """
+    model = load_ontology(source, cache, format)
+    properties = model.properties
+    yield from iter_plantuml(model.classes, properties, iter_relations(model.classes, properties),
+                             model.enumerations, extract_enum_references(properties, model.enumerations_index()))
+
+def to_plantuml(source, format=None, cache=None):
+    """Restituisce il diagramma PlantUML di un'ontologia come stringa, senza file temporanei"""
+    return ''.join(plantuml_chunks(source, format, cache))
+
+async def to_plantuml_async(source, format=None, cache=None, executor=None):
+    """Variante di to_plantuml per asyncio: la conversione viene eseguita in un executor
+    (quello predefinito del loop se executor è None), senza bloccare il loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(to_plantuml, source, format, cache))
+
+class ConversionProfiler:
+    """Metriche di una conversione: tempi per fase, conteggi, picchi di memoria e cache.
+    
+    Si passa a convert_owl2plantuml come profiler; ogni fase viene eseguita dentro
+    stage(nome). Con trace_memory il picco di memoria allocata durante la fase viene
+    misurato con tracemalloc; con cprofile le fasi vengono eseguite sotto cProfile.
+    """
+    
+    def __init__(self, trace_memory=True, cprofile=False):
+        self.trace_memory = trace_memory
+        self.profile = cProfile.Profile() if cprofile else None
+        self.stages = {}
+        self.counts = {}
+        self.caches = {}
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Misura il tempo reale e di CPU (e il picco di memoria) del blocco"""
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            if self.profile is not None:
+                self.profile.disable()
+            
+            stats = self.stages.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            stats['calls'] += 1
+            stats['wall_seconds'] += wall
+            stats['cpu_seconds'] += cpu
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                stats['peak_bytes'] = max(stats.get('peak_bytes', 0), peak)
+    
+    def record_model(self, model):
+        """Registra il numero di entità del modello e degli elementi trovati per tipo"""
+        self.counts['classes'] = len(model.classes)
+        self.counts['properties'] = len(model.properties)
+        self.counts['enumerations'] = len(model.enumerations)
+        self.counts['elements'] = dict(model.element_counts)
+    
+    def record_caches(self, model_cache=None):
+        """Registra le statistiche delle cache dei nomi locali e dei modelli"""
+        caches = [('local_names', LOCAL_NAMES), ('node_sizes', node_size.cache_info())]
+        if model_cache is not None:
+            caches.append(('models', model_cache))
+        for name, cache in caches:
+            lookups = cache.hits + cache.misses
+            self.caches[name] = {
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'hit_rate': cache.hits / lookups if lookups else None,
+            }
+    
+    def report(self):
+        """Metriche raccolte come dizionario serializzabile in JSON"""
+        return {'stages': self.stages, 'counts': self.counts, 'caches': self.caches}
+    
+    def dump(self, path, format='json'):
+        """Scrive le metriche in JSON ('-' per lo standard error) o le statistiche di cProfile"""
+        if format == 'cprofile':
+            if self.profile is None:
+                raise ValueError("Il profiler non è stato creato con cprofile=True")
+            self.profile.dump_stats(path)
+        elif path == '-':
+            json.dump(self.report(), sys.stderr, indent=2)
+            sys.stderr.write('\n')
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, indent=2)
+
+class RenderService:
+    """Conversioni per il server HTTP, con cache dei risultati e concorrenza limitata.
+    
+    I risultati sono tenuti in una cache LRU indicizzata per hash del contenuto e
+    opzioni della vista; le richieste identiche che arrivano mentre la conversione
+    è in corso attendono lo stesso risultato invece di ripeterla. Le conversioni
+    vengono eseguite da al più workers thread.
+    """
+    
+    # Opzioni della vista accettate nella query string
+    OPTIONS = ('format', 'classes', 'focus', 'depth', 'enum_limit')
+    
+    def __init__(self, files=None, workers=4, cache_size=128, enum_limit=ENUM_VALUE_LIMIT):
+        self.files = dict(files or {})
+        self.enum_limit = enum_limit
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.cache_size = cache_size
+        self.results = OrderedDict()
+        self.inflight = {}
+        self.digests = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def options(self, query):
+        """Normalizza le opzioni della query string (dict di liste, come da parse_qs)"""
+        unknown = set(query) - set(self.OPTIONS) - {'file'}
+        if unknown:
+            raise ValueError(f"Opzioni non supportate: {', '.join(sorted(unknown))}")
+        options = {}
+        if query.get('format'):
+            options['format'] = query['format'][-1]
+        if query.get('classes'):
+            names = {name.strip() for value in query['classes'] for name in value.split(',')}
+            options['classes'] = sorted(name for name in names if name)
+        if query.get('focus'):
+            options['focus'] = query['focus'][-1]
+            options['depth'] = int(query['depth'][-1]) if query.get('depth') else 2
+        # Sempre presente, perché fa parte della chiave dei risultati
+        options['enum_limit'] = int(query['enum_limit'][-1]) if query.get('enum_limit') else self.enum_limit
+        return options
+    
+    def file_digest(self, path):
+        """Hash del contenuto di un file configurato, ricalcolato solo se il file cambia"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self.digests.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        self.digests[path] = (signature, digest.hexdigest())
+        return digest.hexdigest()
+    
+    def render(self, source, digest, options):
+        """Restituisce (testo PlantUML, esito) con esito 'hit', 'miss' o 'coalesced'"""
+        key = hashlib.sha256(f'{EXTRACTOR_VERSION}\0{digest}\0{json.dumps(options, sort_keys=True)}'.encode()).hexdigest()
+        with self.lock:
+            text = self.results.get(key)
+            if text is not None:
+                self.results.move_to_end(key)
+                self.hits += 1
+                return text, 'hit'
+            future = self.inflight.get(key)
+            if future is None:
+                self.misses += 1
+                outcome = 'miss'
+                future = self.inflight[key] = self.executor.submit(self.convert, key, source, options)
+            else:
+                self.coalesced += 1
+                outcome = 'coalesced'
+        return future.result(), outcome
+    
+    def convert(self, key, source, options):
+        """Esegue la conversione (in un thread del pool) e ne memorizza il risultato"""
+        try:
+            model = load_ontology(source, format=options.get('format'))
+            class_names = options.get('classes')
+            enum_names = None
+            if 'focus' in options:
+                focused, enum_names = focus_view(model, options['focus'], options['depth'])
+                class_names = [name for name in focused if class_names is None or name in class_names]
+            sink = io.StringIO()
+            write_model_plantuml(sink, model, class_names, enum_names=enum_names,
+                                 enum_limit=options.get('enum_limit', self.enum_limit))
+            text = sink.getvalue()
+        except BaseException:
+            with self.lock:
+                del self.inflight[key]
+            raise
+        
+        with self.lock:
+            del self.inflight[key]
+            self.results[key] = text
+            if len(self.results) > self.cache_size:
+                self.results.popitem(last=False)
+        return text
+    
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class RenderRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Richieste del server di conversione.
+    
+    POST /plantuml con l'ontologia nel corpo, oppure GET /plantuml?file=NOME per un
+    file configurato; le opzioni della vista (format, classes, focus, depth, enum_limit) vanno nella query string.
+    GET /files elenca i file configurati.
+    """
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        service = self.server.service
+        if url.path == '/files':
+            self.send_text(200, json.dumps(sorted(service.files)), 'application/json')
+        elif url.path == '/plantuml':
+            name = query.get('file', [None])[-1]
+            if name not in service.files:
+                self.send_text(404, f"File non configurato: {name}\n")
+                return
+            path = service.files[name]
+            self.respond(lambda options: service.render(path, service.file_digest(path), options), query)
+        else:
+            self.send_text(404, "Percorso non trovato\n")
+    
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/plantuml':
+            self.send_text(404, "Percorso non trovato\n")
+            return
+        
+        service = self.server.service
+        length = self.headers.get('Content-Length')
+        if length is None:
+            self.send_text(411, "Content-Length mancante\n")
+            return
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # Con una lunghezza negativa read() leggerebbe fino alla chiusura della connessione
+            self.send_text(400, "Content-Length non valido\n")
+            return
+        if length > self.server.max_upload:
+            self.send_text(413, "Ontologia troppo grande\n")
+            return
+        data = self.rfile.read(length)
+        digest = hashlib.sha256(data).hexdigest()
+        self.respond(lambda options: service.render(data, digest, options), parse_qs(url.query))
+    
+    def respond(self, render, query):
+        """Converte con le opzioni della query e invia il risultato"""
+        try:
+            text, outcome = render(self.server.service.options(query))
+        except (ValueError, SyntaxError, ET.ParseError) as e:
+            self.send_text(400, f"Errore durante la conversione: {e}\n")
+            return
+        except Exception as e:
+            self.send_text(500, f"Errore durante la conversione: {e}\n")
+            return
+        self.send_text(200, text, headers={'X-Cache': outcome})
+    
+    def send_text(self, status, text, content_type='text/plain', headers=None):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(address, service, max_upload=50 * 1024 * 1024):
+    """Avvia il server HTTP di conversione su address (host, porta) finché non viene interrotto"""
+    server = http.server.ThreadingHTTPServer(address, RenderRequestHandler)
+    server.service = service
+    server.max_upload = max_upload
+    host, port = server.server_address[:2]
+    print(f"Server PlantUML in ascolto su http://{host}:{port}/plantuml", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.close()
+
+def convert_owl2plantuml(input_file, output_file, cache=None, partition=None, profiler=None, focus=None, depth=2,
+                         enum_limit=ENUM_VALUE_LIMIT):
+    """Converte un file OWL in formato PlantUML.
+    
+    output_file può essere un percorso, '-' per lo standard output o un oggetto file-like;
+    cache è una ModelCache opzionale per non riestrarre gli input già visti. Con
+    partition (numero massimo di classi per parte) il diagramma viene diviso in più
+    file accanto a output_file. Con focus vengono disegnate solo le classi e le
+    enumerazioni entro depth relazioni da focus; enum_limit è il numero massimo di
+    valori mostrati per enumerazione (0 per tutti). Un ConversionProfiler passato
+    come profiler riceve le metriche di ogni fase.
+    """
+    def stage(name):
+        return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+    
+    try:
+        # Estrai gli elementi dell'ontologia in un'unica passata sul file OWL
+        with stage('load_ontology'):
+            model = load_ontology(input_file, cache)
+        
+        classes = model.classes
+        properties = model.properties
+        
+        # Le relazioni vengono calcolate durante la scrittura, tranne quando
+        # vanno misurate come fase a sé
+        relations = iter_relations(classes, properties)
+        if profiler is not None:
+            profiler.record_model(model)
+            with stage('extract_relations'):
+                relations = list(relations)
+            profiler.counts['relations'] = len(relations)
+        
+        if focus is not None:
+            with stage('focus_view'):
+                class_names, enum_names = focus_view(model, focus, depth)
+        
+        def write(sink):
+            with stage('generate_plantuml'):
+                if focus is not None:
+                    write_model_plantuml(sink, model, class_names, enum_names=enum_names, enum_limit=enum_limit)
+                else:
+                    write_plantuml(sink, classes, properties, relations, model.enumerations,
+                                   extract_enum_references(properties, model.enumerations_index()),
+                                   enum_limit=enum_limit)
+        
+        # Genera il PlantUML e scrivilo man mano sulla destinazione
+        if partition:
+            with stage('write_partitions'):
+                paths = write_partitions(model, output_file, partition, enum_limit)
+            for path in paths:
+                print(f"File PlantUML generato con successo: {path}")
+        else:
+            write_output(output_file, write)
+        
+        if profiler is not None:
+            profiler.record_caches(cache)
+        
+    except Exception as e:
+        print(f"Errore durante la conversione: {e}", file=sys.stderr)
+        raise
+
+def write_output(output_file, write):
+    """Chiama write con la destinazione indicata (percorso, '-' o oggetto file-like) e ne dà conferma"""
+    if hasattr(output_file, 'write'):
+        write(output_file)
+    elif output_file == '-':
+        write(sys.stdout)
+        print("Diagramma PlantUML scritto sullo standard output", file=sys.stderr)
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            write(f)
+        print(f"File PlantUML generato con successo: {output_file}")
+
+def convert_with_store(input_file, output_file, store_path, profiler=None, focus=None, depth=2,
+                       enum_limit=ENUM_VALUE_LIMIT):
+    """Converte un file OWL in PlantUML passando per un ModelStore su disco.
+    
+    Il modello viene estratto in store_path solo se l'input è cambiato dall'ultima
+    volta (vedi load_store); il diagramma, anche con focus, viene poi generato con
+    query sul database. Gli altri parametri sono quelli di convert_owl2plantuml.
+    """
+    def stage(name):
+        return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+    
+    try:
+        with stage('load_store'):
+            store = load_store(input_file, store_path)
+        try:
+            if profiler is not None:
+                profiler.counts.update(store.counts())
+            
+            class_names = enum_names = None
+            if focus is not None:
+                with stage('focus_view'):
+                    class_names, enum_names = store_focus_view(store, focus, depth)
+            
+            def write(sink):
+                with stage('generate_plantuml'):
+                    write_store_plantuml(sink, store, class_names, enum_names, enum_limit)
+            
+            write_output(output_file, write)
+        finally:
+            store.close()
+        
+        if profiler is not None:
+            profiler.record_caches()
+        
+    except Exception as e:
+        print(f"Errore durante la conversione: {e}", file=sys.stderr)
+        raise
+
+def convert_ontology(input_file, targets, cache=None, profiler=None, workers=None, enum_limit=ENUM_VALUE_LIMIT):
+    """Converte un file OWL in più formati con una sola estrazione.
+    
+    targets è una lista di (formato, destinazione) con i formati di EMITTERS; le
+    destinazioni vengono scritte in parallelo (vedi emit_all). Restituisce True se
+    tutte le destinazioni sono state scritte.
+    """
+    def stage(name):
+        return profiler.stage(name) if profiler is not None else contextlib.nullcontext()
+    
+    with stage('load_ontology'):
+        model = load_ontology(input_file, cache)
+    if profiler is not None:
+        profiler.record_model(model)
+    
+    with stage('emit'):
+        results = emit_all(model, targets, workers, enum_limit)
+    
+    ok = True
+    for format, target, error in results:
+        if error is not None:
+            ok = False
+            print(f"Errore durante la scrittura di {target} ({format}): {error}", file=sys.stderr)
+        elif target == '-':
+            print(f"Diagramma {format} scritto sullo standard output", file=sys.stderr)
+        else:
+            print(f"File {format} generato con successo: {target}")
+    
+    if profiler is not None:
+        profiler.record_caches(cache)
+    return ok
+
+def main():
+    """Funzione principale"""
+    parser = argparse.ArgumentParser(description='Converti un file OWL in diagramma PlantUML')
+    parser.add_argument('input', nargs='?', help='File OWL di input (RDF/XML, Turtle .ttl, JSON-LD .jsonld, Functional Syntax .ofn, modello UML .uml o progetto MagicDraw .mdzip)')
+    parser.add_argument('output', nargs='?', help="File PlantUML di output ('-' per lo standard output)")
+    parser.add_argument('--cache-dir', help='Directory in cui conservare i modelli estratti tra un\'esecuzione e l\'altra')
+    parser.add_argument('--cache-size', type=int, default=256,
+                        help='Dimensione massima della cache in MB (default: 256)')
+    parser.add_argument('--store', metavar='PATH',
+                        help='Estrai il modello in un database SQLite e genera il diagramma interrogandolo, '
+                             'per le ontologie che non stanno in memoria (riusato finché l\'input non cambia)')
+    parser.add_argument('--watch', action='store_true',
+                        help="Rigenera il diagramma a ogni modifica del file di input")
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='Intervallo in secondi tra i controlli in modalità watch (default: 0.5)')
+    
+    parser.add_argument('--focus', metavar='CLASSE',
+                        help='Disegna solo le classi e le enumerazioni vicine a questa classe')
+    parser.add_argument('--depth', type=int, default=2,
+                        help='Numero massimo di relazioni da --focus (default: 2)')
+    parser.add_argument('--enum-limit', type=int, default=ENUM_VALUE_LIMIT,
+                        help=f'Valori mostrati per enumerazione, gli altri vengono riassunti (0 per tutti, default: {ENUM_VALUE_LIMIT})')
+    parser.add_argument('--emit', action='append', default=[], metavar='FORMATO=PERCORSO',
+                        help=f"Scrivi anche il modello nel formato indicato ({', '.join(EMITTERS)}; ripetibile)")
+    parser.add_argument('--partition', type=int, metavar='MAX_CLASSES',
+                        help='Dividi il diagramma in file separati di al massimo MAX_CLASSES classi per parte')
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Scrivi le metriche della conversione in PATH ('-' per lo standard error)")
+    parser.add_argument('--profile-format', choices=('json', 'cprofile'), default='json',
+                        help='Formato delle metriche: JSON o statistiche di cProfile (default: json)')
+    parser.add_argument('--manifest', help='Manifest JSON di input e viste da convertire in modalità batch')
+    parser.add_argument('--batch', action='append', metavar='GLOB',
+                        help='Pattern dei file di input da convertire in modalità batch (ripetibile)')
+    parser.add_argument('--output-dir', default='.',
+                        help='Directory di output per --batch (default: directory corrente)')
+    parser.add_argument('--jobs', type=int,
+                        help='Numero di processi in modalità batch o di conversioni concorrenti del server '
+                             '(default: numero di CPU)')
+    parser.add_argument('--serve', metavar='[HOST:]PORT',
+                        help='Avvia un server HTTP che converte le ontologie ricevute')
+    parser.add_argument('--serve-file', action='append', default=[], metavar='NOME=PERCORSO',
+                        help='File locale che il server può convertire con GET /plantuml?file=NOME (ripetibile)')
+    parser.add_argument('--result-cache', type=int, default=128,
+                        help='Numero di diagrammi tenuti in memoria dal server (default: 128)')
+    parser.add_argument('--max-upload', type=int, default=50,
+                        help='Dimensione massima delle ontologie inviate al server in MB (default: 50)')
+    
+    args = parser.parse_args()
+    if args.serve:
+        if args.input or args.watch or args.manifest or args.batch:
+            parser.error("--serve non accetta input, output, --watch o la modalità batch")
+        host, _, port = args.serve.rpartition(':')
+        files = {}
+        for entry in args.serve_file:
+            name, sep, path = entry.partition('=')
+            if not sep or not name:
+                parser.error(f"--serve-file richiede NOME=PERCORSO: {entry!r}")
+            files[name] = path
+        service = RenderService(files, args.jobs or os.cpu_count() or 1, args.result_cache, args.enum_limit)
+        try:
+            serve((host or '127.0.0.1', int(port)), service, args.max_upload * 1024 * 1024)
+        except KeyboardInterrupt:
+            pass
+        return
+    
+    batch = args.manifest or args.batch
+    if batch and (args.input or args.watch):
+        parser.error("--manifest/--batch non accettano input, output o --watch")
+    if not batch and (args.input is None or (args.output is None and not args.emit)):
+        parser.error("servono un file di input e uno di output")
+    targets = []
+    for entry in args.emit:
+        format, sep, path = entry.partition('=')
+        if not sep or not path:
+            parser.error(f"--emit richiede FORMATO=PERCORSO: {entry!r}")
+        if format not in EMITTERS:
+            parser.error(f"formato non supportato in --emit: {format!r} (disponibili: {', '.join(EMITTERS)})")
+        targets.append((format, path))
+    if targets and (batch or args.watch or args.partition or args.focus):
+        parser.error("--emit non è disponibile con --watch, --partition, --focus o in modalità batch")
+    if (args.watch or args.partition) and args.output == '-':
+        parser.error("--watch e --partition richiedono un file di output")
+    if args.partition and (batch or args.watch):
+        parser.error("--partition non è disponibile con --watch o in modalità batch")
+    if args.focus and (batch or args.watch or args.partition):
+        parser.error("--focus non è disponibile con --watch, --partition o in modalità batch (usare le viste del manifest)")
+    if args.store and (batch or args.watch or args.partition or targets or args.cache_dir):
+        parser.error("--store non è disponibile con --watch, --partition, --emit, --cache-dir o in modalità batch")
+    if args.profile and (batch or args.watch):
+        parser.error("--profile non è disponibile con --watch o in modalità batch")
+    if args.profile == '-' and args.profile_format == 'cprofile':
+        parser.error("le statistiche di cProfile richiedono un file")
+    
+    cache = ModelCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None
+    if batch:
+        jobs = load_manifest(args.manifest, args.enum_limit) if args.manifest else []
+        jobs.extend(glob_jobs(args.batch or [], args.output_dir, args.enum_limit))
+        if report_batch(run_batch(jobs, args.jobs, cache)):
+            sys.exit(1)
+    elif args.watch:
+        try:
+            watch_owl2plantuml(args.input, args.output, args.interval, cache, enum_limit=args.enum_limit)
+        except KeyboardInterrupt:
+            pass
+    else:
+        profiler = None
+        if args.profile:
+            profiler = ConversionProfiler(cprofile=args.profile_format == 'cprofile')
+        if targets:
+            if args.output is not None:
+                targets.insert(0, ('plantuml', args.output))
+            ok = convert_ontology(args.input, targets, cache, profiler, args.jobs, args.enum_limit)
+        elif args.store:
+            convert_with_store(args.input, args.output, args.store, profiler, args.focus, args.depth, args.enum_limit)
+            ok = True
+        else:
+            convert_owl2plantuml(args.input, args.output, cache, args.partition, profiler, args.focus, args.depth,
+                                 args.enum_limit)
+            ok = True
+        if profiler is not None:
+            profiler.dump(args.profile, args.profile_format)
+        if not ok:
+            sys.exit(1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
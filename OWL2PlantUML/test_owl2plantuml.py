@@ -0,0 +1,860 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Test di owl2plantuml_v17.py: la stessa piccola ontologia in tutti i formati di input
+deve produrre lo stesso diagramma, anche passando per il ModelStore.
+
+Esempio:
+    python -m unittest test_owl2plantuml
+"""
+
+import asyncio
+import http.client
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import owl2plantuml_v17 as converter
+
+# B è sottoclasse di A, A è collegata a C e ha un attributo con un'enumerazione
+RDF_XML = b'''<?xml version="1.0"?>
+<rdf:RDF xmlns="http://example.org/tiny#"
+     xml:base="http://example.org/tiny"
+     xmlns:owl="http://www.w3.org/2002/07/owl#"
+     xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+     xmlns:rdfs="http://www.w3.org/2000/01/rdf-schema#">
+    <owl:Ontology rdf:about="http://example.org/tiny"/>
+    <rdf:Description rdf:about="http://example.org/tiny#Status">
+        <owl:equivalentClass>
+            <rdfs:Datatype>
+                <owl:oneOf>
+                    <rdf:Description>
+                        <rdf:first>active</rdf:first>
+                        <rdf:rest>
+                            <rdf:Description>
+                                <rdf:first>closed</rdf:first>
+                                <rdf:rest rdf:resource="http://www.w3.org/1999/02/22-rdf-syntax-ns#nil"/>
+                            </rdf:Description>
+                        </rdf:rest>
+                    </rdf:Description>
+                </owl:oneOf>
+            </rdfs:Datatype>
+        </owl:equivalentClass>
+    </rdf:Description>
+    <owl:ObjectProperty rdf:about="http://example.org/tiny#hasC">
+        <rdfs:domain rdf:resource="http://example.org/tiny#A"/>
+        <rdfs:range rdf:resource="http://example.org/tiny#C"/>
+    </owl:ObjectProperty>
+    <owl:DatatypeProperty rdf:about="http://example.org/tiny#status">
+        <rdfs:domain rdf:resource="http://example.org/tiny#A"/>
+        <rdfs:range rdf:resource="http://example.org/tiny#Status"/>
+    </owl:DatatypeProperty>
+    <owl:Class rdf:about="http://example.org/tiny#A"/>
+    <owl:Class rdf:about="http://example.org/tiny#B">
+        <rdfs:subClassOf rdf:resource="http://example.org/tiny#A"/>
+    </owl:Class>
+    <owl:Class rdf:about="http://example.org/tiny#C"/>
+</rdf:RDF>
+'''
+
+TURTLE = b'''@prefix : <http://example.org/tiny#> .
+@prefix owl: <http://www.w3.org/2002/07/owl#> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+
+:Status owl:equivalentClass [ rdf:type rdfs:Datatype ; owl:oneOf ( "active" "closed" ) ] .
+:hasC rdf:type owl:ObjectProperty ; rdfs:domain :A ; rdfs:range :C .
+:status rdf:type owl:DatatypeProperty ; rdfs:domain :A ; rdfs:range :Status .
+:A rdf:type owl:Class .
+:B rdf:type owl:Class ; rdfs:subClassOf :A .
+:C rdf:type owl:Class .
+'''
+
+# Con @base prima dei prefissi, gli IRI assoluti non vanno risolti rispetto alla base
+TURTLE_BASE_FIRST = b'@base <http://example.org/tiny> .\n' + TURTLE.replace(
+    b'@prefix : <http://example.org/tiny#> .', b'@prefix : <#> .')
+
+JSON_LD = json.dumps({
+    '@context': {
+        '': 'http://example.org/tiny#',
+        'owl': 'http://www.w3.org/2002/07/owl#',
+        'rdfs': 'http://www.w3.org/2000/01/rdf-schema#',
+    },
+    '@graph': [
+        {'@id': ':Status', 'owl:equivalentClass': {
+            '@type': 'rdfs:Datatype', 'owl:oneOf': {'@list': ['active', 'closed']}}},
+        {'@id': ':hasC', '@type': 'owl:ObjectProperty', 'rdfs:domain': {'@id': ':A'}, 'rdfs:range': {'@id': ':C'}},
+        {'@id': ':status', '@type': 'owl:DatatypeProperty', 'rdfs:domain': {'@id': ':A'},
+         'rdfs:range': {'@id': ':Status'}},
+        {'@id': ':A', '@type': 'owl:Class'},
+        {'@id': ':B', '@type': 'owl:Class', 'rdfs:subClassOf': {'@id': ':A'}},
+        {'@id': ':C', '@type': 'owl:Class'},
+    ],
+}).encode()
+
+OFN = b'''Prefix(:=<http://example.org/tiny#>)
+Prefix(owl:=<http://www.w3.org/2002/07/owl#>)
+Ontology(<http://example.org/tiny>
+Declaration(Class(:A))
+Declaration(Class(:B))
+Declaration(Class(:C))
+Declaration(ObjectProperty(:hasC))
+Declaration(DataProperty(:status))
+Declaration(Datatype(:Status))
+ObjectPropertyDomain(:hasC :A)
+ObjectPropertyRange(:hasC :C)
+DataPropertyDomain(:status :A)
+DataPropertyRange(:status :Status)
+DatatypeDefinition(:Status DataOneOf("active" "closed"))
+SubClassOf(:B :A)
+)
+'''
+
+UML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<xmi:XMI xmi:version="20131001" xmlns:xmi="http://www.omg.org/spec/XMI/20131001"
+    xmlns:uml="http://www.eclipse.org/uml2/5.0.0/UML">
+  <uml:Model xmi:id="model" name="Tiny">
+    <packagedElement xmi:type="uml:Enumeration" xmi:id="status" name="Status">
+      <ownedLiteral xmi:id="active" name="active"/>
+      <ownedLiteral xmi:id="closed" name="closed"/>
+    </packagedElement>
+    <packagedElement xmi:type="uml:Class" xmi:id="a" name="A">
+      <ownedAttribute xmi:id="a-hasC" name="hasC" type="c"/>
+      <ownedAttribute xmi:id="a-status" name="status" type="status"/>
+    </packagedElement>
+    <packagedElement xmi:type="uml:Class" xmi:id="b" name="B">
+      <generalization xmi:id="b-a" general="a"/>
+    </packagedElement>
+    <packagedElement xmi:type="uml:Class" xmi:id="c" name="C"/>
+  </uml:Model>
+</xmi:XMI>
+'''
+
+FORMATS = {
+    'rdfxml': RDF_XML,
+    'turtle': TURTLE,
+    'jsonld': JSON_LD,
+    'ofn': OFN,
+    'xmi': UML,
+}
+
+def render(model, **options):
+    sink = io.StringIO()
+    converter.write_model_plantuml(sink, model, **options)
+    return sink.getvalue()
+
+def render_store(store, *view):
+    sink = io.StringIO()
+    converter.write_store_plantuml(sink, store, *view)
+    return sink.getvalue()
+
+class FormatTest(unittest.TestCase):
+    """Lo stesso modello letto da ogni front-end"""
+    
+    def setUp(self):
+        self.expected = render(converter.load_ontology(RDF_XML, format='rdfxml'))
+    
+    def test_fixture(self):
+        self.assertIn('"A" <|-- "B"', self.expected)
+        self.assertIn('"A" --> "C" : hasC', self.expected)
+        self.assertIn('"A" --> "Status" : status', self.expected)
+        self.assertIn('  active\n  closed\n', self.expected)
+    
+    def test_formats(self):
+        for format, data in FORMATS.items():
+            with self.subTest(format=format):
+                self.assertEqual(render(converter.load_ontology(data, format=format)), self.expected)
+    
+    def test_sniffed_formats(self):
+        for format, data in FORMATS.items():
+            with self.subTest(format=format):
+                self.assertEqual(render(converter.load_ontology(data)), self.expected)
+    
+    def test_store(self):
+        store = converter.ModelStore()
+        converter.stream_ontology(io.BytesIO(RDF_XML), store)
+        self.assertEqual(render_store(store), self.expected)
+        
+        for format, data in FORMATS.items():
+            with self.subTest(format=format):
+                store = converter.ModelStore()
+                store.import_model(converter.load_ontology(data, format=format))
+                self.assertEqual(render_store(store), self.expected)
+    
+    def test_store_reuse(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'tiny.owl')
+            with open(input_file, 'wb') as f:
+                f.write(RDF_XML)
+            path = os.path.join(tmp, 'tiny.db')
+            converter.load_store(input_file, path).close()
+            store = converter.load_store(input_file, path)
+            try:
+                self.assertEqual(store.meta('input'), converter.input_key(input_file))
+                self.assertEqual(render_store(store), self.expected)
+            finally:
+                store.close()
+
+class RegressionTest(unittest.TestCase):
+    """Casi che in passato davano un risultato sbagliato"""
+    
+    def test_turtle_base_first(self):
+        model = converter.load_ontology(TURTLE_BASE_FIRST, format='turtle')
+        self.assertEqual([cls.iri for cls in model.classes],
+                         ['http://example.org/tiny#A', 'http://example.org/tiny#B', 'http://example.org/tiny#C'])
+        self.assertEqual(render(model), render(converter.load_ontology(TURTLE, format='turtle')))
+    
+    def test_turtle_number_before_terminator(self):
+        # Il punto dopo un intero chiude lo statement
+        turtle = TURTLE + b':C rdfs:label 1.\n:D rdf:type owl:Class .\n:E rdfs:label 2.5e1 .\n'
+        model = converter.load_ontology(turtle, format='turtle')
+        self.assertEqual([cls.name for cls in model.classes], ['A', 'B', 'C', 'D'])
+        tokens = list(converter.tokenize_turtle('1. 1.5 1.e3 .5'))
+        self.assertEqual(tokens, [('number', '1'), ('punct', '.'), ('number', '1.5'), ('number', '1.e3'),
+                                  ('number', '.5')])
+    
+    def test_focus_by_iri(self):
+        model = converter.load_ontology(RDF_XML)
+        by_name = converter.focus_view(model, 'C', 1)
+        self.assertEqual(converter.focus_view(model, 'http://example.org/tiny#C', 1), by_name)
+        self.assertEqual(set(by_name[0]), {'A', 'C'})
+        
+        store = converter.ModelStore()
+        store.import_model(model)
+        class_names, enum_names = converter.store_focus_view(store, 'http://example.org/tiny#C', 1)
+        self.assertEqual((set(class_names), set(enum_names)), (set(by_name[0]), set(by_name[1])))
+    
+    def test_unknown_focus(self):
+        model = converter.load_ontology(RDF_XML)
+        with self.assertRaises(ValueError):
+            converter.focus_view(model, 'Missing')
+        with tempfile.TemporaryDirectory() as tmp:
+            job = converter.BatchJob('tiny.owl', os.path.join(tmp, 'view.puml'), focus='Missing')
+            with self.assertRaises(ValueError):
+                converter.batch_render(model, job)
+            self.assertFalse(os.path.exists(job.output))
+    
+    def test_ofn_abbreviated_has_key(self):
+        ofn = OFN.replace(b'SubClassOf(:B :A)', b'SubClassOf(:B :A)\nHasKey(:C () (:status))')
+        model = converter.load_ontology(ofn, format='ofn')
+        self.assertIn(('status', 'C'), [(prop.name, prop.domain) for prop in model.properties])
+    
+    def test_element_counts(self):
+        model = converter.load_ontology(RDF_XML, format='rdfxml')
+        self.assertEqual(model.element_counts['enumerations'], 1)
+        self.assertEqual(model.element_counts['owl_classes'], 3)
+    
+    def test_enum_limit(self):
+        model = converter.load_ontology(RDF_XML)
+        state = converter.DiagramState(enum_limit=1)
+        _, text = state.update(model)
+        self.assertEqual(text, render(model, enum_limit=1))
+        self.assertIn('.. altri 1 valori ..', text)
+    
+    def test_partition_unknown_class(self):
+        # "Unknown" non fa parte della gerarchia e non deve interrompere la divisione
+        model = converter.load_ontology(RDF_XML)
+        model.add_class(converter.OntClass('Unknown'))
+        parts = converter.partition_classes(model, 2)
+        self.assertEqual(parts, [('A', ['A', 'B']), ('C', ['C']), ('Unknown', ['Unknown'])])
+
+class HierarchyTest(unittest.TestCase):
+    """Chiusura della gerarchia con classi equivalenti e cicli di subClassOf"""
+    
+    def setUp(self):
+        # D e E sono equivalenti, F e G formano un ciclo; H ha una superclasse non dichiarata
+        classes = [
+            converter.OntClass('A'),
+            converter.OntClass('B', subclass_of=['A']),
+            converter.OntClass('C', subclass_of=['B']),
+            converter.OntClass('D', subclass_of=['A'], equivalent_to=['E']),
+            converter.OntClass('E'),
+            converter.OntClass('F', subclass_of=['G', 'C']),
+            converter.OntClass('G', subclass_of=['F']),
+            converter.OntClass('H', subclass_of=['Missing', 'Unknown']),
+        ]
+        self.index = converter.HierarchyIndex(classes)
+    
+    def test_closure(self):
+        index = self.index
+        self.assertEqual(index.ancestors('C'), ['A', 'B'])
+        self.assertEqual(index.ancestors('F'), ['A', 'B', 'C'])
+        self.assertEqual(sorted(index.descendants('A')), ['B', 'C', 'D', 'E', 'F', 'G'])
+        self.assertEqual(index.descendant_count('A'), 4)
+        self.assertEqual(index.depth('G'), 3)
+        self.assertEqual(index.ancestors('H'), ['Missing'])
+        self.assertNotIn('Unknown', index)
+    
+    def test_equivalence(self):
+        index = self.index
+        self.assertEqual(index.equivalents('D'), ['E'])
+        self.assertEqual(index.equivalents('G'), ['F'])
+        self.assertEqual(index.ancestors('E'), ['A'])
+        self.assertTrue(index.is_subclass_of('F', 'G'))
+        self.assertTrue(index.is_subclass_of('G', 'A'))
+        self.assertTrue(index.is_subclass_of('E', 'D'))
+        self.assertFalse(index.is_subclass_of('A', 'C'))
+        self.assertFalse(index.is_subclass_of('A', 'Unknown'))
+    
+    def test_order(self):
+        order = self.index.order()
+        for name in order:
+            for ancestor in self.index.ancestors(name):
+                self.assertLess(order.index(ancestor), order.index(name))
+        self.assertEqual(self.index.roots(), ['A', 'Missing'])
+    
+    def test_deep_chain(self):
+        # Una catena lunga non deve esaurire lo stack
+        classes = [converter.OntClass('C0')]
+        classes.extend(converter.OntClass(f'C{i}', subclass_of=[f'C{i - 1}']) for i in range(1, 5000))
+        index = converter.HierarchyIndex(classes)
+        self.assertEqual(index.depth('C4999'), 4999)
+        self.assertEqual(index.descendant_count('C0'), 4999)
+        self.assertTrue(index.is_subclass_of('C4999', 'C0'))
+    
+    def test_model(self):
+        model = converter.load_ontology(RDF_XML)
+        self.assertIs(model.hierarchy(), model.hierarchy())
+        self.assertEqual(model.hierarchy().descendants('A'), ['B'])
+
+class LibraryTest(unittest.TestCase):
+    """API da libreria: to_plantuml, plantuml_chunks e la variante asyncio"""
+    
+    def setUp(self):
+        self.expected = render(converter.load_ontology(RDF_XML))
+    
+    def test_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tiny.owl')
+            with open(path, 'wb') as f:
+                f.write(RDF_XML)
+            sources = {
+                'path': path,
+                'bytes': RDF_XML,
+                'file': io.BytesIO(RDF_XML),
+                'element': ET.fromstring(RDF_XML),
+                'jsonld': json.loads(JSON_LD),
+                'model': converter.load_ontology(RDF_XML),
+            }
+            for kind, source in sources.items():
+                with self.subTest(source=kind):
+                    self.assertEqual(converter.to_plantuml(source), self.expected)
+            self.assertEqual(converter.to_plantuml(TURTLE, format='turtle'), self.expected)
+    
+    def test_chunks(self):
+        # L'estrazione avviene solo alla prima richiesta di un blocco
+        chunks = converter.plantuml_chunks(b'<rdf:RDF', format='rdfxml')
+        with self.assertRaises(ET.ParseError):
+            next(chunks)
+        chunks = list(converter.plantuml_chunks(OFN))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(''.join(chunks), self.expected)
+    
+    def test_async(self):
+        async def convert_all(executor):
+            return await asyncio.gather(converter.to_plantuml_async(RDF_XML),
+                                        converter.to_plantuml_async(TURTLE, 'turtle', executor=executor))
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            self.assertEqual(asyncio.run(convert_all(executor)), [self.expected, self.expected])
+
+def mdzip(members):
+    """Progetto MagicDraw in memoria con i membri indicati (nome -> bytes)"""
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return data.getvalue()
+
+class MdzipTest(unittest.TestCase):
+    """Lettura dei progetti MagicDraw senza estrarre l'archivio"""
+    
+    def setUp(self):
+        self.expected = render(converter.load_ontology(UML, format='xmi'))
+        self.project = mdzip({
+            'com.nomagic.magicdraw.core.project.options': b'<options/>',
+            converter.MDZIP_MODEL_MEMBER: UML,
+            'com.nomagic.ci.metamodel.project': b'not xml',
+        })
+    
+    def test_sources(self):
+        self.assertEqual(render(converter.load_ontology(self.project)), self.expected)
+        self.assertEqual(render(converter.load_ontology(io.BytesIO(self.project), format='mdzip')), self.expected)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tiny.mdzip')
+            with open(path, 'wb') as f:
+                f.write(self.project)
+            self.assertEqual(render(converter.load_ontology(path)), self.expected)
+    
+    def test_missing_model(self):
+        project = mdzip({'com.nomagic.magicdraw.core.project.options': b'<options/>'})
+        with self.assertRaises(ValueError):
+            converter.read_mdzip(io.BytesIO(project))
+
+class CacheTest(unittest.TestCase):
+    """ModelCache su disco: riuso, invalidazione ed eliminazione delle voci"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.input_file = self.write('tiny.owl', RDF_XML)
+        self.cache = converter.ModelCache(os.path.join(self.tmp.name, 'cache'))
+    
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    
+    def entries(self):
+        return sorted(name for name in os.listdir(self.cache.directory) if name.endswith(converter.ModelCache.SUFFIX))
+    
+    def test_hit(self):
+        expected = render(converter.load_ontology(self.input_file, self.cache))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        self.assertEqual(render(converter.load_ontology(self.input_file, self.cache)), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        
+        # Un contenuto diverso ha un'altra chiave
+        self.write('tiny.owl', RDF_XML.replace(b'tiny#C"/>', b'tiny#C"/>\n    <owl:Class rdf:about="http://example.org/tiny#D"/>'))
+        self.assertIn('"D"', render(converter.load_ontology(self.input_file, self.cache)))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        self.assertEqual(len(self.entries()), 2)
+    
+    def test_damaged_entry(self):
+        converter.load_ontology(self.input_file, self.cache)
+        key = self.cache.key(self.input_file)
+        with open(self.cache.path(key), 'wb') as f:
+            f.write(b'not a pickle')
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(self.entries(), [])
+        self.assertEqual(render(converter.load_ontology(self.input_file, self.cache)),
+                         render(converter.load_ontology(RDF_XML)))
+    
+    def test_eviction(self):
+        model = converter.load_ontology(RDF_XML)
+        for age, key in enumerate(('first', 'second', 'third'), 1):
+            self.cache.put(key, model)
+            os.utime(self.cache.path(key), (age, age))
+        self.cache.evict()
+        self.assertEqual(len(self.entries()), 3)
+        
+        # Con spazio per due voci resta la più recente e quella appena letta
+        self.cache.get('first')
+        self.cache.max_bytes = 2 * os.path.getsize(self.cache.path('first'))
+        self.cache.evict()
+        self.assertEqual(self.entries(), ['first' + converter.ModelCache.SUFFIX, 'third' + converter.ModelCache.SUFFIX])
+
+# TURTLE con una classe in più, un valore in meno e l'attributo di A rimosso
+TURTLE_EDITED = TURTLE.replace(b'( "active" "closed" )', b'( "active" )').replace(
+    b':status rdf:type owl:DatatypeProperty ; rdfs:domain :A ; rdfs:range :Status .\n', b'') + b':D rdf:type owl:Class .\n'
+
+class WatchTest(unittest.TestCase):
+    """Rigenerazione incrementale della modalità watch"""
+    
+    def test_update(self):
+        state = converter.DiagramState()
+        model = converter.load_ontology(TURTLE, format='turtle')
+        changes, text = state.update(model)
+        self.assertEqual(text, render(model))
+        self.assertEqual({operation for operation, _ in changes}, {'+'})
+        unchanged = state.fragments[('class', 'C')]
+        
+        edited = converter.load_ontology(TURTLE_EDITED, format='turtle')
+        changes, text = state.update(edited)
+        self.assertEqual(text, render(edited))
+        self.assertEqual(sorted(converter.describe_change(*change) for change in changes),
+                         ['+ class D', '- DataProperty status (A)', '~ enum Status'])
+        self.assertIs(state.fragments[('class', 'C')], unchanged)
+        
+        # Senza modifiche il testo resta identico
+        self.assertEqual(state.update(converter.load_ontology(TURTLE_EDITED, format='turtle')), ([], text))
+    
+    def test_watch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'tiny.ttl')
+            output_file = os.path.join(tmp, 'tiny.puml')
+            with open(input_file, 'wb') as f:
+                f.write(TURTLE)
+            
+            sink = io.StringIO()
+            with redirect_stdout(sink):
+                watcher = threading.Thread(target=converter.watch_owl2plantuml,
+                                           args=(input_file, output_file, 0.01), kwargs={'max_updates': 2})
+                watcher.start()
+                deadline = time.monotonic() + 10
+                while not os.path.exists(output_file) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                # Con una rinomina il watcher non vede mai il file a metà
+                with open(input_file + '.new', 'wb') as f:
+                    f.write(TURTLE_EDITED)
+                os.replace(input_file + '.new', input_file)
+                watcher.join(10)
+            
+            self.assertFalse(watcher.is_alive())
+            with open(output_file, encoding='utf-8') as f:
+                self.assertEqual(f.read(), render(converter.load_ontology(TURTLE_EDITED, format='turtle')))
+            self.assertIn('+ class D\n', sink.getvalue())
+            self.assertTrue(sink.getvalue().endswith(f'File PlantUML aggiornato: {output_file}\n'))
+
+class PartitionTest(unittest.TestCase):
+    """Divisione del diagramma in parti con stub per le classi esterne"""
+    
+    def test_partition(self):
+        model = converter.load_ontology(RDF_XML)
+        # A e C sono collegate da hasC e vengono unite solo se c'è spazio
+        self.assertEqual(converter.partition_classes(model, 2), [('A', ['A', 'B']), ('C', ['C'])])
+        self.assertEqual(converter.partition_classes(model, 3), [('A', ['A', 'B', 'C'])])
+        self.assertEqual(converter.partition_classes(model, 1), [('A', ['A', 'B']), ('C', ['C'])])
+    
+    def test_partition_path(self):
+        self.assertEqual(converter.partition_path('out/ccm.puml', 'Body Site/2'), 'out/ccm-Body_Site_2.puml')
+        self.assertEqual(converter.partition_path('out/ccm', 'A'), 'out/ccm-A.puml')
+    
+    def test_write_partitions(self):
+        model = converter.load_ontology(RDF_XML)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = converter.write_partitions(model, os.path.join(tmp, 'tiny.puml'), 2, enum_limit=1)
+            self.assertEqual(paths, [os.path.join(tmp, 'tiny-A.puml'), os.path.join(tmp, 'tiny-C.puml')])
+            texts = []
+            for path in paths:
+                with open(path, encoding='utf-8') as f:
+                    texts.append(f.read())
+        
+        self.assertEqual(texts[0], render(model, class_names=['A', 'B'], external=True, enum_limit=1))
+        self.assertIn('class "C" <<external>>\n', texts[0])
+        self.assertIn('"A" --> "C" : hasC', texts[0])
+        self.assertIn('.. altri 1 valori ..', texts[0])
+        self.assertIn('class "A" <<external>>\n', texts[1])
+        self.assertNotIn('"Status"', texts[1])
+
+class ProfilerTest(unittest.TestCase):
+    """Metriche raccolte da ConversionProfiler durante una conversione"""
+    
+    def test_report(self):
+        model = converter.load_ontology(RDF_XML)
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, 'tiny.owl')
+            with open(input_file, 'wb') as f:
+                f.write(RDF_XML)
+            cache = converter.ModelCache(os.path.join(tmp, 'cache'))
+            for _ in range(2):
+                profiler = converter.ConversionProfiler()
+                sink = io.StringIO()
+                converter.convert_owl2plantuml(input_file, sink, cache, profiler=profiler, focus='C', depth=1)
+            
+            path = os.path.join(tmp, 'profile.json')
+            profiler.dump(path)
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        
+        class_names, enum_names = converter.focus_view(model, 'C', 1)
+        self.assertEqual(sink.getvalue(), render(model, class_names=class_names, enum_names=enum_names))
+        self.assertEqual(report, profiler.report())
+        self.assertEqual(list(report['stages']), ['load_ontology', 'extract_relations', 'focus_view', 'generate_plantuml'])
+        for stats in report['stages'].values():
+            self.assertEqual(stats['calls'], 1)
+            self.assertGreaterEqual(stats['wall_seconds'], 0)
+            self.assertGreater(stats['peak_bytes'], 0)
+        self.assertEqual({name: report['counts'][name] for name in ('classes', 'properties', 'enumerations')},
+                         {'classes': 3, 'properties': 2, 'enumerations': 1})
+        self.assertEqual(report['counts']['relations'],
+                         len(list(converter.iter_relations(model.classes, model.properties))))
+        self.assertEqual(report['counts']['elements'], model.element_counts)
+        self.assertEqual(report['caches']['models'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+    
+    def test_cprofile(self):
+        with self.assertRaises(ValueError):
+            converter.ConversionProfiler().dump(os.devnull, format='cprofile')
+        profiler = converter.ConversionProfiler(trace_memory=False, cprofile=True)
+        with profiler.stage('load_ontology'):
+            converter.load_ontology(RDF_XML)
+        self.assertNotIn('peak_bytes', profiler.stages['load_ontology'])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profile.prof')
+            profiler.dump(path, format='cprofile')
+            self.assertGreater(os.path.getsize(path), 0)
+
+def emit(format, model, **options):
+    sink = io.StringIO()
+    converter.EMITTERS[format](sink, model, **options)
+    return sink.getvalue()
+
+class EmitterTest(unittest.TestCase):
+    """Formati di output Mermaid, DOT e JSON"""
+    
+    def setUp(self):
+        self.model = converter.load_ontology(RDF_XML)
+    
+    def test_mermaid(self):
+        self.assertEqual(emit('mermaid', self.model, enum_limit=1), (
+            'classDiagram\n'
+            '  class Status {\n    <<enumeration>>\n    active\n    altri 1 valori\n  }\n'
+            '  class A {\n    +Status status\n  }\n'
+            '  class B\n'
+            '  class C\n'
+            '  A --> C : hasC\n'
+            '  A <|-- B\n'
+            '  A --> Status : status\n'))
+    
+    def test_dot(self):
+        self.assertEqual(emit('dot', self.model, enum_limit=1), (
+            'digraph ontology {\n'
+            '  rankdir=BT;\n'
+            '  node [shape=record, fontname="Helvetica", fontsize=10];\n'
+            '  edge [fontname="Helvetica", fontsize=9];\n'
+            '  "Status" [label="{«enumeration»\\nStatus|active\\laltri 1 valori\\l}"];\n'
+            '  "A" [label="{A|+Status status\\l}"];\n'
+            '  "B" [label="{B|}"];\n'
+            '  "C" [label="{C|}"];\n'
+            '  "A" -> "C" [label="hasC"];\n'
+            '  "B" -> "A" [arrowhead=empty];\n'
+            '  "A" -> "Status" [style=dashed, label="status"];\n'
+            '}\n'))
+    
+    def test_special_names(self):
+        model = converter.load_ontology(RDF_XML)
+        model.add_class(converter.OntClass('Body Site', subclass_of=['A']))
+        model.add_class(converter.OntClass('Set{x}'))
+        mermaid = emit('mermaid', model)
+        self.assertIn('  class Body_Site["Body Site"]\n', mermaid)
+        self.assertIn('  A <|-- Body_Site\n', mermaid)
+        dot = emit('dot', model)
+        self.assertIn('  "Set\\{x\\}" [label="{Set\\{x\\}|}"];\n', dot)
+        self.assertIn('  "Body Site" -> "A" [arrowhead=empty];\n', dot)
+    
+    def test_json(self):
+        document = json.loads(emit('json', self.model, enum_limit=1))
+        self.assertEqual(document['version'], converter.EXTRACTOR_VERSION)
+        self.assertEqual([cls['name'] for cls in document['classes']], ['A', 'B', 'C'])
+        self.assertEqual(document['classes'][1]['subclass_of'], ['A'])
+        self.assertEqual([(prop['name'], prop['domain'], prop['range']) for prop in document['properties']],
+                         [('hasC', 'A', 'C'), ('status', 'A', 'Status')])
+        # I valori delle enumerazioni sono sempre completi
+        self.assertEqual(document['enumerations'][0]['values'], ['active', 'closed'])
+        self.assertEqual([(ref['source'], ref['target']) for ref in document['enum_references']], [('A', 'Status')])
+    
+    def test_emit_all(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'tiny.json')
+            missing = os.path.join(tmp, 'missing', 'tiny.dot')
+            sinks = {format: io.StringIO() for format in ('plantuml', 'mermaid', 'dot')}
+            targets = [*sinks.items(), ('json', path), ('dot', missing)]
+            results = converter.emit_all(self.model, targets, workers=3, enum_limit=1)
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), emit('json', self.model))
+        
+        self.assertEqual([(format, target) for format, target, _ in results], targets)
+        self.assertEqual([error for _, _, error in results[:4]], [None] * 4)
+        self.assertIsInstance(results[4][2], OSError)
+        for format, sink in sinks.items():
+            self.assertEqual(sink.getvalue(), emit(format, self.model, enum_limit=1))
+        with self.assertRaises(ValueError):
+            converter.emit_all(self.model, [('png', io.StringIO())])
+
+class LayoutTest(unittest.TestCase):
+    """Disposizione a livelli e renderer SVG integrato"""
+    
+    def assertNoOverlaps(self, layout):
+        for row in layout.rows:
+            boxes = sorted((layout.x[name] - layout.sizes[name][0] / 2, layout.x[name] + layout.sizes[name][0] / 2)
+                           for name in row)
+            for (_, right), (left, _) in zip(boxes, boxes[1:]):
+                self.assertLessEqual(right, left)
+    
+    def test_count_inversions(self):
+        values = [3, 0, 2, 2, 5, 1, 4, 0]
+        brute = sum(values[i] > values[j] for i in range(len(values)) for j in range(i + 1, len(values)))
+        self.assertEqual(converter.count_inversions(values), brute)
+        self.assertEqual(converter.count_inversions([]), 0)
+    
+    def test_crossings(self):
+        # Nell'ordine di partenza i due archi si incrociano
+        sizes = dict.fromkeys('abcd', (40, 20))
+        layout = converter.LayeredLayout(sizes, [('a', 'd'), ('b', 'c')], {'a': 0, 'b': 0, 'c': 1, 'd': 1}, sweeps=0)
+        self.assertEqual(layout.crossings(), 1)
+        layout = converter.LayeredLayout(sizes, [('a', 'd'), ('b', 'c')], {'a': 0, 'b': 0, 'c': 1, 'd': 1})
+        self.assertEqual(layout.crossings(), 0)
+        self.assertNoOverlaps(layout)
+    
+    def test_long_edges(self):
+        sizes = {'top': (80, 30), 'middle': (50, 30), 'bottom': (60, 30)}
+        edges = [('top', 'middle'), ('middle', 'bottom'), ('top', 'bottom'), ('bottom', 'bottom')]
+        layout = converter.LayeredLayout(sizes, edges, {'top': 0, 'middle': 1, 'bottom': 2})
+        # L'arco che salta un livello passa per un nodo fittizio
+        self.assertEqual(layout.chains[2], ['top', (2, 1), 'bottom'])
+        self.assertEqual(len(layout.route(2)), 3)
+        self.assertEqual(len(layout.route(3)), 4)
+        self.assertLess(layout.y['top'], layout.y['middle'])
+        self.assertLess(layout.y['middle'], layout.y['bottom'])
+        self.assertNoOverlaps(layout)
+    
+    def test_svg(self):
+        model = converter.load_ontology(RDF_XML)
+        model.add_class(converter.OntClass('R&D <x>', subclass_of=['B']))
+        svg = emit('svg', model, enum_limit=1)
+        root = ET.fromstring(svg)
+        ns = {'svg': 'http://www.w3.org/2000/svg'}
+        titles = [text.text for text in root.iterfind('.//svg:text[@class="title"]', ns)]
+        self.assertEqual(sorted(titles), ['A', 'B', 'C', 'R&D <x>', 'Status'])
+        self.assertIn('.. altri 1 valori ..', [text.text for text in root.iterfind('.//svg:text', ns)])
+        self.assertEqual(len(root.findall('.//svg:path[@marker-end="url(#extends)"]', ns)), 2)
+        
+        # Le superclassi stanno sopra le sottoclassi
+        tops = {}
+        for group in root.iterfind('svg:g', ns):
+            tops[group.find('svg:text[@class="title"]', ns).text] = float(group.find('svg:rect', ns).get('y'))
+        self.assertLess(tops['A'], tops['B'])
+        self.assertLess(tops['B'], tops['R&D <x>'])
+    
+    def test_large_layout(self):
+        # Ontologia sintetica: alberi di sottoclassi e associazioni tra rami
+        classes = [converter.OntClass('C0')]
+        classes.extend(converter.OntClass(f'C{i}', subclass_of=[f'C{(i - 1) // 3}']) for i in range(1, 60))
+        sizes = {cls.name: (40 + len(cls.name) * 5, 30) for cls in classes}
+        edges = [(cls.name, cls.subclass_of[0]) for cls in classes[1:]]
+        edges.extend((f'C{i}', f'C{(i * 7) % 60}') for i in range(0, 60, 4))
+        model = converter.OntologyModel()
+        for cls in classes:
+            model.add_class(cls)
+        layers = converter.diagram_layers(model, list(sizes), edges)
+        unordered = converter.LayeredLayout(sizes, edges, layers, sweeps=0)
+        layout = converter.LayeredLayout(sizes, edges, layers)
+        self.assertLessEqual(layout.crossings(), unordered.crossings())
+        self.assertNoOverlaps(layout)
+        self.assertEqual(layers['C59'], model.hierarchy().depth('C59'))
+
+class BatchTest(unittest.TestCase):
+    """Job batch da manifest, eseguiti in parallelo"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        for name, data in (('tiny.owl', RDF_XML), ('tiny.ttl', TURTLE), ('broken.owl', b'<rdf:RDF')):
+            with open(os.path.join(self.tmp.name, name), 'wb') as f:
+                f.write(data)
+    
+    def manifest(self, inputs):
+        path = os.path.join(self.tmp.name, 'manifest.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'inputs': inputs}, f)
+        return path
+    
+    def test_manifest(self):
+        path = self.manifest([
+            {'input': 'tiny.*', 'views': [{'output': 'out/{stem}.puml'},
+                                          {'output': 'out/{name}-c.puml', 'focus': 'C', 'depth': 1, 'enum_limit': 1}]},
+            {'input': 'broken.owl'},
+        ])
+        jobs = converter.load_manifest(path, enum_limit=5)
+        out = os.path.join(self.tmp.name, 'out')
+        self.assertEqual([(os.path.basename(job.input), job.output, job.focus, job.enum_limit) for job in jobs], [
+            ('tiny.owl', os.path.join(out, 'tiny.puml'), None, 5),
+            ('tiny.owl', os.path.join(out, 'tiny.owl-c.puml'), 'C', 1),
+            ('tiny.ttl', os.path.join(out, 'tiny.puml'), None, 5),
+            ('tiny.ttl', os.path.join(out, 'tiny.ttl-c.puml'), 'C', 1),
+            ('broken.owl', os.path.join(self.tmp.name, 'broken.puml'), None, 5),
+        ])
+        with self.assertRaises(ValueError):
+            converter.run_batch(jobs, workers=2)
+    
+    def test_run(self):
+        jobs = converter.glob_jobs([os.path.join(self.tmp.name, '*.owl')], os.path.join(self.tmp.name, 'out'))
+        jobs.append(converter.BatchJob(jobs[1].input, os.path.join(self.tmp.name, 'out', 'c.puml'), focus='C', depth=1))
+        results = converter.run_batch(jobs, workers=2)
+        self.assertEqual([job for job, _ in results], jobs)
+        self.assertIsNotNone(results[0][1])
+        self.assertEqual([error for _, error in results[1:]], [None, None])
+        
+        model = converter.load_ontology(RDF_XML)
+        with open(jobs[1].output, encoding='utf-8') as f:
+            self.assertEqual(f.read(), render(model))
+        class_names, enum_names = converter.focus_view(model, 'C', 1)
+        with open(jobs[2].output, encoding='utf-8') as f:
+            self.assertEqual(f.read(), render(model, class_names=class_names, enum_names=enum_names))
+        self.assertFalse(os.path.exists(jobs[0].output))
+        
+        # Lo stream predefinito è lo stdout al momento della chiamata
+        sink = io.StringIO()
+        with redirect_stdout(sink):
+            self.assertEqual(converter.report_batch(results), 1)
+        self.assertTrue(sink.getvalue().startswith('ERRORE  '))
+        self.assertTrue(sink.getvalue().endswith('2 job completati, 1 falliti\n'))
+
+class QuietHandler(converter.RenderRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+class ServerTest(unittest.TestCase):
+    """Il server HTTP di conversione su una porta locale"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'tiny.owl')
+        with open(path, 'wb') as f:
+            f.write(RDF_XML)
+        self.server = converter.http.server.ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+        self.server.service = converter.RenderService({'tiny': path}, workers=2)
+        self.server.max_upload = 64 * 1024
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.expected = render(converter.load_ontology(RDF_XML))
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server.service.close()
+        self.tmp.cleanup()
+    
+    def request(self, method, path, body=None, headers=()):
+        """Invia la richiesta con esattamente gli header indicati; restituisce (stato, header, testo)"""
+        connection = http.client.HTTPConnection(*self.server.server_address[:2], timeout=10)
+        try:
+            connection.putrequest(method, path, skip_accept_encoding=True)
+            for name, value in headers:
+                connection.putheader(name, value)
+            connection.endheaders(body)
+            response = connection.getresponse()
+            return response.status, response.headers, response.read().decode('utf-8')
+        finally:
+            connection.close()
+    
+    def test_files(self):
+        status, _, text = self.request('GET', '/files')
+        self.assertEqual((status, json.loads(text)), (200, ['tiny']))
+        self.assertEqual(self.request('GET', '/plantuml?file=missing')[0], 404)
+    
+    def test_configured_file(self):
+        status, headers, text = self.request('GET', '/plantuml?file=tiny')
+        self.assertEqual((status, headers['X-Cache'], text), (200, 'miss', self.expected))
+        self.assertEqual(self.request('GET', '/plantuml?file=tiny')[1]['X-Cache'], 'hit')
+    
+    def test_upload(self):
+        length = [('Content-Length', str(len(RDF_XML)))]
+        status, headers, text = self.request('POST', '/plantuml', RDF_XML, length)
+        self.assertEqual((status, headers['X-Cache'], text), (200, 'miss', self.expected))
+        status, headers, _ = self.request('POST', '/plantuml', RDF_XML, length)
+        self.assertEqual((status, headers['X-Cache']), (200, 'hit'))
+        status, _, text = self.request('POST', '/plantuml?enum_limit=1', RDF_XML, length)
+        self.assertEqual((status, text), (200, render(converter.load_ontology(RDF_XML), enum_limit=1)))
+        self.assertEqual(self.request('POST', '/plantuml?colour=red', RDF_XML, length)[0], 400)
+    
+    def test_content_length(self):
+        # Ogni richiesta deve ricevere una risposta senza restare in attesa del corpo
+        self.assertEqual(self.request('POST', '/plantuml', RDF_XML)[0], 411)
+        for value in ('-1', 'abc', ''):
+            with self.subTest(length=value):
+                self.assertEqual(self.request('POST', '/plantuml', RDF_XML, [('Content-Length', value)])[0], 400)
+        self.assertEqual(self.request('POST', '/plantuml', b'', [('Content-Length', str(1024 * 1024))])[0], 413)
+
+if __name__ == '__main__':
+    unittest.main()